@@ -7,6 +7,23 @@ Can be extended to use OpenAI Agents SDK later.
 import re
 from typing import Any, Dict, Optional, Tuple
 from mcp_tools import get_tool_function
+from intent_engine import UNKNOWN, IntentEngine, IntentRule
+from title_index import title_index
+
+# Both keyword groups of an intent must match; checked in this order
+SIMPLE_INTENTS = IntentEngine([
+    IntentRule(
+        "add",
+        ["remember", "remind", "add", "create", "new", "save", "note", "make"],
+        ["task", "todo", "remember"],
+        # Title is everything after the first action word
+        slots={"title": r"(?:^|(?<=\s))(?:remember|add|create|save)(?=\s|$)(.*)"}
+    ),
+    IntentRule("list", ["show", "list", "what", "get", "give me", "my"], ["tasks", "todos", "do", "need"]),
+    IntentRule("complete", ["done", "complete", "finish", "mark", "check", "tick"], ["task", "todo"]),
+    IntentRule("update", ["change", "update", "edit", "modify", "rename"], ["to", "as", "into"]),
+    IntentRule("delete", ["delete", "remove", "cancel", "forget"], ["task", "todo"]),
+])
 
 
 class SimpleAgent:
@@ -14,28 +31,7 @@ class SimpleAgent:
 
     def __init__(self):
         """Initialize the agent."""
-        self.intent_patterns = {
-            "add": [
-                r"(?:remember|remind|add|create|new|save|note|make)",
-                r"(?:task|todo|remember)",
-            ],
-            "list": [
-                r"(?:show|list|what|get|give me|my)",
-                r"(?:tasks|todos|do|need)",
-            ],
-            "complete": [
-                r"(?:done|complete|finish|mark|check|tick)",
-                r"(?:task|todo)",
-            ],
-            "update": [
-                r"(?:change|update|edit|modify|rename)",
-                r"(?:to|as|into)",
-            ],
-            "delete": [
-                r"(?:delete|remove|cancel|forget)",
-                r"(?:task|todo)",
-            ],
-        }
+        self.intents = SIMPLE_INTENTS
 
     def detect_intent(self, message: str) -> Tuple[str, str]:
         """Detect user intent from message.
@@ -46,14 +42,10 @@ class SimpleAgent:
         Returns:
             Tuple of (intent, tool_name)
         """
-        message_lower = message.lower()
-
-        # Check each intent pattern
-        for intent, patterns in self.intent_patterns.items():
-            if all(re.search(p, message_lower) for p in patterns):
-                return intent, self._intent_to_tool(intent)
-
-        return "unknown", None
+        intent = self.intents.classify(message).intent
+        if intent == UNKNOWN:
+            return "unknown", None
+        return intent, self._intent_to_tool(intent)
 
     def _intent_to_tool(self, intent: str) -> str:
         """Map intent to MCP tool name.
@@ -95,7 +87,42 @@ class SimpleAgent:
 
         return info
 
-    def process_message(
+    async def _resolve_task(self, user_id: str, reference: str, status: str) -> Optional[Dict[str, Any]]:
+        """Task named in reference.
+
+        Args:
+            user_id: User ID
+            reference: Message text naming the task
+            status: "pending" or "all"
+
+        Returns:
+            Dict with id and title, or None if no task matches; never a guess
+        """
+        matches = await title_index.resolve(user_id, reference, include_completed=status == "all")
+        if matches:
+            task_id, title, _ = matches[0]
+            return {"id": task_id, "title": title}
+        return None
+
+    async def _ask_which_task(self, user_id: str, status: str, verb: str) -> str:
+        """Question asking which task was meant, when none matched.
+
+        Args:
+            user_id: User ID
+            status: "pending" or "all"
+            verb: What the user wants to do, e.g. "delete"
+
+        Returns:
+            Message listing a few of the user's tasks to choose from
+        """
+        list_result = await get_tool_function("list_tasks")(user_id, status)
+        tasks = list_result["tasks"] if list_result["success"] else []
+        if not tasks:
+            return f"No tasks to {verb}!"
+        titles = "\n".join(f"• {task['title']}" for task in tasks[:5])
+        return f"Which task do you want to {verb}? Tell me its name, for example:\n{titles}"
+
+    async def process_message(
         self, message: str, user_id: str
     ) -> Tuple[str, Optional[str], Optional[str]]:
         """Process user message and invoke appropriate tool.
@@ -108,7 +135,9 @@ class SimpleAgent:
             Tuple of (response, tool_used, action_taken)
         """
         # Detect intent
-        intent, tool_name = self.detect_intent(message)
+        match = self.intents.classify(message)
+        intent = match.intent
+        tool_name = self._intent_to_tool(intent)
 
         if not tool_name:
             return (
@@ -135,16 +164,13 @@ class SimpleAgent:
                 description = None
 
                 # Simple extraction
-                words = message.split()
-                for i, word in enumerate(words):
-                    if word.lower() in ["remember", "add", "create", "save"]:
-                        title = " ".join(words[i + 1 :])
-                        break
+                if "title" in match.slots:
+                    title = " ".join(match.slots["title"].split())
 
                 if not title:
                     title = message
 
-                result = tool_func(user_id, title[:200], description)
+                result = await tool_func(user_id, title[:200], description)
 
                 if result["success"]:
                     return (
@@ -156,7 +182,7 @@ class SimpleAgent:
                     return f"❌ Error: {result['error']}", tool_name, None
 
             elif tool_name == "list_tasks":
-                result = tool_func(user_id, "all")
+                result = await tool_func(user_id, "all")
 
                 if result["success"]:
                     tasks = result["tasks"]
@@ -176,16 +202,10 @@ class SimpleAgent:
                     return f"Error: {result['error']}", tool_name, None
 
             elif tool_name == "complete_task":
-                # Try to extract task reference
-                # For now, complete the first pending task
-                list_result = get_tool_function("list_tasks")(user_id, "pending")
+                task = await self._resolve_task(user_id, message, "pending")
 
-                if (
-                    list_result["success"]
-                    and list_result["tasks"]
-                ):
-                    task = list_result["tasks"][0]
-                    result = tool_func(user_id, task["id"], True)
+                if task:
+                    result = await tool_func(user_id, task["id"], True)
 
                     if result["success"]:
                         return (
@@ -196,24 +216,21 @@ class SimpleAgent:
                     else:
                         return f"Error: {result['error']}", tool_name, None
                 else:
-                    return "No pending tasks to complete!", tool_name, None
+                    return await self._ask_which_task(user_id, "pending", "complete"), None, None
 
             elif tool_name == "update_task":
-                # Extract task reference and new info
-                # For now, update the first task
-                list_result = get_tool_function("list_tasks")(user_id, "all")
+                # "change <task> to <new title>"
+                parts = re.split(r"\bto\b", message.lower(), maxsplit=1)
+                task = await self._resolve_task(user_id, parts[0], "all")
 
-                if list_result["success"] and list_result["tasks"]:
-                    task = list_result["tasks"][0]
+                if task:
                     # Extract new title from message
                     new_title = None
-                    if "to" in message.lower():
-                        parts = message.lower().split("to", 1)
-                        if len(parts) > 1:
-                            new_title = parts[1].strip()[:200]
+                    if len(parts) > 1:
+                        new_title = parts[1].strip()[:200]
 
                     if new_title:
-                        result = tool_func(user_id, task["id"], new_title)
+                        result = await tool_func(user_id, task["id"], new_title)
 
                         if result["success"]:
                             return (
@@ -226,15 +243,13 @@ class SimpleAgent:
                     else:
                         return "I need a new title. What should the task be?", tool_name, None
                 else:
-                    return "No tasks to update!", tool_name, None
+                    return await self._ask_which_task(user_id, "all", "update"), None, None
 
             elif tool_name == "delete_task":
-                # Get tasks and delete first one
-                list_result = get_tool_function("list_tasks")(user_id, "all")
+                task = await self._resolve_task(user_id, message, "all")
 
-                if list_result["success"] and list_result["tasks"]:
-                    task = list_result["tasks"][0]
-                    result = tool_func(user_id, task["id"])
+                if task:
+                    result = await tool_func(user_id, task["id"])
 
                     if result["success"]:
                         return (
@@ -245,7 +260,7 @@ class SimpleAgent:
                     else:
                         return f"Error: {result['error']}", tool_name, None
                 else:
-                    return "No tasks to delete!", tool_name, None
+                    return await self._ask_which_task(user_id, "all", "delete"), None, None
 
         except Exception as e:
             return f"Error: {str(e)}", tool_name, None
@@ -257,7 +272,7 @@ class SimpleAgent:
 agent = SimpleAgent()
 
 
-def process_chat_message(
+async def process_chat_message(
     message: str, user_id: str
 ) -> Tuple[str, Optional[str], Optional[str]]:
     """Process a chat message using the agent.
@@ -269,4 +284,4 @@ def process_chat_message(
     Returns:
         Tuple of (response, tool_used, action_taken)
     """
-    return agent.process_message(message, user_id)
+    return await agent.process_message(message, user_id)
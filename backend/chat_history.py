@@ -0,0 +1,126 @@
+"""
+Chat history loader
+Builds the prompt history for a chat turn: the newest messages that fit a
+token budget, preceded by a rolling summary of everything older. The
+summary is extractive (no extra model call) and is updated incrementally
+as messages fall out of the window.
+"""
+
+import math
+import os
+from typing import Dict, List
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+try:
+    from models.conversation import Conversation
+    from models.message import Message
+except ImportError:
+    from .models.conversation import Conversation
+    from .models.message import Message
+
+# Per-message framing overhead in the chat completion format
+MESSAGE_OVERHEAD_TOKENS = 4
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)"""
+    return math.ceil(len(text or "") / 4) + MESSAGE_OVERHEAD_TOKENS
+
+
+def _summary_line(message: Message, max_chars: int) -> str:
+    content = " ".join((message.content or "").split())
+    if len(content) > max_chars:
+        content = content[:max_chars - 1] + "…"
+    if message.action_taken:
+        return f"- {message.role} ({message.action_taken}): {content}"
+    return f"- {message.role}: {content}"
+
+
+class HistoryBuilder:
+    """Token-budgeted history with a rolling per-conversation summary
+
+    Only messages newer than ``conversation.summarized_until`` are read,
+    newest first via ix_message_conversation_created. Messages that do not
+    fit ``token_budget`` (or ``max_messages``) are folded into
+    ``conversation.summary``, oldest first and at most ``fold_batch`` per
+    turn, so the summary always covers a contiguous prefix.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 2000,
+        max_messages: int = 20,
+        fold_batch: int = 50,
+        summary_max_chars: int = 2000,
+        line_max_chars: int = 200
+    ):
+        self.token_budget = token_budget
+        self.max_messages = max_messages
+        self.fold_batch = fold_batch
+        self.summary_max_chars = summary_max_chars
+        self.line_max_chars = line_max_chars
+
+    async def load(self, session: AsyncSession, conversation: Conversation) -> List[Dict[str, str]]:
+        """History for the next turn, oldest first
+
+        May update conversation.summary/summarized_until; the caller commits.
+        """
+        query = select(Message).where(Message.conversation_id == conversation.id)
+        if conversation.summarized_until is not None:
+            query = query.where(Message.created_at > conversation.summarized_until)
+        newest = list((await session.exec(
+            query.order_by(Message.created_at.desc()).limit(self.max_messages + 1)
+        )).all())
+
+        budget = self.token_budget
+        if conversation.summary:
+            budget -= estimate_tokens(SUMMARY_PREFIX + conversation.summary)
+
+        kept: List[Message] = []
+        for message in newest[:self.max_messages]:
+            cost = estimate_tokens(message.content)
+            if cost > budget:
+                break
+            budget -= cost
+            kept.append(message)
+
+        if len(kept) < len(newest):
+            # Older messages are outside the window: fold them into the summary
+            await self._fold(session, conversation, before=kept[-1].created_at if kept else None)
+
+        history = []
+        if conversation.summary:
+            history.append({"role": "system", "content": SUMMARY_PREFIX + conversation.summary})
+        history.extend({"role": m.role, "content": m.content} for m in reversed(kept))
+        return history
+
+    async def _fold(self, session: AsyncSession, conversation: Conversation, before=None):
+        query = select(Message).where(Message.conversation_id == conversation.id)
+        if conversation.summarized_until is not None:
+            query = query.where(Message.created_at > conversation.summarized_until)
+        if before is not None:
+            query = query.where(Message.created_at < before)
+        folded = list((await session.exec(
+            query.order_by(Message.created_at).limit(self.fold_batch)
+        )).all())
+        if not folded:
+            return
+
+        lines = (conversation.summary or "").splitlines()
+        lines.extend(_summary_line(message, self.line_max_chars) for message in folded)
+        # Keep the most recent part of the summary within its size limit
+        while len(lines) > 1 and sum(len(line) + 1 for line in lines) > self.summary_max_chars:
+            lines.pop(0)
+
+        conversation.summary = "\n".join(lines)
+        conversation.summarized_until = folded[-1].created_at
+        session.add(conversation)
+
+
+# Global builder instance
+history_builder = HistoryBuilder(
+    token_budget=int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "2000")),
+    max_messages=int(os.getenv("CHAT_HISTORY_MAX_MESSAGES", "20")),
+)
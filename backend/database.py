@@ -1,16 +1,196 @@
 from sqlmodel import create_engine, Session
-from typing import Generator
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator, Dict, Generator
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
+try:
+    from metrics import metrics_registry
+except ImportError:
+    from .metrics import metrics_registry
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./todo_app.db")
 
-# Create engine
-connect_args = {"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-engine = create_engine(DATABASE_URL, echo=True, connect_args=connect_args)
+
+def _to_async_url(url: str) -> str:
+    """Swap the sync driver in a database URL for its asyncio counterpart."""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql+psycopg2:"):
+        return url.replace("postgresql+psycopg2:", "postgresql+asyncpg:", 1)
+    if url.startswith("postgresql:"):
+        return url.replace("postgresql:", "postgresql+asyncpg:", 1)
+    if url.startswith("postgres:"):
+        return url.replace("postgres:", "postgresql+asyncpg:", 1)
+    return url
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _to_async_url(DATABASE_URL))
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+# Pool configuration (per process). Size it so that
+# replicas * (DB_POOL_SIZE + DB_MAX_OVERFLOW) stays below Postgres max_connections.
+DB_ECHO = _env_bool("DB_ECHO", False)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+
+
+def _engine_options(is_async: bool) -> dict:
+    """Build create_engine keyword arguments from the pool settings."""
+    options = {"echo": DB_ECHO, "pool_pre_ping": DB_POOL_PRE_PING}
+
+    if IS_SQLITE:
+        if not is_async:
+            options["connect_args"] = {"check_same_thread": False}
+        return options
+
+    options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    if DB_STATEMENT_TIMEOUT_MS > 0:
+        if is_async:
+            # asyncpg takes server settings directly
+            options["connect_args"] = {
+                "server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+            }
+        else:
+            options["connect_args"] = {
+                "options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+            }
+    return options
+
+
+# Create engines
+# The sync engine is kept for migrations and scripts; request handlers use
+# the async engine so DB I/O never blocks the event loop.
+engine = create_engine(DATABASE_URL, **_engine_options(is_async=False))
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_engine_options(is_async=True))
+
+async_session_maker = async_sessionmaker(
+    async_engine, class_=AsyncSession, expire_on_commit=False
+)
+
+
+class PoolMetrics:
+    """Connection pool counters for the async engine"""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.wait_count = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "checkin", self._on_checkin)
+        event.listen(pool, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, *args):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, *args):
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_checkin(self, *args):
+        with self._lock:
+            self.checkins += 1
+
+    def _on_invalidate(self, *args):
+        with self._lock:
+            self.invalidations += 1
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        """Record how long a request waited to obtain a connection"""
+        with self._lock:
+            self.wait_count += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        """Current pool gauges and counters"""
+        with self._lock:
+            samples = {
+                "db_pool_connects_total": self.connects,
+                "db_pool_checkouts_total": self.checkouts,
+                "db_pool_checkins_total": self.checkins,
+                "db_pool_invalidations_total": self.invalidations,
+                "db_pool_wait_count": self.wait_count,
+                "db_pool_wait_seconds_total": round(self.wait_seconds_total, 6),
+                "db_pool_wait_seconds_max": round(self.wait_seconds_max, 6),
+                "db_pool_timeouts_total": self.timeouts,
+            }
+        # Gauges are only available on queue-style pools
+        for name, attr in (
+            ("db_pool_size", "size"),
+            ("db_pool_checked_out", "checkedout"),
+            ("db_pool_overflow", "overflow"),
+            ("db_pool_checked_in", "checkedin"),
+        ):
+            getter = getattr(self.pool, attr, None)
+            if callable(getter):
+                samples[name] = getter()
+        return samples
+
+
+pool_metrics = PoolMetrics(async_engine.sync_engine.pool)
+metrics_registry.register("db_pool", pool_metrics.snapshot)
+
 
 def get_session() -> Generator[Session, None, None]:
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+@asynccontextmanager
+async def open_async_session() -> AsyncIterator[AsyncSession]:
+    """Async session for request handlers that manage their own transactions
+
+    The connection is acquired up front so the pool wait is recorded, the
+    same as for sessions injected with get_async_session.
+    """
+    async with async_session_maker() as session:
+        started = time.perf_counter()
+        try:
+            await session.connection()
+        except PoolTimeoutError:
+            pool_metrics.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        pool_metrics.record_wait(time.perf_counter() - started)
+        yield session
+
+
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    async with open_async_session() as session:
+        yield session
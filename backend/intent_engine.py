@@ -0,0 +1,301 @@
+"""
+Intent Engine
+Keyword intent classification for the rule-based chat agents. Every
+keyword of every rule is compiled once into a single trie-shaped regex, so
+a message is scanned in one pass whatever the number of rules; slots are
+pulled out with precompiled patterns.
+
+Benchmark against the previous any()/re.search chains:
+    python intent_engine.py
+"""
+
+import re
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Pattern, Sequence, Tuple
+
+
+def _trie_pattern(phrases: Iterable[str]) -> str:
+    """Regex matching any of phrases, preferring the longest at a position
+
+    Phrases sharing a prefix share a branch, and optional tails are greedy,
+    so at each position the engine walks one path instead of trying every
+    alternative in turn.
+    """
+    trie: Dict[str, dict] = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+def _or_all(values: Iterable[int]) -> int:
+    result = 0
+    for value in values:
+        result |= value
+    return result
+
+
+class IntentRule:
+    """An intent that fires when every keyword group has a hit
+
+    Args:
+        intent: Intent name returned on a match
+        keyword_groups: Sequences of lowercase phrases, matched as substrings
+        guard: Extra predicate on the normalised (lowercased, stripped) text
+        slots: Slot name -> regex with one group, applied to the stripped
+               message case-insensitively; the group is the slot value
+    """
+
+    def __init__(
+        self,
+        intent: str,
+        *keyword_groups: Sequence[str],
+        guard: Optional[Callable[[str], bool]] = None,
+        slots: Optional[Dict[str, str]] = None
+    ):
+        self.intent = intent
+        self.keyword_groups = [frozenset(phrase.lower() for phrase in group) for group in keyword_groups]
+        self.keywords = frozenset().union(*self.keyword_groups)
+        self.guard = guard
+        self.slots: Dict[str, Pattern] = {
+            name: re.compile(pattern, re.IGNORECASE | re.DOTALL)
+            for name, pattern in (slots or {}).items()
+        }
+
+    def score(self, hits: FrozenSet[str]) -> int:
+        """Matched keywords, or 0 unless every group has one"""
+        matched = [len(group & hits) for group in self.keyword_groups]
+        return sum(matched) if all(matched) else 0
+
+
+class IntentMatch:
+    """Outcome of classifying a message
+
+    ``hits``, ``score`` (keywords matched across the rule's groups) and
+    ``keywords`` are computed on access; routing only needs the intent and
+    slots.
+    """
+
+    __slots__ = ("intent", "rule", "slots", "_found", "_implied", "_hits")
+
+    def __init__(
+        self,
+        intent: str,
+        rule: Optional[IntentRule] = None,
+        found: Sequence[str] = (),
+        slots: Optional[Dict[str, str]] = None,
+        implied: Optional[Dict[str, FrozenSet[str]]] = None
+    ):
+        self.intent = intent
+        self.rule = rule
+        self.slots = slots or {}
+        self._found = found
+        self._implied = implied or {}
+        self._hits: Optional[FrozenSet[str]] = None
+
+    @property
+    def hits(self) -> FrozenSet[str]:
+        """Every keyword found in the message"""
+        if self._hits is None:
+            self._hits = frozenset().union(*map(self._implied.__getitem__, self._found))
+        return self._hits
+
+    @property
+    def score(self) -> int:
+        return self.rule.score(self.hits) if self.rule else 0
+
+    @property
+    def keywords(self) -> FrozenSet[str]:
+        """Keywords of the matched rule found in the message"""
+        return self.rule.keywords & self.hits if self.rule else frozenset()
+
+    def __repr__(self):
+        return f"<IntentMatch(intent={self.intent}, score={self.score}, slots={self.slots})>"
+
+
+UNKNOWN = "unknown"
+
+
+class IntentEngine:
+    """Ordered keyword rules compiled into one scanner
+
+    Rules are listed in priority order: ``classify`` returns the first rule
+    that matches (so precedence between overlapping keywords stays
+    explicit), ``candidates`` every matching rule with its score.
+    """
+
+    def __init__(self, rules: Sequence[IntentRule]):
+        self.rules = list(rules)
+        phrases = {phrase for rule in self.rules for group in rule.keyword_groups for phrase in group}
+        # Zero-width so overlapping keywords are all reported; the leading
+        # class lets the scanner skip positions no keyword can start at
+        first_chars = "".join(sorted({re.escape(phrase[0]) for phrase in phrases}))
+        self._scanner = re.compile(f"(?=[{first_chars}])(?=({_trie_pattern(phrases)}))")
+
+        # One bit per (rule, keyword group); a rule matches when the scan
+        # mask has every bit of the rule set
+        self._ordered: List[Tuple[IntentRule, int]] = []
+        phrase_bits = dict.fromkeys(phrases, 0)
+        bit = 1
+        for rule in self.rules:
+            required = 0
+            for group in rule.keyword_groups:
+                for phrase in group:
+                    phrase_bits[phrase] |= bit
+                required |= bit
+                bit <<= 1
+            self._ordered.append((rule, required))
+        # The scanner reports the longest phrase at each position; the
+        # shorter phrases that are its prefixes match there too
+        self._implied = {
+            phrase: frozenset(other for other in phrases if phrase.startswith(other))
+            for phrase in phrases
+        }
+        self._phrase_masks = {
+            phrase: _or_all(phrase_bits[other] for other in self._implied[phrase])
+            for phrase in phrases
+        }
+
+    @staticmethod
+    def normalize(message: str) -> str:
+        return message.lower().strip()
+
+    def scan(self, text: str) -> FrozenSet[str]:
+        """Every keyword occurring in text (already normalised)"""
+        return IntentMatch(UNKNOWN, found=self._scanner.findall(text), implied=self._implied).hits
+
+    def _mask(self, found: List[str]) -> int:
+        mask = 0
+        for phrase in found:
+            mask |= self._phrase_masks[phrase]
+        return mask
+
+    def classify(self, message: str) -> IntentMatch:
+        """Highest-priority matching intent, with its slots extracted"""
+        text = self.normalize(message)
+        found = self._scanner.findall(text)
+        if found:
+            mask = self._mask(found)
+            for rule, required in self._ordered:
+                if mask & required == required and (rule.guard is None or rule.guard(text)):
+                    slots = self.extract_slots(rule, message) if rule.slots else None
+                    return IntentMatch(rule.intent, rule, found, slots, self._implied)
+        return IntentMatch(UNKNOWN)
+
+    def candidates(self, message: str) -> List[IntentMatch]:
+        """Every matching rule, in priority order"""
+        text = self.normalize(message)
+        found = self._scanner.findall(text)
+        mask = self._mask(found)
+        return [
+            IntentMatch(rule.intent, rule, found, implied=self._implied)
+            for rule, required in self._ordered
+            if mask & required == required and (rule.guard is None or rule.guard(text))
+        ]
+
+    @staticmethod
+    def extract_slots(rule: IntentRule, message: str) -> Dict[str, str]:
+        slots = {}
+        stripped = message.strip()
+        for name, pattern in rule.slots.items():
+            match = pattern.search(stripped)
+            if match:
+                slots[name] = match.group(1)
+        return slots
+
+
+# Benchmark
+
+def _legacy_fallback_intent(user_message: str) -> str:
+    """FALLBACK_INTENTS as the any() chain _process_with_fallback used to evaluate"""
+    message_lower = user_message.lower().strip()
+    if any(word in message_lower for word in ["how many", "statistics", "stats", "analytics", "progress", "summary"]):
+        return "stats"
+    elif any(word in message_lower for word in ["list", "show", "what", "need", "have to do", "tasks", "my tasks", "all tasks"]):
+        return "list"
+    elif any(word in message_lower for word in ["add ", "create ", "remember ", "remember to", "buy ", "need to ", "have to "]):
+        return "add"
+    elif any(word in message_lower for word in ["done", "completed", "complete", "finish", "mark", "finished", "finished it", "did it"]):
+        return "complete"
+    elif any(word in message_lower for word in ["do", "can", "will", "should"]) and \
+            len(message_lower) > 10 and not message_lower.startswith("how"):
+        return "add"
+    elif "hello" in message_lower or "hi" in message_lower or "hey" in message_lower:
+        return "greeting"
+    elif "help" in message_lower:
+        return "help"
+    return UNKNOWN
+
+
+def _legacy_simple_intent(message: str) -> str:
+    """The pattern loop SimpleAgent.detect_intent used to evaluate"""
+    intent_patterns = {
+        "add": [r"(?:remember|remind|add|create|new|save|note|make)", r"(?:task|todo|remember)"],
+        "list": [r"(?:show|list|what|get|give me|my)", r"(?:tasks|todos|do|need)"],
+        "complete": [r"(?:done|complete|finish|mark|check|tick)", r"(?:task|todo)"],
+        "update": [r"(?:change|update|edit|modify|rename)", r"(?:to|as|into)"],
+        "delete": [r"(?:delete|remove|cancel|forget)", r"(?:task|todo)"],
+    }
+    message_lower = message.lower()
+    for intent, patterns in intent_patterns.items():
+        if all(re.search(p, message_lower) for p in patterns):
+            return intent
+    return UNKNOWN
+
+
+def _benchmark(rounds: int = 2000):
+    import random
+    import string
+    import time
+
+    try:
+        from openai_agent import FALLBACK_INTENTS
+        from ai_agent import SIMPLE_INTENTS
+    except ImportError:
+        from .openai_agent import FALLBACK_INTENTS
+        from .ai_agent import SIMPLE_INTENTS
+
+    corpus = [
+        "show my tasks", "What do I need to do?", "add buy groceries", "Remember to call mom",
+        "I need to fix the bug", "mark it done", "I finished it", "how many tasks do I have?",
+        "show my progress", "hello", "hey there", "help", "delete this task", "thanks!",
+        "Can you schedule a dentist appointment for Friday", "change groceries to vegetables",
+        "remove the todo about laundry", "create a task to water the plants", "done with groceries",
+        "list all tasks please", "what's my completion rate?", "ok", "buy milk",
+    ]
+    # Random strings exercise overlapping keywords for the agreement check
+    rng = random.Random(7)
+    fuzz = ["".join(rng.choices(string.ascii_lowercase + "  ", k=rng.randint(5, 80))) for _ in range(2000)]
+
+    for name, legacy, engine in (
+        ("fallback", _legacy_fallback_intent, FALLBACK_INTENTS),
+        ("simple", _legacy_simple_intent, SIMPLE_INTENTS),
+    ):
+        mismatches = [m for m in corpus + fuzz if legacy(m) != engine.classify(m).intent]
+        assert not mismatches, f"{name}: engine disagrees with legacy rules on {mismatches[:5]}"
+
+        timings = {}
+        for label, classify in (("legacy", legacy), ("engine", engine.classify)):
+            per_message = []
+            for message in corpus:
+                start = time.perf_counter()
+                for _ in range(rounds):
+                    classify(message)
+                per_message.append((time.perf_counter() - start) / rounds * 1e6)
+            timings[label] = (sum(per_message) / len(per_message), max(per_message))
+        print(f"{name:9s} legacy mean {timings['legacy'][0]:5.2f} worst {timings['legacy'][1]:5.2f} us/msg   "
+              f"engine mean {timings['engine'][0]:5.2f} worst {timings['engine'][1]:5.2f} us/msg   "
+              f"({len(corpus) + len(fuzz)} messages agree)")
+
+
+if __name__ == "__main__":
+    _benchmark()
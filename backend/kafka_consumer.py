@@ -0,0 +1,253 @@
+"""
+Kafka Consumer Runtime
+Polls records in batches on a dedicated thread, dispatches them to async
+handlers and commits offsets only once they have been processed
+"""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from kafka.errors import KafkaError
+from kafka.structs import OffsetAndMetadata, TopicPartition
+import logging
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[dict], Awaitable[None]]
+
+
+class KafkaConsumerRuntime:
+    """Batched consumer loop with manual offset commits
+
+    Partitions of a polled batch are processed concurrently. Inside a
+    partition, records sharing a key run one after another in offset order
+    while distinct keys run concurrently, at most ``partition_concurrency``
+    at a time. A partition is committed up to its first unprocessed record
+    and re-fetched from there, so delivery is at-least-once.
+
+    A record whose handler keeps failing after ``max_retries`` is sent to
+    ``<topic>.dlq`` through ``dead_letter`` (anything with publish_and_wait)
+    so one poison message cannot stall its partition.
+    """
+
+    def __init__(
+        self,
+        consumer,
+        handler: Handler,
+        name: str,
+        max_poll_records: int = 500,
+        poll_timeout_ms: int = 1000,
+        partition_concurrency: int = 8,
+        max_retries: int = 3,
+        retry_backoff_seconds: float = 0.5,
+        dead_letter=None
+    ):
+        self.consumer = consumer
+        self.handler = handler
+        self.name = name
+        self.max_poll_records = max_poll_records
+        self.poll_timeout_ms = poll_timeout_ms
+        self.partition_concurrency = partition_concurrency
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.dead_letter = dead_letter
+
+        # KafkaConsumer is not thread-safe: every call goes through this thread
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"kafka-consumer-{name}")
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+        self._positions: Dict[TopicPartition, int] = {}
+        self._lag: Dict[TopicPartition, int] = {}
+
+        self.processed = 0
+        self.failed = 0
+        self.retried = 0
+        self.dead_lettered = 0
+        self.batches = 0
+        self.commits = 0
+        self.commit_failures = 0
+        self.last_batch_seconds = 0.0
+        self.last_batch_records = 0
+
+    # Consumer thread
+
+    def _poll(self) -> Dict[TopicPartition, list]:
+        return self.consumer.poll(
+            timeout_ms=self.poll_timeout_ms,
+            max_records=self.max_poll_records
+        )
+
+    def _commit(
+        self,
+        offsets: Dict[TopicPartition, OffsetAndMetadata],
+        rewinds: Dict[TopicPartition, int]
+    ):
+        """Commit processed offsets, rewind partitions with unprocessed records"""
+        for tp, offset in rewinds.items():
+            self.consumer.seek(tp, offset)
+        if offsets:
+            try:
+                self.consumer.commit(offsets)
+                self.commits += 1
+            except KafkaError as e:
+                # Typically a rebalance; the new owner re-reads from the last commit
+                self.commit_failures += 1
+                logger.warning(f"⚠️ Offset commit failed for {self.name}: {e}")
+
+        # highwater() is cached from fetch responses, so this costs no round trip
+        lag = {}
+        for tp in self.consumer.assignment():
+            highwater = self.consumer.highwater(tp)
+            position = self._positions.get(tp)
+            if highwater is not None and position is not None:
+                lag[tp] = max(highwater - position, 0)
+        self._lag = lag
+
+    # Event loop
+
+    async def _handle(self, record) -> bool:
+        """Run the handler with retries; True once the record may be committed"""
+        error = None
+        try:
+            value = json.loads(record.value.decode("utf-8"))
+        except (ValueError, UnicodeDecodeError) as e:
+            value, error = None, e
+
+        if value is not None:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    await self.handler(value)
+                    self.processed += 1
+                    return True
+                except Exception as e:
+                    error = e
+                    if attempt < self.max_retries:
+                        self.retried += 1
+                        await asyncio.sleep(self.retry_backoff_seconds * 2 ** attempt)
+
+        self.failed += 1
+        logger.error(
+            f"❌ {self.name}: record {record.topic}[{record.partition}]@{record.offset} failed: {error}"
+        )
+        return await self._dead_letter(record, error)
+
+    async def _dead_letter(self, record, error: Exception) -> bool:
+        if self.dead_letter is None:
+            return False
+        key = record.key.decode("utf-8") if record.key else None
+        event = {
+            "topic": record.topic,
+            "partition": record.partition,
+            "offset": record.offset,
+            "key": key,
+            "value": record.value.decode("utf-8", errors="replace"),
+            "error": str(error),
+        }
+        try:
+            (ok,) = await self.dead_letter.publish_and_wait([(f"{record.topic}.dlq", event, key)])
+        except Exception as e:
+            logger.error(f"❌ {self.name}: dead-lettering failed: {e}")
+            ok = False
+        if ok:
+            self.dead_lettered += 1
+        return ok
+
+    async def _process_partition(self, records: list) -> Tuple[int, bool]:
+        """Process one partition's records; returns (next offset, completed)"""
+        chains: "OrderedDict[Optional[bytes], list]" = OrderedDict()
+        for record in records:
+            chains.setdefault(record.key, []).append(record)
+
+        semaphore = asyncio.Semaphore(self.partition_concurrency)
+        failed_offsets: List[int] = []
+
+        async def run_chain(chain: list):
+            async with semaphore:
+                for record in chain:
+                    if not await self._handle(record):
+                        # Later records of this key must not overtake it
+                        failed_offsets.append(record.offset)
+                        return
+
+        await asyncio.gather(*(run_chain(chain) for chain in chains.values()))
+        if failed_offsets:
+            return min(failed_offsets), False
+        return records[-1].offset + 1, True
+
+    async def run_batch(self) -> int:
+        """Poll, process and commit one batch; returns records polled"""
+        loop = asyncio.get_running_loop()
+        batch = await loop.run_in_executor(self._executor, self._poll)
+        if not batch:
+            return 0
+
+        started = time.perf_counter()
+        partitions = list(batch.items())
+        results = await asyncio.gather(
+            *(self._process_partition(records) for _, records in partitions)
+        )
+
+        offsets, rewinds = {}, {}
+        for (tp, records), (next_offset, completed) in zip(partitions, results):
+            if next_offset > records[0].offset:
+                offsets[tp] = OffsetAndMetadata(next_offset, "")
+            if not completed:
+                rewinds[tp] = next_offset
+            self._positions[tp] = next_offset
+        await loop.run_in_executor(self._executor, self._commit, offsets, rewinds)
+
+        count = sum(len(records) for _, records in partitions)
+        self.batches += 1
+        self.last_batch_records = count
+        self.last_batch_seconds = time.perf_counter() - started
+        return count
+
+    async def run(self):
+        """Consume until stop() is called, then close the consumer"""
+        loop = asyncio.get_running_loop()
+        self._running = True
+        logger.info(f"✅ Consumer {self.name} started")
+        try:
+            while self._running:
+                try:
+                    await self.run_batch()
+                except Exception as e:
+                    logger.error(f"❌ Consumer {self.name} batch failed: {e}")
+                    await asyncio.sleep(self.retry_backoff_seconds)
+        finally:
+            await loop.run_in_executor(self._executor, self.consumer.close)
+            logger.info(f"Consumer {self.name} stopped")
+
+    def start(self):
+        """Start consuming on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Finish the in-flight batch, commit it and close the consumer"""
+        self._running = False
+        if self._task:
+            await self._task
+            self._task = None
+
+    def metrics(self) -> Dict[str, float]:
+        label = f'consumer="{self.name}"'
+        rate = self.last_batch_records / self.last_batch_seconds if self.last_batch_seconds else 0.0
+        samples = {
+            f"kafka_consumer_processed_total{{{label}}}": self.processed,
+            f"kafka_consumer_failed_total{{{label}}}": self.failed,
+            f"kafka_consumer_retried_total{{{label}}}": self.retried,
+            f"kafka_consumer_dead_lettered_total{{{label}}}": self.dead_lettered,
+            f"kafka_consumer_batches_total{{{label}}}": self.batches,
+            f"kafka_consumer_commits_total{{{label}}}": self.commits,
+            f"kafka_consumer_commit_failures_total{{{label}}}": self.commit_failures,
+            f"kafka_consumer_last_batch_seconds{{{label}}}": round(self.last_batch_seconds, 6),
+            f"kafka_consumer_last_batch_records_per_second{{{label}}}": round(rate, 2),
+            f"kafka_consumer_lag_max{{{label}}}": max(self._lag.values(), default=0),
+        }
+        for tp, lag in self._lag.items():
+            samples[f'kafka_consumer_lag{{{label},topic="{tp.topic}",partition="{tp.partition}"}}'] = lag
+        return samples
@@ -5,14 +5,27 @@ Handles event publishing and consumption for task operations
 
 import json
 import asyncio
-from typing import Callable, Optional
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 from kafka import KafkaProducer, KafkaConsumer
 from kafka.errors import KafkaError
 import logging
 
+try:
+    from kafka_consumer import KafkaConsumerRuntime
+    from metrics import metrics_registry
+except ImportError:
+    from .kafka_consumer import KafkaConsumerRuntime
+    from .metrics import metrics_registry
+
 logger = logging.getLogger(__name__)
 
+# (topic, value, key)
+PendingEvent = Tuple[str, dict, Optional[str]]
+
 
 class KafkaService:
     """Service for publishing and consuming Kafka events"""
@@ -20,13 +33,38 @@ class KafkaService:
     def __init__(
         self,
         bootstrap_servers: str = "localhost:9092",
-        group_id: str = "todo-service"
+        group_id: str = "todo-service",
+        linger_ms: int = 10,
+        batch_size: int = 64 * 1024,
+        compression_type: Optional[str] = "gzip",
+        buffer_size: int = 10000,
+        drain_batch_size: int = 500
     ):
         self.bootstrap_servers = bootstrap_servers.split(",")
         self.group_id = group_id
         self.producer = None
         self.consumers = {}
 
+        # Producer batching
+        self.linger_ms = linger_ms
+        self.batch_size = batch_size
+        self.compression_type = compression_type
+
+        # Bounded in-memory buffer between the event loop and the producer
+        self.buffer_size = buffer_size
+        self.drain_batch_size = drain_batch_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._drain_task: Optional[asyncio.Task] = None
+        # One thread so producer.send calls keep their enqueue order
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kafka-producer")
+
+        self._stats_lock = threading.Lock()
+        self.enqueued = 0
+        self.sent = 0
+        self.delivered = 0
+        self.failed = 0
+        self.dropped = 0
+
     def connect_producer(self):
         """Initialize Kafka producer"""
         try:
@@ -34,7 +72,12 @@ class KafkaService:
                 bootstrap_servers=self.bootstrap_servers,
                 value_serializer=lambda v: json.dumps(v).encode('utf-8'),
                 acks='all',
-                retries=3
+                retries=3,
+                # Retries must not reorder records within a partition (key)
+                max_in_flight_requests_per_connection=1,
+                linger_ms=self.linger_ms,
+                batch_size=self.batch_size,
+                compression_type=self.compression_type
             )
             logger.info("✅ Kafka Producer connected")
         except Exception as e:
@@ -46,24 +89,44 @@ class KafkaService:
         if self.producer:
             self.producer.flush()
             self.producer.close()
+            self.producer = None
             logger.info("Kafka Producer disconnected")
 
+    def _on_delivery(self, record_metadata):
+        with self._stats_lock:
+            self.delivered += 1
+        logger.debug(
+            f"Event delivered to {record_metadata.topic} "
+            f"(partition: {record_metadata.partition}, offset: {record_metadata.offset})"
+        )
+
+    def _on_delivery_error(self, exc):
+        with self._stats_lock:
+            self.failed += 1
+        logger.error(f"❌ Kafka delivery failed: {exc}")
+
     def publish_event(
         self,
         topic: str,
         event_data: dict,
-        key: Optional[str] = None
-    ) -> bool:
+        key: Optional[str] = None,
+        wait: bool = False
+    ):
         """
-        Publish event to Kafka topic
-        
+        Publish event to Kafka topic (blocking caller)
+
+        The record is handed to the producer's batching buffer and delivery
+        is reported through callbacks. Call from worker threads or scripts;
+        async code should use publish_async.
+
         Args:
             topic: Kafka topic name
             event_data: Event data dictionary
             key: Optional partition key
-            
+            wait: Block until the broker acknowledges the record
+
         Returns:
-            bool: True if published successfully
+            The send future (acknowledged already when wait=True), or None on error
         """
         if not self.producer:
             self.connect_producer()
@@ -74,13 +137,132 @@ class KafkaService:
                 value=event_data,
                 key=key.encode('utf-8') if key else None
             )
-            # Wait for confirmation (timeout 10 seconds)
-            record_metadata = future.get(timeout=10)
-            logger.info(f"✅ Event published to {topic} (partition: {record_metadata.partition})")
-            return True
+            future.add_callback(self._on_delivery)
+            future.add_errback(self._on_delivery_error)
+            with self._stats_lock:
+                self.sent += 1
+            if wait:
+                future.get(timeout=10)
+            return future
         except KafkaError as e:
+            with self._stats_lock:
+                self.failed += 1
             logger.error(f"❌ Error publishing to Kafka: {e}")
+            return None
+
+    def _send_and_wait(self, events: List[PendingEvent], timeout: float) -> List[bool]:
+        """Runs on the producer thread: send a batch, then wait for every ack"""
+        futures = [self.publish_event(topic, value, key) for topic, value, key in events]
+        results = []
+        for future in futures:
+            if future is None:
+                results.append(False)
+                continue
+            try:
+                future.get(timeout=timeout)
+                results.append(True)
+            except KafkaError:
+                results.append(False)
+        return results
+
+    async def publish_and_wait(
+        self,
+        events: List[PendingEvent],
+        timeout: float = 10.0
+    ) -> List[bool]:
+        """Publish a batch and report per-event broker acknowledgement
+
+        The whole batch shares one linger window, so it costs roughly one
+        broker round trip. Used where at-least-once delivery matters.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._send_and_wait, events, timeout)
+
+    def _send_batch(self, events: List[PendingEvent]):
+        """Runs on the producer thread: hand a drained batch to the producer"""
+        for topic, value, key in events:
+            self.publish_event(topic, value, key)
+
+    async def _drain(self):
+        """Move buffered events to the producer in batches"""
+        loop = asyncio.get_running_loop()
+        while True:
+            events = [await self._queue.get()]
+            while len(events) < self.drain_batch_size and not self._queue.empty():
+                events.append(self._queue.get_nowait())
+            try:
+                await loop.run_in_executor(self._executor, self._send_batch, events)
+            except Exception as e:
+                with self._stats_lock:
+                    self.failed += len(events)
+                logger.error(f"❌ Error handing events to Kafka producer: {e}")
+            finally:
+                for _ in events:
+                    self._queue.task_done()
+
+    def start(self):
+        """Create the buffer and start draining it on the running event loop"""
+        if self._drain_task is None or self._drain_task.done():
+            self._queue = asyncio.Queue(maxsize=self.buffer_size)
+            self._drain_task = asyncio.create_task(self._drain())
+
+    async def stop(self, timeout: float = 10.0):
+        """Drain buffered events, flush the producer and stop"""
+        if self._drain_task is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Kafka buffer not drained, {self._queue.qsize()} events lost")
+        self._drain_task.cancel()
+        self._drain_task = None
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self.disconnect_producer)
+
+    async def publish_async(
+        self,
+        topic: str,
+        event_data: dict,
+        key: Optional[str] = None
+    ):
+        """Buffer an event for background delivery
+
+        Waits only when the buffer is full (backpressure); otherwise
+        returns immediately without touching the network.
+        """
+        self.start()
+        await self._queue.put((topic, event_data, key))
+        with self._stats_lock:
+            self.enqueued += 1
+
+    def publish_nowait(
+        self,
+        topic: str,
+        event_data: dict,
+        key: Optional[str] = None
+    ) -> bool:
+        """Buffer an event without waiting; False (event dropped) when full"""
+        self.start()
+        try:
+            self._queue.put_nowait((topic, event_data, key))
+        except asyncio.QueueFull:
+            with self._stats_lock:
+                self.dropped += 1
             return False
+        with self._stats_lock:
+            self.enqueued += 1
+        return True
+
+    def metrics(self) -> Dict[str, float]:
+        with self._stats_lock:
+            return {
+                "kafka_producer_enqueued_total": self.enqueued,
+                "kafka_producer_sent_total": self.sent,
+                "kafka_producer_delivered_total": self.delivered,
+                "kafka_producer_failed_total": self.failed,
+                "kafka_producer_dropped_total": self.dropped,
+                "kafka_producer_buffer_depth": self._queue.qsize() if self._queue else 0,
+            }
 
     async def publish_task_event(
         self,
@@ -97,75 +279,101 @@ class KafkaService:
             "task_data": task_data,
             "timestamp": datetime.utcnow().isoformat()
         }
-        return self.publish_event("task-events", event, key=str(task_id))
+        await self.publish_async("task-events", event, key=str(task_id))
 
     async def publish_reminder_event(
         self,
         task_id: int,
         task_title: str,
         user_id: str,
-        remind_at: datetime
+        remind_at: datetime,
+        due_at: Optional[datetime] = None
     ):
         """Publish reminder event to Kafka"""
         event = {
             "task_id": task_id,
             "task_title": task_title,
             "user_id": user_id,
+            "due_at": due_at.isoformat() if due_at else None,
             "remind_at": remind_at.isoformat(),
             "timestamp": datetime.utcnow().isoformat()
         }
-        return self.publish_event("reminders", event, key=str(task_id))
+        await self.publish_async("reminders", event, key=str(task_id))
 
     def subscribe_to_topic(
         self,
         topic: str,
-        callback: Callable,
-        group_id: Optional[str] = None
+        group_id: Optional[str] = None,
+        max_poll_records: int = 500,
+        auto_offset_reset: str = 'earliest'
     ):
-        """Subscribe to Kafka topic"""
+        """Create a consumer for topic with manual offset commits"""
         consumer_group = group_id or self.group_id
-        
+
         try:
             consumer = KafkaConsumer(
                 topic,
                 bootstrap_servers=self.bootstrap_servers,
                 group_id=consumer_group,
-                value_deserializer=lambda m: json.loads(m.decode('utf-8')),
-                auto_offset_reset='earliest',
-                enable_auto_commit=True
+                auto_offset_reset=auto_offset_reset,
+                enable_auto_commit=False,
+                max_poll_records=max_poll_records
             )
-            self.consumers[topic] = consumer
             logger.info(f"✅ Subscribed to topic: {topic}")
             return consumer
         except Exception as e:
             logger.error(f"❌ Error subscribing to topic {topic}: {e}")
             raise
 
-    def consume_messages(self, topic: str, callback: Callable):
-        """Consume messages from topic"""
-        consumer = self.consumers.get(topic)
-        if not consumer:
-            consumer = self.subscribe_to_topic(topic, callback)
+    def consume_messages(
+        self,
+        topic: str,
+        handler: Callable[[dict], Awaitable[None]],
+        group_id: Optional[str] = None,
+        max_poll_records: int = 500,
+        partition_concurrency: int = 8,
+        auto_offset_reset: str = 'earliest'
+    ) -> KafkaConsumerRuntime:
+        """Start consuming topic on the running event loop
 
-        try:
-            for message in consumer:
-                try:
-                    callback(message.value)
-                except Exception as e:
-                    logger.error(f"❌ Error processing message: {e}")
-        except Exception as e:
-            logger.error(f"❌ Error consuming messages: {e}")
+        Records are polled in batches and passed to the async handler;
+        offsets are committed only after the handler succeeded (or the
+        record was dead-lettered). See KafkaConsumerRuntime.
+        """
+        runtime = self.consumers.get(topic)
+        if runtime is None:
+            consumer = self.subscribe_to_topic(topic, group_id, max_poll_records, auto_offset_reset)
+            runtime = KafkaConsumerRuntime(
+                consumer,
+                handler,
+                name=topic,
+                max_poll_records=max_poll_records,
+                partition_concurrency=partition_concurrency,
+                dead_letter=self
+            )
+            self.consumers[topic] = runtime
+            metrics_registry.register(f"kafka_consumer_{topic}", runtime.metrics)
+        runtime.start()
+        return runtime
 
-    def disconnect_consumer(self, topic: str):
-        """Close Kafka consumer for topic"""
-        if topic in self.consumers:
-            self.consumers[topic].close()
-            del self.consumers[topic]
+    async def disconnect_consumer(self, topic: str):
+        """Stop the consumer for topic after committing its in-flight batch"""
+        runtime = self.consumers.pop(topic, None)
+        if runtime:
+            await runtime.stop()
+            metrics_registry.unregister(f"kafka_consumer_{topic}")
             logger.info(f"Disconnected from topic: {topic}")
 
 
 # Global Kafka service instance
-kafka_service = KafkaService()
+kafka_service = KafkaService(
+    bootstrap_servers=os.getenv("KAFKA_BOOTSTRAP_SERVERS", "localhost:9092"),
+    linger_ms=int(os.getenv("KAFKA_LINGER_MS", "10")),
+    batch_size=int(os.getenv("KAFKA_BATCH_SIZE", str(64 * 1024))),
+    compression_type=os.getenv("KAFKA_COMPRESSION", "gzip") or None,
+    buffer_size=int(os.getenv("KAFKA_BUFFER_SIZE", "10000")),
+)
+metrics_registry.register("kafka_producer", kafka_service.metrics)
 
 
 # Event handlers
@@ -179,3 +387,19 @@ async def handle_reminder_event(event: dict):
     """Handle reminder event from Kafka"""
     logger.info(f"Processing reminder event for task {event.get('task_id')}")
     # Reminder processing logic will be implemented
+
+
+async def run_consumers():
+    """Run the task-event and reminder consumers until cancelled"""
+    kafka_service.consume_messages("task-events", handle_task_event)
+    kafka_service.consume_messages("reminders", handle_reminder_event)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for topic in list(kafka_service.consumers):
+            await kafka_service.disconnect_consumer(topic)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_consumers())
@@ -1,5 +1,6 @@
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
 from sqlmodel import SQLModel
 import os
@@ -7,22 +8,75 @@ from dotenv import load_dotenv
 
 try:
     # Try relative imports (when running as module)
-    from .database import engine
-    from .routes import tasks, chat
+    from .database import async_engine
+    from .routes import tasks, chat, notifications
     from .auth import jwt_middleware
+    from .metrics import metrics_registry
+    from .recurring_scheduler import recurring_scheduler
+    from .outbox import outbox_relay, add_task_listener, remove_task_listener
+    from .reminder_scheduler import reminder_scheduler
+    from .notification_inbox import notification_inbox
+    from .openai_agent import agent
+    from .title_index import title_index
+    from .task_sync import tombstone_purger
 except ImportError:
     # Fall back to absolute imports (when running directly)
-    from database import engine
-    from routes import tasks, chat
+    from database import async_engine
+    from routes import tasks, chat, notifications
     from auth import jwt_middleware
+    from metrics import metrics_registry
+    from recurring_scheduler import recurring_scheduler
+    from outbox import outbox_relay, add_task_listener, remove_task_listener
+    from reminder_scheduler import reminder_scheduler
+    from notification_inbox import notification_inbox
+    from openai_agent import agent
+    from title_index import title_index
+    from task_sync import tombstone_purger
 
 load_dotenv()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Create tables on startup
-    SQLModel.metadata.create_all(bind=engine)
+    async with async_engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    await notification_inbox.broker.start()
+    # Title indexes follow the user's tasks
+    add_task_listener(title_index.on_task_event)
+
+    # Background workers (disable per replica if they run as separate deployments)
+    scheduler_enabled = os.getenv("RECURRING_SCHEDULER_ENABLED", "true").lower() == "true"
+    if scheduler_enabled:
+        recurring_scheduler.start()
+    # Idempotent, so safe on every replica
+    purger_enabled = os.getenv("TOMBSTONE_PURGER_ENABLED", "true").lower() == "true"
+    if purger_enabled:
+        tombstone_purger.start()
+    # Outbox rows are written when a broker is configured (OUTBOX_ENABLED);
+    # events keep their per-task order only with a single relay: enable on one replica
+    relay_enabled = os.getenv("OUTBOX_RELAY_ENABLED", "false").lower() == "true"
+    if relay_enabled:
+        outbox_relay.start()
+    # Reminders must fire once: enable on a single replica only
+    reminders_enabled = os.getenv("REMINDER_SCHEDULER_ENABLED", "false").lower() == "true"
+    if reminders_enabled:
+        add_task_listener(reminder_scheduler.on_task_event)
+        reminder_scheduler.start()
     yield
+    if reminders_enabled:
+        remove_task_listener(reminder_scheduler.on_task_event)
+        await reminder_scheduler.stop()
+    if relay_enabled:
+        await outbox_relay.stop()
+    if purger_enabled:
+        await tombstone_purger.stop()
+    if scheduler_enabled:
+        await recurring_scheduler.stop()
+    remove_task_listener(title_index.on_task_event)
+    await notification_inbox.broker.stop()
+    await agent.aclose()
+    await async_engine.dispose()
 
 app = FastAPI(
     title="Todo API",
@@ -46,6 +100,7 @@ app.middleware("http")(jwt_middleware)
 
 # Include routers
 app.include_router(tasks.router, prefix="/api")
+app.include_router(notifications.router, prefix="/api")
 app.include_router(chat.router)
 
 @app.get("/")
@@ -54,4 +109,8 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return metrics_registry.render()
@@ -5,15 +5,52 @@ with full user isolation and proper error handling.
 """
 
 from datetime import datetime
-from typing import Any, Dict, List, Optional
-from sqlmodel import Session, select
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import ValidationError
 
 try:
-    from database import engine
-    from models.task import Task
+    from database import open_async_session
+    from models.task import (
+        Task, TaskCreate, TaskUpdate, TaskBatchOperation, MAX_BATCH_OPERATIONS
+    )
+    from task_queries import fetch_task_page, count_tasks, DEFAULT_PAGE_SIZE
+    from task_search import search_tasks, DEFAULT_SEARCH_PAGE_SIZE
+    from task_batch import apply_task_batch
+    from task_mutations import update_task_fields, set_task_completed, delete_task_returning
+    from outbox import record_task_event
+    from task_revisions import bump_task_revision
 except ImportError:
-    from .database import engine
-    from .models.task import Task
+    from .database import open_async_session
+    from .models.task import (
+        Task, TaskCreate, TaskUpdate, TaskBatchOperation, MAX_BATCH_OPERATIONS
+    )
+    from .task_queries import fetch_task_page, count_tasks, DEFAULT_PAGE_SIZE
+    from .task_search import search_tasks, DEFAULT_SEARCH_PAGE_SIZE
+    from .task_batch import apply_task_batch
+    from .task_mutations import update_task_fields, set_task_completed, delete_task_returning
+    from .outbox import record_task_event
+    from .task_revisions import bump_task_revision
+
+
+def _batch_operation(item: Dict[str, Any]) -> TaskBatchOperation:
+    """Validate one batch_tasks item; raises ValidationError"""
+    op = item.get("op")
+    return TaskBatchOperation.model_validate({
+        "op": op,
+        "task_id": item.get("task_id"),
+        "task": {key: item[key] for key in TaskCreate.model_fields if key in item}
+        if op == "create" else None,
+        "changes": {key: item[key] for key in TaskUpdate.model_fields if key in item and key != "completed"}
+        if op == "update" else None,
+        "completed": item.get("completed", True),
+    })
+
+
+def _validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}"
+        for detail in error.errors()
+    )
 
 
 class TaskTools:
@@ -21,9 +58,10 @@ class TaskTools:
 
     def __init__(self):
         """Initialize task tools."""
-        self.engine = engine
+        # Tools run inside chat requests, so their pool waits are recorded too
+        self.session_maker = open_async_session
 
-    def add_task(
+    async def add_task(
         self, user_id: str, title: str, description: Optional[str] = None
     ) -> Dict[str, Any]:
         """Create a new task.
@@ -49,17 +87,21 @@ class TaskTools:
                     "error": "Description must be under 1000 characters",
                 }
 
-            with Session(self.engine) as session:
+            async with self.session_maker() as session:
+                revision = await bump_task_revision(session, user_id)
                 task = Task(
                     user_id=user_id,
                     title=title.strip(),
                     description=description.strip() if description else None,
                     completed=False,
                     created_at=datetime.utcnow(),
+                    updated_rev=revision,
                 )
                 session.add(task)
-                session.commit()
-                session.refresh(task)
+                await session.flush()
+                record_task_event(session, "created", task)
+                await session.commit()
+                await session.refresh(task)
 
                 return {
                     "success": True,
@@ -76,28 +118,59 @@ class TaskTools:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def list_tasks(
-        self, user_id: str, status_filter: str = "all"
+    async def list_tasks(
+        self,
+        user_id: str,
+        status_filter: str = "all",
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        priority: Optional[List[str]] = None,
+        tags: Optional[List[str]] = None,
+        due_after: Optional[str] = None,
+        due_before: Optional[str] = None,
+        is_recurring: Optional[bool] = None,
+        sort: str = "created_at",
+        order: str = "desc",
     ) -> Dict[str, Any]:
-        """List user's tasks with optional filtering.
+        """List one page of the user's tasks with optional filtering.
 
         Args:
             user_id: User ID (from JWT)
             status_filter: "all", "pending", or "completed"
+            limit: Page size
+            cursor: next_cursor from a previous call (optional)
+            priority: Only these priorities (optional)
+            tags: Only tasks carrying all of these tags (optional)
+            due_after: ISO datetime lower bound on due date (optional)
+            due_before: ISO datetime upper bound on due date (optional)
+            is_recurring: Only recurring / non-recurring tasks (optional)
+            sort: "created_at", "due_date" or "title"
+            order: "asc" or "desc"
 
         Returns:
-            List of tasks or error dict
+            Page of tasks with next_cursor and summary, or error dict
         """
         try:
-            with Session(self.engine) as session:
-                query = select(Task).where(Task.user_id == user_id)
-
-                if status_filter == "pending":
-                    query = query.where(Task.completed == False)
-                elif status_filter == "completed":
-                    query = query.where(Task.completed == True)
+            filters = {
+                "status_filter": status_filter,
+                "priorities": priority,
+                "tags": tags,
+                "due_after": datetime.fromisoformat(due_after) if due_after else None,
+                "due_before": datetime.fromisoformat(due_before) if due_before else None,
+                "is_recurring": is_recurring,
+            }
 
-                tasks = session.exec(query.order_by(Task.created_at.desc())).all()
+            async with self.session_maker() as session:
+                tasks, next_cursor = await fetch_task_page(
+                    session,
+                    user_id,
+                    cursor=cursor,
+                    limit=limit,
+                    sort=sort,
+                    order=order,
+                    **filters,
+                )
+                summary = await count_tasks(session, user_id, **filters)
 
                 return {
                     "success": True,
@@ -115,17 +188,65 @@ class TaskTools:
                         }
                         for task in tasks
                     ],
-                    "summary": {
-                        "total": len(tasks),
-                        "pending": sum(1 for t in tasks if not t.completed),
-                        "completed": sum(1 for t in tasks if t.completed),
-                    },
+                    "next_cursor": next_cursor,
+                    "summary": summary,
                 }
 
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def complete_task(
+    async def search_tasks(
+        self,
+        user_id: str,
+        query: str,
+        status_filter: str = "all",
+        limit: int = DEFAULT_SEARCH_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Find the user's tasks by words in their title, description or tags.
+
+        Args:
+            user_id: User ID (from JWT)
+            query: Words to look for; each may be the start of a word
+            status_filter: "all", "pending", or "completed"
+            limit: Page size
+            cursor: next_cursor from a previous call (optional)
+
+        Returns:
+            Matching tasks, best match first, with next_cursor, or error dict
+        """
+        try:
+            async with self.session_maker() as session:
+                hits, next_cursor = await search_tasks(
+                    session,
+                    user_id,
+                    query,
+                    cursor=cursor,
+                    limit=limit,
+                    status_filter=status_filter,
+                )
+
+                return {
+                    "success": True,
+                    "tasks": [
+                        {
+                            "id": task.id,
+                            "title": task.title,
+                            "description": task.description,
+                            "completed": task.completed,
+                            "rank": round(rank, 4),
+                            "title_highlight": title_highlight,
+                            "description_highlight": description_highlight,
+                        }
+                        for task, rank, title_highlight, description_highlight in hits
+                    ],
+                    "next_cursor": next_cursor,
+                }
+
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    async def complete_task(
         self, user_id: str, task_id: int, completed: bool = True
     ) -> Dict[str, Any]:
         """Toggle task completion status.
@@ -139,26 +260,11 @@ class TaskTools:
             Updated task or error dict
         """
         try:
-            with Session(self.engine) as session:
-                task = session.exec(
-                    select(Task).where(
-                        (Task.id == task_id) & (Task.user_id == user_id)
-                    )
-                ).first()
-
+            async with self.session_maker() as session:
+                task = await set_task_completed(session, user_id, task_id, completed)
                 if not task:
                     return {"success": False, "error": "Task not found"}
-
-                task.completed = completed
-                if completed:
-                    task.completed_at = datetime.utcnow()
-                else:
-                    task.completed_at = None
-
-                task.updated_at = datetime.utcnow()
-                session.add(task)
-                session.commit()
-                session.refresh(task)
+                await session.commit()
 
                 return {
                     "success": True,
@@ -176,7 +282,7 @@ class TaskTools:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def update_task(
+    async def update_task(
         self,
         user_id: str,
         task_id: int,
@@ -201,36 +307,28 @@ class TaskTools:
                     "error": "Must provide title or description",
                 }
 
-            with Session(self.engine) as session:
-                task = session.exec(
-                    select(Task).where(
-                        (Task.id == task_id) & (Task.user_id == user_id)
-                    )
-                ).first()
-
+            changes = {}
+            if title:
+                if len(title) > 200:
+                    return {
+                        "success": False,
+                        "error": "Title must be under 200 characters",
+                    }
+                changes["title"] = title.strip()
+
+            if description is not None:
+                if len(description) > 1000:
+                    return {
+                        "success": False,
+                        "error": "Description must be under 1000 characters",
+                    }
+                changes["description"] = description.strip() if description else None
+
+            async with self.session_maker() as session:
+                task = await update_task_fields(session, user_id, task_id, changes)
                 if not task:
                     return {"success": False, "error": "Task not found"}
-
-                if title:
-                    if len(title) > 200:
-                        return {
-                            "success": False,
-                            "error": "Title must be under 200 characters",
-                        }
-                    task.title = title.strip()
-
-                if description is not None:
-                    if len(description) > 1000:
-                        return {
-                            "success": False,
-                            "error": "Description must be under 1000 characters",
-                        }
-                    task.description = description.strip() if description else None
-
-                task.updated_at = datetime.utcnow()
-                session.add(task)
-                session.commit()
-                session.refresh(task)
+                await session.commit()
 
                 return {
                     "success": True,
@@ -246,7 +344,7 @@ class TaskTools:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def delete_task(self, user_id: str, task_id: int) -> Dict[str, Any]:
+    async def delete_task(self, user_id: str, task_id: int) -> Dict[str, Any]:
         """Delete a task.
 
         Args:
@@ -257,28 +355,85 @@ class TaskTools:
             Success message or error dict
         """
         try:
-            with Session(self.engine) as session:
-                task = session.exec(
-                    select(Task).where(
-                        (Task.id == task_id) & (Task.user_id == user_id)
-                    )
-                ).first()
-
+            async with self.session_maker() as session:
+                task = await delete_task_returning(session, user_id, task_id)
                 if not task:
                     return {"success": False, "error": "Task not found"}
-
-                task_title = task.title
-                session.delete(task)
-                session.commit()
+                await session.commit()
 
                 return {
                     "success": True,
-                    "message": f"Task '{task_title}' has been deleted",
+                    "message": f"Task '{task.title}' has been deleted",
                 }
 
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    async def batch_tasks(
+        self, user_id: str, operations: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Create, update, complete or delete many tasks in one transaction.
+
+        Each item is validated on its own: an invalid item is reported in
+        its result and the others still apply.
+
+        Args:
+            user_id: User ID (from JWT)
+            operations: Items with "op" ("create", "update", "complete",
+                "delete"), "task_id" (all but create), task fields such as
+                "title", "description", "priority", "tags" and "due_date"
+                (create, update) and "completed" (complete)
+
+        Returns:
+            Per-operation results with success/failure counts, or error dict
+        """
+        try:
+            if not operations:
+                return {"success": False, "error": "At least one operation is required"}
+            if len(operations) > MAX_BATCH_OPERATIONS:
+                return {"success": False, "error": f"At most {MAX_BATCH_OPERATIONS} operations per batch"}
+
+            valid: List[Tuple[int, TaskBatchOperation]] = []
+            results: Dict[int, Dict[str, Any]] = {}
+            for index, item in enumerate(operations):
+                try:
+                    valid.append((index, _batch_operation(item)))
+                except ValidationError as e:
+                    results[index] = {
+                        "index": index,
+                        "op": item.get("op"),
+                        "success": False,
+                        "task_id": item.get("task_id"),
+                        "title": None,
+                        "error": _validation_error(e),
+                    }
+
+            if valid:
+                async with self.session_maker() as session:
+                    applied = await apply_task_batch(session, user_id, [op for _, op in valid])
+                    if any(result.success for result in applied):
+                        await session.commit()
+                for (index, _), result in zip(valid, applied):
+                    results[index] = {
+                        "index": index,
+                        "op": result.op.value,
+                        "success": result.success,
+                        "task_id": result.task_id,
+                        "title": result.task.title if result.task else None,
+                        "error": result.error,
+                    }
+
+            succeeded = sum(1 for result in results.values() if result["success"])
+            return {
+                "success": True,
+                "results": [results[index] for index in sorted(results)],
+                "succeeded": succeeded,
+                "failed": len(results) - succeeded,
+            }
+
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
 
 # Create global instance
 task_tools = TaskTools()
@@ -296,9 +451,11 @@ def get_tool_function(tool_name: str):
     tools = {
         "add_task": task_tools.add_task,
         "list_tasks": task_tools.list_tasks,
+        "search_tasks": task_tools.search_tasks,
         "complete_task": task_tools.complete_task,
         "update_task": task_tools.update_task,
         "delete_task": task_tools.delete_task,
+        "batch_tasks": task_tools.batch_tasks,
     }
     return tools.get(tool_name)
 
@@ -334,7 +491,7 @@ def get_mcp_tool_schemas() -> List[Dict[str, Any]]:
             "type": "function",
             "function": {
                 "name": "list_tasks",
-                "description": "Get user's tasks with optional status filter. Use when user asks what tasks they have, what to do, or wants to see their todos.",
+                "description": "Get one page of the user's tasks with optional filters. Use when user asks what tasks they have, what to do, or wants to see their todos. Pass next_cursor back as cursor to fetch the following page.",
                 "parameters": {
                     "type": "object",
                     "properties": {
@@ -343,12 +500,85 @@ def get_mcp_tool_schemas() -> List[Dict[str, Any]]:
                             "enum": ["all", "pending", "completed"],
                             "description": "Filter tasks by status",
                             "default": "all"
+                        },
+                        "limit": {
+                            "type": "integer",
+                            "description": "Maximum number of tasks to return (1-200)",
+                            "default": 50
+                        },
+                        "cursor": {
+                            "type": "string",
+                            "description": "next_cursor value from a previous list_tasks call"
+                        },
+                        "priority": {
+                            "type": "array",
+                            "items": {"type": "string", "enum": ["low", "medium", "high", "urgent"]},
+                            "description": "Only tasks with these priorities"
+                        },
+                        "tags": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "Only tasks carrying all of these tags"
+                        },
+                        "due_after": {
+                            "type": "string",
+                            "description": "ISO 8601 datetime; only tasks due on or after it"
+                        },
+                        "due_before": {
+                            "type": "string",
+                            "description": "ISO 8601 datetime; only tasks due before it"
+                        },
+                        "is_recurring": {
+                            "type": "boolean",
+                            "description": "Only recurring (true) or one-off (false) tasks"
+                        },
+                        "sort": {
+                            "type": "string",
+                            "enum": ["created_at", "due_date", "title"],
+                            "default": "created_at"
+                        },
+                        "order": {
+                            "type": "string",
+                            "enum": ["asc", "desc"],
+                            "default": "desc"
                         }
                     },
                     "required": []
                 }
             }
         },
+        {
+            "type": "function",
+            "function": {
+                "name": "search_tasks",
+                "description": "Find tasks by words in their title, description or tags, best match first. Use when the user refers to a task by name or asks which tasks mention something; prefer it over list_tasks to look up a task ID.",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "query": {
+                            "type": "string",
+                            "description": "Words to search for; partial words match (e.g. 'groc' finds 'groceries')"
+                        },
+                        "status_filter": {
+                            "type": "string",
+                            "enum": ["all", "pending", "completed"],
+                            "description": "Filter tasks by status",
+                            "default": "all"
+                        },
+                        "limit": {
+                            "type": "integer",
+                            "description": "Maximum number of tasks to return (1-100)",
+                            "default": 20
+                        },
+                        "cursor": {
+                            "type": "string",
+                            "description": "next_cursor value from a previous search_tasks call with the same query"
+                        }
+                    },
+                    "required": ["query"]
+                }
+            }
+        },
         {
             "type": "function",
             "function": {
@@ -412,11 +642,68 @@ def get_mcp_tool_schemas() -> List[Dict[str, Any]]:
                     "required": ["task_id"]
                 }
             }
+        },
+        {
+            "type": "function",
+            "function": {
+                "name": "batch_tasks",
+                "description": "Apply several task changes in one call: create, update, complete or delete many tasks at once. Use instead of repeated single-task calls when the user asks to act on more than one task (e.g. 'mark all my shopping tasks done').",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "operations": {
+                            "type": "array",
+                            "description": "Operations, applied in order (at most 500)",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "op": {
+                                        "type": "string",
+                                        "enum": ["create", "update", "complete", "delete"]
+                                    },
+                                    "task_id": {
+                                        "type": "integer",
+                                        "description": "Task to change (all operations except create)"
+                                    },
+                                    "title": {
+                                        "type": "string",
+                                        "description": "Title for create, or new title for update"
+                                    },
+                                    "description": {
+                                        "type": "string",
+                                        "description": "Description for create, or new description for update"
+                                    },
+                                    "priority": {
+                                        "type": "string",
+                                        "enum": ["low", "medium", "high", "urgent"],
+                                        "description": "Priority for create or update"
+                                    },
+                                    "tags": {
+                                        "type": "string",
+                                        "description": "Comma-separated tags for create or update"
+                                    },
+                                    "due_date": {
+                                        "type": "string",
+                                        "description": "ISO 8601 due date for create or update"
+                                    },
+                                    "completed": {
+                                        "type": "boolean",
+                                        "description": "For complete: true to mark done, false to reopen",
+                                        "default": True
+                                    }
+                                },
+                                "required": ["op"]
+                            }
+                        }
+                    },
+                    "required": ["operations"]
+                }
+            }
         }
     ]
 
 
-def execute_tool(tool_name: str, user_id: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+async def execute_tool(tool_name: str, user_id: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
     """Execute a tool with given arguments.
 
     This wraps TaskTools methods and handles user_id injection.
@@ -435,7 +722,7 @@ def execute_tool(tool_name: str, user_id: str, arguments: Dict[str, Any]) -> Dic
 
     try:
         # Inject user_id as first argument
-        result = tool_func(user_id, **arguments)
+        result = await tool_func(user_id, **arguments)
         return result
     except Exception as e:
         return {"success": False, "error": str(e)}
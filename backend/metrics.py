@@ -0,0 +1,46 @@
+"""
+In-process metrics registry
+Collects counters/gauges from backend components and renders them in
+Prometheus text format for the /metrics endpoint
+"""
+
+from typing import Callable, Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+Collector = Callable[[], Dict[str, float]]
+
+
+class MetricsRegistry:
+    """Registry of metric collectors keyed by component name"""
+
+    def __init__(self):
+        self._collectors: Dict[str, Collector] = {}
+
+    def register(self, name: str, collector: Collector):
+        """Register (or replace) a collector returning {metric_name: value}"""
+        self._collectors[name] = collector
+
+    def unregister(self, name: str):
+        """Remove a collector"""
+        self._collectors.pop(name, None)
+
+    def collect(self) -> Dict[str, float]:
+        """Gather samples from every registered collector"""
+        samples: Dict[str, float] = {}
+        for name, collector in list(self._collectors.items()):
+            try:
+                samples.update(collector())
+            except Exception as e:
+                logger.warning(f"Metrics collector '{name}' failed: {e}")
+        return samples
+
+    def render(self) -> str:
+        """Render all samples in Prometheus text exposition format"""
+        lines = [f"{metric} {value}" for metric, value in sorted(self.collect().items())]
+        return "\n".join(lines) + "\n"
+
+
+# Global metrics registry
+metrics_registry = MetricsRegistry()
@@ -3,11 +3,14 @@
 This migration creates the messages table for Phase 3.
 """
 
+from sqlalchemy import text
+
 
 def create_messages_table(connection):
     """Create messages table."""
     connection.execute(
-        """
+        text(
+            """
         CREATE TABLE IF NOT EXISTS message (
             id VARCHAR(36) PRIMARY KEY,
             conversation_id VARCHAR(36) NOT NULL,
@@ -20,25 +23,26 @@ def create_messages_table(connection):
             FOREIGN KEY (conversation_id) REFERENCES conversation(id) ON DELETE CASCADE
         )
         """
+        )
     )
     # Create indexes
     connection.execute(
-        "CREATE INDEX IF NOT EXISTS idx_message_conversation_id ON message(conversation_id)"
+        text("CREATE INDEX IF NOT EXISTS idx_message_conversation_id ON message(conversation_id)")
     )
     connection.execute(
-        "CREATE INDEX IF NOT EXISTS idx_message_user_id ON message(user_id)"
+        text("CREATE INDEX IF NOT EXISTS idx_message_user_id ON message(user_id)")
     )
     connection.execute(
-        "CREATE INDEX IF NOT EXISTS idx_message_created_at ON message(created_at)"
+        text("CREATE INDEX IF NOT EXISTS idx_message_created_at ON message(created_at)")
     )
     connection.execute(
-        "CREATE INDEX IF NOT EXISTS idx_message_role ON message(role)"
+        text("CREATE INDEX IF NOT EXISTS idx_message_role ON message(role)")
     )
 
 
 def drop_messages_table(connection):
     """Drop messages table."""
-    connection.execute("DROP TABLE IF EXISTS message")
+    connection.execute(text("DROP TABLE IF EXISTS message"))
 
 
 def run(connection):
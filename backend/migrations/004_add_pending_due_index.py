@@ -0,0 +1,58 @@
+"""Migration: Add a partial index for cross-user due-date scans.
+
+The reminder pipeline walks every user's incomplete tasks due in a time
+window, keyed on (due_date, id). Only incomplete tasks are indexed.
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import text
+
+
+def create_pending_due_index(connection):
+    """Create the pending due-date index."""
+    predicate = "completed = 0" if connection.dialect.name == "sqlite" else "NOT completed"
+    connection.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_task_pending_due "
+            f"ON task (due_date, id) WHERE {predicate}"
+        )
+    )
+
+
+def drop_pending_due_index(connection):
+    """Drop the pending due-date index."""
+    connection.execute(text("DROP INDEX IF EXISTS ix_task_pending_due"))
+
+
+def verify(connection):
+    """Assert via EXPLAIN that the due-window scan uses the index."""
+    dialect = connection.dialect.name
+    false = "0" if dialect == "sqlite" else "false"
+    query = (
+        f"SELECT id FROM task WHERE completed = {false} "
+        "AND due_date >= :start AND due_date < :end ORDER BY due_date, id LIMIT 500"
+    )
+    now = datetime.utcnow()
+    params = {"start": now, "end": now + timedelta(hours=1)}
+
+    if dialect == "sqlite":
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {query}"), params)
+        plan = "\n".join(str(row[-1]) for row in rows)
+    else:
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        rows = connection.execute(text(f"EXPLAIN {query}"), params)
+        plan = "\n".join(str(row[0]) for row in rows)
+        connection.execute(text("SET LOCAL enable_seqscan = on"))
+
+    if "ix_task_pending_due" not in plan:
+        raise AssertionError(f"Due-window scan does not use ix_task_pending_due:\n{plan}")
+
+
+def run(connection):
+    """Run migration."""
+    create_pending_due_index(connection)
+
+
+def rollback(connection):
+    """Rollback migration."""
+    drop_pending_due_index(connection)
@@ -0,0 +1,61 @@
+"""Migration: Add a partial index for the recurring task scheduler.
+
+The scheduler scans recurring parent tasks (not generated instances)
+whose next_occurrence has passed, ordered by (next_occurrence, id).
+"""
+
+from datetime import datetime
+from sqlalchemy import text
+
+
+def create_recurring_parent_index(connection):
+    """Create the recurring parent index."""
+    if connection.dialect.name == "sqlite":
+        predicate = "is_recurring = 1 AND parent_task_id IS NULL"
+    else:
+        predicate = "is_recurring AND parent_task_id IS NULL"
+    connection.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_task_recurring_parent_next "
+            f"ON task (next_occurrence, id) WHERE {predicate}"
+        )
+    )
+
+
+def drop_recurring_parent_index(connection):
+    """Drop the recurring parent index."""
+    connection.execute(text("DROP INDEX IF EXISTS ix_task_recurring_parent_next"))
+
+
+def verify(connection):
+    """Assert via EXPLAIN that the scheduler scan uses the index."""
+    dialect = connection.dialect.name
+    true = "1" if dialect == "sqlite" else "true"
+    query = (
+        f"SELECT id FROM task WHERE is_recurring = {true} AND parent_task_id IS NULL "
+        "AND next_occurrence IS NOT NULL AND next_occurrence <= :now "
+        "ORDER BY next_occurrence, id LIMIT 200"
+    )
+    params = {"now": datetime.utcnow()}
+
+    if dialect == "sqlite":
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {query}"), params)
+        plan = "\n".join(str(row[-1]) for row in rows)
+    else:
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        rows = connection.execute(text(f"EXPLAIN {query}"), params)
+        plan = "\n".join(str(row[0]) for row in rows)
+        connection.execute(text("SET LOCAL enable_seqscan = on"))
+
+    if "ix_task_recurring_parent_next" not in plan:
+        raise AssertionError(f"Scheduler scan does not use ix_task_recurring_parent_next:\n{plan}")
+
+
+def run(connection):
+    """Run migration."""
+    create_recurring_parent_index(connection)
+
+
+def rollback(connection):
+    """Rollback migration."""
+    drop_recurring_parent_index(connection)
@@ -0,0 +1,28 @@
+"""Migration: Add recurrence_rule column to task.
+
+Stores RRULE text (e.g. FREQ=WEEKLY;BYDAY=MO,WE) for custom recurrences.
+"""
+
+from sqlalchemy import inspect, text
+
+
+def add_recurrence_rule_column(connection):
+    """Add recurrence_rule column."""
+    columns = {column["name"] for column in inspect(connection).get_columns("task")}
+    if "recurrence_rule" not in columns:
+        connection.execute(text("ALTER TABLE task ADD COLUMN recurrence_rule VARCHAR(200)"))
+
+
+def drop_recurrence_rule_column(connection):
+    """Drop recurrence_rule column."""
+    connection.execute(text("ALTER TABLE task DROP COLUMN recurrence_rule"))
+
+
+def run(connection):
+    """Run migration."""
+    add_recurrence_rule_column(connection)
+
+
+def rollback(connection):
+    """Rollback migration."""
+    drop_recurrence_rule_column(connection)
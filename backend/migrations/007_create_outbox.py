@@ -0,0 +1,46 @@
+"""Migration: Create outbox table.
+
+Task events are written here in the same transaction as the task change
+and relayed to Kafka by outbox.OutboxRelay.
+"""
+
+from sqlalchemy import text
+
+
+def create_outbox_table(connection):
+    """Create outbox table."""
+    id_column = (
+        "id INTEGER PRIMARY KEY AUTOINCREMENT"
+        if connection.dialect.name == "sqlite"
+        else "id BIGSERIAL PRIMARY KEY"
+    )
+    connection.execute(
+        text(
+            f"""
+        CREATE TABLE IF NOT EXISTS outboxevent (
+            {id_column},
+            topic VARCHAR(100) NOT NULL,
+            event_key VARCHAR(100) NOT NULL,
+            event_type VARCHAR(50) NOT NULL,
+            payload TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            attempts INTEGER NOT NULL DEFAULT 0
+        )
+        """
+        )
+    )
+
+
+def drop_outbox_table(connection):
+    """Drop outbox table."""
+    connection.execute(text("DROP TABLE IF EXISTS outboxevent"))
+
+
+def run(connection):
+    """Run migration."""
+    create_outbox_table(connection)
+
+
+def rollback(connection):
+    """Rollback migration."""
+    drop_outbox_table(connection)
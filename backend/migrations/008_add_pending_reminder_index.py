@@ -0,0 +1,64 @@
+"""Migration: Add a partial index for the reminder scheduler.
+
+The scheduler loads upcoming reminders of incomplete tasks in keyset
+batches ordered by (reminder_at, id). Tasks without a reminder are not
+indexed.
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import text
+
+
+def _predicate(dialect: str) -> str:
+    completed = "completed = 0" if dialect == "sqlite" else "NOT completed"
+    return f"reminder_at IS NOT NULL AND {completed}"
+
+
+def create_pending_reminder_index(connection):
+    """Create the pending reminder index."""
+    connection.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_task_pending_reminder "
+            f"ON task (reminder_at, id) WHERE {_predicate(connection.dialect.name)}"
+        )
+    )
+
+
+def drop_pending_reminder_index(connection):
+    """Drop the pending reminder index."""
+    connection.execute(text("DROP INDEX IF EXISTS ix_task_pending_reminder"))
+
+
+def verify(connection):
+    """Assert via EXPLAIN that the window refill uses the index."""
+    dialect = connection.dialect.name
+    false = "0" if dialect == "sqlite" else "false"
+    query = (
+        f"SELECT id FROM task WHERE completed = {false} AND reminder_at IS NOT NULL "
+        "AND reminder_at >= :start AND reminder_at < :end "
+        "ORDER BY reminder_at, id LIMIT 1000"
+    )
+    now = datetime.utcnow()
+    params = {"start": now, "end": now + timedelta(minutes=5)}
+
+    if dialect == "sqlite":
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {query}"), params)
+        plan = "\n".join(str(row[-1]) for row in rows)
+    else:
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        rows = connection.execute(text(f"EXPLAIN {query}"), params)
+        plan = "\n".join(str(row[0]) for row in rows)
+        connection.execute(text("SET LOCAL enable_seqscan = on"))
+
+    if "ix_task_pending_reminder" not in plan:
+        raise AssertionError(f"Reminder refill does not use ix_task_pending_reminder:\n{plan}")
+
+
+def run(connection):
+    """Run migration."""
+    create_pending_reminder_index(connection)
+
+
+def rollback(connection):
+    """Rollback migration."""
+    drop_pending_reminder_index(connection)
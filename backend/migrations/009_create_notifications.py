@@ -0,0 +1,67 @@
+"""Migration: Create notification and notificationcounter tables.
+
+Backs the in-app inbox: notifications are listed per user newest first,
+and the unread badge reads a per-user counter row.
+"""
+
+from sqlalchemy import text
+
+
+def create_notification_tables(connection):
+    """Create notification tables."""
+    id_column = (
+        "id INTEGER PRIMARY KEY AUTOINCREMENT"
+        if connection.dialect.name == "sqlite"
+        else "id BIGSERIAL PRIMARY KEY"
+    )
+    connection.execute(
+        text(
+            f"""
+        CREATE TABLE IF NOT EXISTS notification (
+            {id_column},
+            user_id VARCHAR(255) NOT NULL,
+            message VARCHAR(1000) NOT NULL,
+            task_id INTEGER,
+            type VARCHAR(50) NOT NULL DEFAULT 'info',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            read_at TIMESTAMP
+        )
+        """
+        )
+    )
+    connection.execute(
+        text(
+            """
+        CREATE TABLE IF NOT EXISTS notificationcounter (
+            user_id VARCHAR(255) PRIMARY KEY,
+            unread INTEGER NOT NULL DEFAULT 0
+        )
+        """
+        )
+    )
+    # Create indexes
+    connection.execute(
+        text("CREATE INDEX IF NOT EXISTS ix_notification_user_id ON notification (user_id, id)")
+    )
+    connection.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_notification_user_unread "
+            "ON notification (user_id, id) WHERE read_at IS NULL"
+        )
+    )
+
+
+def drop_notification_tables(connection):
+    """Drop notification tables."""
+    connection.execute(text("DROP TABLE IF EXISTS notificationcounter"))
+    connection.execute(text("DROP TABLE IF EXISTS notification"))
+
+
+def run(connection):
+    """Run migration."""
+    create_notification_tables(connection)
+
+
+def rollback(connection):
+    """Rollback migration."""
+    drop_notification_tables(connection)
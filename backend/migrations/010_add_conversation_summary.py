@@ -0,0 +1,73 @@
+"""Migration: Add rolling summaries to conversation and a history index.
+
+The chat history loader reads the newest messages of a conversation
+(ORDER BY created_at DESC) and folds older ones into
+conversation.summary; summarized_until marks the newest folded message.
+"""
+
+from sqlalchemy import inspect, text
+
+
+def add_summary_columns(connection):
+    """Add summary and summarized_until columns."""
+    columns = {column["name"] for column in inspect(connection).get_columns("conversation")}
+    if "summary" not in columns:
+        connection.execute(text("ALTER TABLE conversation ADD COLUMN summary TEXT"))
+    if "summarized_until" not in columns:
+        timestamp = "DATETIME" if connection.dialect.name == "sqlite" else "TIMESTAMP"
+        connection.execute(text(f"ALTER TABLE conversation ADD COLUMN summarized_until {timestamp}"))
+
+
+def create_history_index(connection):
+    """Create the (conversation_id, created_at) message index."""
+    connection.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_message_conversation_created "
+            "ON message (conversation_id, created_at)"
+        )
+    )
+
+
+def verify(connection):
+    """Assert via EXPLAIN that the newest-first history query uses the index."""
+    dialect = connection.dialect.name
+    query = (
+        "SELECT id FROM message WHERE conversation_id = :conversation_id "
+        "AND created_at > :since ORDER BY created_at DESC LIMIT 21"
+    )
+    params = {"conversation_id": "00000000-0000-0000-0000-000000000000", "since": "1970-01-01"}
+
+    if dialect == "sqlite":
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {query}"), params)
+        plan = "\n".join(str(row[-1]) for row in rows)
+    else:
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        rows = connection.execute(text(f"EXPLAIN {query}"), params)
+        plan = "\n".join(str(row[0]) for row in rows)
+        connection.execute(text("SET LOCAL enable_seqscan = on"))
+
+    if "ix_message_conversation_created" not in plan:
+        raise AssertionError(f"History query does not use ix_message_conversation_created:\n{plan}")
+
+
+def drop_summary_columns(connection):
+    """Drop summary and summarized_until columns."""
+    connection.execute(text("ALTER TABLE conversation DROP COLUMN summarized_until"))
+    connection.execute(text("ALTER TABLE conversation DROP COLUMN summary"))
+
+
+def drop_history_index(connection):
+    """Drop the message history index."""
+    connection.execute(text("DROP INDEX IF EXISTS ix_message_conversation_created"))
+
+
+def run(connection):
+    """Run migration."""
+    add_summary_columns(connection)
+    create_history_index(connection)
+
+
+def rollback(connection):
+    """Rollback migration."""
+    drop_history_index(connection)
+    drop_summary_columns(connection)
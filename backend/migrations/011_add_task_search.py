@@ -0,0 +1,93 @@
+"""Migration: Add full-text search over task title, description and tags.
+
+Postgres gets a generated, weighted tsvector column with a GIN index;
+SQLite gets an external-content FTS5 table kept in sync by triggers and
+filled from the existing rows. New databases get the same objects from
+models.task.TASK_SEARCH_DDL when the task table is created.
+"""
+
+from sqlalchemy import text
+
+POSTGRES_STATEMENTS = [
+    "ALTER TABLE task ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+    "setweight(to_tsvector('english', replace(coalesce(tags, ''), ',', ' ')), 'C')"
+    ") STORED",
+    "CREATE INDEX IF NOT EXISTS ix_task_search ON task USING GIN (search_vector)",
+]
+
+SQLITE_STATEMENTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS task_fts USING fts5("
+    "title, description, tags, user_id, content='task', content_rowid='id', "
+    "tokenize='porter unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS task_fts_insert AFTER INSERT ON task BEGIN "
+    "INSERT INTO task_fts(rowid, title, description, tags, user_id) "
+    "VALUES (new.id, new.title, new.description, new.tags, new.user_id); END",
+    "CREATE TRIGGER IF NOT EXISTS task_fts_delete AFTER DELETE ON task BEGIN "
+    "INSERT INTO task_fts(task_fts, rowid, title, description, tags, user_id) "
+    "VALUES ('delete', old.id, old.title, old.description, old.tags, old.user_id); END",
+    "CREATE TRIGGER IF NOT EXISTS task_fts_update AFTER UPDATE OF title, description, tags, user_id ON task BEGIN "
+    "INSERT INTO task_fts(task_fts, rowid, title, description, tags, user_id) "
+    "VALUES ('delete', old.id, old.title, old.description, old.tags, old.user_id); "
+    "INSERT INTO task_fts(rowid, title, description, tags, user_id) "
+    "VALUES (new.id, new.title, new.description, new.tags, new.user_id); END",
+    # Index the rows that existed before the triggers
+    "INSERT INTO task_fts(task_fts) VALUES ('rebuild')",
+]
+
+
+def create_search_index(connection):
+    """Create the search column/table and its index."""
+    statements = SQLITE_STATEMENTS if connection.dialect.name == "sqlite" else POSTGRES_STATEMENTS
+    for statement in statements:
+        connection.execute(text(statement))
+
+
+def verify(connection):
+    """Assert via EXPLAIN that a search is answered from the full-text index."""
+    if connection.dialect.name == "sqlite":
+        query = (
+            "SELECT task.id FROM task JOIN task_fts ON task_fts.rowid = task.id "
+            "WHERE task_fts MATCH :match AND task.user_id = :user_id"
+        )
+        rows = connection.execute(
+            text(f"EXPLAIN QUERY PLAN {query}"), {"match": '"explain"*', "user_id": "explain-user"}
+        )
+        plan = "\n".join(str(row[-1]) for row in rows)
+        expected = "VIRTUAL TABLE INDEX"
+    else:
+        query = (
+            "SELECT id FROM task WHERE user_id = :user_id "
+            "AND search_vector @@ to_tsquery('english', 'explain:*')"
+        )
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        rows = connection.execute(text(f"EXPLAIN {query}"), {"user_id": "explain-user"})
+        plan = "\n".join(str(row[0]) for row in rows)
+        connection.execute(text("SET LOCAL enable_seqscan = on"))
+        expected = "ix_task_search"
+
+    if expected not in plan:
+        raise AssertionError(f"Search query does not use the full-text index:\n{plan}")
+
+
+def drop_search_index(connection):
+    """Drop the search column/table and its index."""
+    if connection.dialect.name == "sqlite":
+        for trigger in ("task_fts_insert", "task_fts_delete", "task_fts_update"):
+            connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+        connection.execute(text("DROP TABLE IF EXISTS task_fts"))
+    else:
+        connection.execute(text("DROP INDEX IF EXISTS ix_task_search"))
+        connection.execute(text("ALTER TABLE task DROP COLUMN IF EXISTS search_vector"))
+
+
+def run(connection):
+    """Run migration."""
+    create_search_index(connection)
+
+
+def rollback(connection):
+    """Rollback migration."""
+    drop_search_index(connection)
@@ -0,0 +1,36 @@
+"""Migration: Create taskrevision table.
+
+One row per user holding a counter that every task write bumps; task reads
+expose it as an ETag. Users without a row are at revision 0.
+"""
+
+from sqlalchemy import text
+
+
+def create_task_revision_table(connection):
+    """Create taskrevision table."""
+    connection.execute(
+        text(
+            """
+        CREATE TABLE IF NOT EXISTS taskrevision (
+            user_id VARCHAR(255) PRIMARY KEY,
+            revision INTEGER NOT NULL DEFAULT 0
+        )
+        """
+        )
+    )
+
+
+def drop_task_revision_table(connection):
+    """Drop taskrevision table."""
+    connection.execute(text("DROP TABLE IF EXISTS taskrevision"))
+
+
+def run(connection):
+    """Run migration."""
+    create_task_revision_table(connection)
+
+
+def rollback(connection):
+    """Rollback migration."""
+    drop_task_revision_table(connection)
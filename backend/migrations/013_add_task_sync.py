@@ -0,0 +1,104 @@
+"""Migration: Add delta sync columns, the tombstone table and their indexes.
+
+task.updated_rev holds the user's task revision at the row's last write
+(rows written before this migration stay at 0); tasktombstone records
+deletions until the purger removes them, and taskrevision.purged_rev marks
+how far it got.
+"""
+
+from sqlalchemy import inspect, text
+
+
+def add_sync_columns(connection):
+    """Add task.updated_rev and taskrevision.purged_rev."""
+    for table, column in (("task", "updated_rev"), ("taskrevision", "purged_rev")):
+        columns = {existing["name"] for existing in inspect(connection).get_columns(table)}
+        if column not in columns:
+            connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0"))
+
+
+def create_tombstone_table(connection):
+    """Create tasktombstone table."""
+    id_column = (
+        "id INTEGER PRIMARY KEY AUTOINCREMENT"
+        if connection.dialect.name == "sqlite"
+        else "id BIGSERIAL PRIMARY KEY"
+    )
+    connection.execute(
+        text(
+            f"""
+        CREATE TABLE IF NOT EXISTS tasktombstone (
+            {id_column},
+            user_id VARCHAR(255) NOT NULL,
+            task_id INTEGER NOT NULL,
+            deleted_rev INTEGER NOT NULL,
+            deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+        )
+    )
+
+
+def create_sync_indexes(connection):
+    """Create the delta sync and purge indexes."""
+    connection.execute(
+        text("CREATE INDEX IF NOT EXISTS ix_task_user_updated_rev ON task (user_id, updated_rev, id)")
+    )
+    connection.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_tasktombstone_user_rev "
+            "ON tasktombstone (user_id, deleted_rev, task_id)"
+        )
+    )
+    connection.execute(
+        text("CREATE INDEX IF NOT EXISTS ix_tasktombstone_deleted_at ON tasktombstone (deleted_at, id)")
+    )
+
+
+def verify(connection):
+    """Assert via EXPLAIN that both change streams are read from their indexes."""
+    dialect = connection.dialect.name
+    queries = {
+        "ix_task_user_updated_rev": (
+            "SELECT id FROM task WHERE user_id = :user_id "
+            "AND updated_rev > :since AND updated_rev <= :revision ORDER BY updated_rev, id LIMIT 201"
+        ),
+        "ix_tasktombstone_user_rev": (
+            "SELECT task_id FROM tasktombstone WHERE user_id = :user_id "
+            "AND deleted_rev > :since AND deleted_rev <= :revision ORDER BY deleted_rev, task_id LIMIT 201"
+        ),
+    }
+    params = {"user_id": "explain-user", "since": 1, "revision": 2}
+
+    for index, query in queries.items():
+        if dialect == "sqlite":
+            rows = connection.execute(text(f"EXPLAIN QUERY PLAN {query}"), params)
+            plan = "\n".join(str(row[-1]) for row in rows)
+        else:
+            connection.execute(text("SET LOCAL enable_seqscan = off"))
+            rows = connection.execute(text(f"EXPLAIN {query}"), params)
+            plan = "\n".join(str(row[0]) for row in rows)
+            connection.execute(text("SET LOCAL enable_seqscan = on"))
+
+        if index not in plan:
+            raise AssertionError(f"Change stream query does not use {index}:\n{plan}")
+
+
+def drop_sync_objects(connection):
+    """Drop the tombstone table, sync indexes and columns."""
+    connection.execute(text("DROP INDEX IF EXISTS ix_task_user_updated_rev"))
+    connection.execute(text("DROP TABLE IF EXISTS tasktombstone"))
+    connection.execute(text("ALTER TABLE taskrevision DROP COLUMN purged_rev"))
+    connection.execute(text("ALTER TABLE task DROP COLUMN updated_rev"))
+
+
+def run(connection):
+    """Run migration."""
+    add_sync_columns(connection)
+    create_tombstone_table(connection)
+    create_sync_indexes(connection)
+
+
+def rollback(connection):
+    """Rollback migration."""
+    drop_sync_objects(connection)
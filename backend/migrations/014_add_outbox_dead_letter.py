@@ -0,0 +1,31 @@
+"""Migration: Add a dead-letter marker to outboxevent.
+
+The relay stops retrying a row after OUTBOX_MAX_ATTEMPTS failed publishes
+and sets failed_at instead of deleting it, so later rows keep flowing and
+the failed event stays available for inspection or a manual replay.
+"""
+
+from sqlalchemy import inspect, text
+
+
+def add_failed_at_column(connection):
+    """Add failed_at column."""
+    columns = {column["name"] for column in inspect(connection).get_columns("outboxevent")}
+    if "failed_at" not in columns:
+        timestamp = "DATETIME" if connection.dialect.name == "sqlite" else "TIMESTAMP"
+        connection.execute(text(f"ALTER TABLE outboxevent ADD COLUMN failed_at {timestamp}"))
+
+
+def drop_failed_at_column(connection):
+    """Drop failed_at column."""
+    connection.execute(text("ALTER TABLE outboxevent DROP COLUMN failed_at"))
+
+
+def run(connection):
+    """Run migration."""
+    add_failed_at_column(connection)
+
+
+def rollback(connection):
+    """Rollback migration."""
+    drop_failed_at_column(connection)
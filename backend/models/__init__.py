@@ -1,3 +1,9 @@
-from .task import Task, TaskCreate, TaskUpdate, TaskRead
+from .task import (
+    Task, TaskCreate, TaskUpdate, TaskRead, TaskPage, TaskChanges, TaskSearchHit, TaskSearchPage,
+    TaskBatchOperation, TaskBatchRequest, TaskBatchResult, TaskBatchResponse,
+)
 
-__all__ = ["Task", "TaskCreate", "TaskUpdate", "TaskRead"]
\ No newline at end of file
+__all__ = [
+    "Task", "TaskCreate", "TaskUpdate", "TaskRead", "TaskPage", "TaskChanges", "TaskSearchHit", "TaskSearchPage",
+    "TaskBatchOperation", "TaskBatchRequest", "TaskBatchResult", "TaskBatchResponse",
+]
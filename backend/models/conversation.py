@@ -16,6 +16,9 @@ class Conversation(SQLModel, table=True):
     user_id: str = Field(index=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    # Rolling summary of messages that no longer fit the prompt (see chat_history.py)
+    summary: Optional[str] = None
+    summarized_until: Optional[datetime] = None  # created_at of the newest summarized message
 
     def __repr__(self):
         return f"<Conversation(id={self.id}, user_id={self.user_id})>"
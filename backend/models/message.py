@@ -2,6 +2,7 @@
 
 from datetime import datetime
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 from uuid import uuid4
 
@@ -12,6 +13,11 @@ class Message(SQLModel, table=True):
     Tracks both user and assistant messages with tool execution details.
     """
 
+    # Newest-first history reads (migrations/010_add_conversation_summary.py)
+    __table_args__ = (
+        Index("ix_message_conversation_created", "conversation_id", "created_at"),
+    )
+
     id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True)
     conversation_id: str = Field(foreign_key="conversation.id", index=True)
     user_id: str = Field(index=True)
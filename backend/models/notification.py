@@ -0,0 +1,46 @@
+"""Notification models for the in-app inbox."""
+
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Index, text
+from sqlmodel import Field, SQLModel
+
+
+class Notification(SQLModel, table=True):
+    """In-app notification for a user.
+
+    Listed newest first per user, so rows are keyed on (user_id, id).
+    """
+
+    __table_args__ = (
+        Index("ix_notification_user_id", "user_id", "id"),
+        Index(
+            "ix_notification_user_unread",
+            "user_id",
+            "id",
+            postgresql_where=text("read_at IS NULL"),
+            sqlite_where=text("read_at IS NULL"),
+        ),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: str = Field(max_length=255)
+    message: str = Field(max_length=1000)
+    task_id: Optional[int] = Field(default=None)
+    type: str = Field(default="info", max_length=50)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    read_at: Optional[datetime] = Field(default=None)
+
+    def __repr__(self):
+        return f"<Notification(id={self.id}, user_id={self.user_id}, type={self.type})>"
+
+
+class NotificationCounter(SQLModel, table=True):
+    """Unread notification count per user.
+
+    Maintained alongside Notification writes so the badge count is a
+    primary-key lookup instead of a COUNT over the inbox.
+    """
+
+    user_id: str = Field(primary_key=True, max_length=255)
+    unread: int = Field(default=0)
@@ -0,0 +1,27 @@
+"""Outbox model for transactional event publishing."""
+
+from datetime import datetime
+from typing import Optional
+from sqlmodel import Field, SQLModel
+
+
+class OutboxEvent(SQLModel, table=True):
+    """Event waiting to be relayed to Kafka.
+
+    Written in the same transaction as the change it describes, so an
+    event exists exactly when the change was committed. Rows are deleted
+    once the broker acknowledges them; rows that keep failing are set aside
+    with failed_at instead (dead letters).
+    """
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    topic: str = Field(max_length=100)
+    event_key: str = Field(max_length=100)  # Partition key, e.g. the task id
+    event_type: str = Field(max_length=50)
+    payload: str  # JSON-encoded event body
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    attempts: int = Field(default=0)
+    failed_at: Optional[datetime] = Field(default=None)
+
+    def __repr__(self):
+        return f"<OutboxEvent(id={self.id}, topic={self.topic}, key={self.event_key})>"
@@ -1,10 +1,16 @@
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import DDL, Index, event, text
 from typing import Optional, TYPE_CHECKING, List
 from datetime import datetime
 from enum import Enum
 from pydantic import validator
 import re
 
+try:
+    from recurrence import RecurrenceRule
+except ImportError:
+    from ..recurrence import RecurrenceRule
+
 if TYPE_CHECKING:
     from tasks import Task  # Avoid circular import
 
@@ -36,6 +42,46 @@ class TaskBase(SQLModel):
 
 
 class Task(TaskBase, table=True):
+    # Indexes matched to the hot query shapes (see migrations/003_add_task_indexes.py)
+    __table_args__ = (
+        Index("ix_task_user_created", "user_id", "created_at", "id"),
+        Index("ix_task_user_completed_created", "user_id", "completed", "created_at", "id"),
+        Index("ix_task_user_completed_due", "user_id", "completed", "due_date"),
+        Index(
+            "ix_task_user_recurring_next",
+            "user_id",
+            "next_occurrence",
+            postgresql_where=text("is_recurring"),
+            sqlite_where=text("is_recurring = 1"),
+        ),
+        # Cross-user due-date scans (migrations/004_add_pending_due_index.py)
+        Index(
+            "ix_task_pending_due",
+            "due_date",
+            "id",
+            postgresql_where=text("NOT completed"),
+            sqlite_where=text("completed = 0"),
+        ),
+        # Recurring parents due for materialisation (migrations/005_add_recurring_parent_index.py)
+        Index(
+            "ix_task_recurring_parent_next",
+            "next_occurrence",
+            "id",
+            postgresql_where=text("is_recurring AND parent_task_id IS NULL"),
+            sqlite_where=text("is_recurring = 1 AND parent_task_id IS NULL"),
+        ),
+        # Reminder window refills (migrations/008_add_pending_reminder_index.py)
+        Index(
+            "ix_task_pending_reminder",
+            "reminder_at",
+            "id",
+            postgresql_where=text("reminder_at IS NOT NULL AND NOT completed"),
+            sqlite_where=text("reminder_at IS NOT NULL AND completed = 0"),
+        ),
+        # Delta sync (migrations/013_add_task_sync.py)
+        Index("ix_task_user_updated_rev", "user_id", "updated_rev", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: str  # Store user_id in database
     completed: bool = Field(default=False)
@@ -46,17 +92,96 @@ class Task(TaskBase, table=True):
     # Advanced features for Phase 5
     is_recurring: bool = Field(default=False)
     recurrence_type: Optional[RecurrenceEnum] = Field(default=None)
+    recurrence_rule: Optional[str] = Field(default=None, max_length=200)  # RRULE text for CUSTOM
     recurrence_end_date: Optional[datetime] = Field(default=None)
     parent_task_id: Optional[int] = Field(default=None)  # For recurring task instances
     next_occurrence: Optional[datetime] = Field(default=None)
+    updated_rev: int = Field(default=0)  # User's task revision at the last write
+
+
+# Full-text search over title, description and tags (see task_search.py and
+# migrations/011_add_task_search.py). Neither a tsvector column nor an FTS5
+# table is a plain column/index, so they are created alongside the table.
+TASK_SEARCH_DDL = {
+    "postgresql": [
+        "ALTER TABLE task ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+        "setweight(to_tsvector('english', replace(coalesce(tags, ''), ',', ' ')), 'C')"
+        ") STORED",
+        "CREATE INDEX IF NOT EXISTS ix_task_search ON task USING GIN (search_vector)",
+    ],
+    "sqlite": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS task_fts USING fts5("
+        "title, description, tags, user_id, content='task', content_rowid='id', "
+        "tokenize='porter unicode61 remove_diacritics 2')",
+        "CREATE TRIGGER IF NOT EXISTS task_fts_insert AFTER INSERT ON task BEGIN "
+        "INSERT INTO task_fts(rowid, title, description, tags, user_id) "
+        "VALUES (new.id, new.title, new.description, new.tags, new.user_id); END",
+        "CREATE TRIGGER IF NOT EXISTS task_fts_delete AFTER DELETE ON task BEGIN "
+        "INSERT INTO task_fts(task_fts, rowid, title, description, tags, user_id) "
+        "VALUES ('delete', old.id, old.title, old.description, old.tags, old.user_id); END",
+        "CREATE TRIGGER IF NOT EXISTS task_fts_update AFTER UPDATE OF title, description, tags, user_id ON task BEGIN "
+        "INSERT INTO task_fts(task_fts, rowid, title, description, tags, user_id) "
+        "VALUES ('delete', old.id, old.title, old.description, old.tags, old.user_id); "
+        "INSERT INTO task_fts(rowid, title, description, tags, user_id) "
+        "VALUES (new.id, new.title, new.description, new.tags, new.user_id); END",
+    ],
+}
+
+for _dialect, _statements in TASK_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(Task.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect))
+
+
+class TaskRevision(SQLModel, table=True):
+    """Task revision per user.
+
+    Bumped in the same transaction as every write to the user's tasks, so
+    list and detail reads can answer a matching If-None-Match with a
+    primary-key lookup instead of querying the task table.
+    """
+
+    user_id: str = Field(primary_key=True, max_length=255)
+    revision: int = Field(default=0)
+    # Tombstones at or below this revision have been purged
+    purged_rev: int = Field(default=0)
+
+
+class TaskTombstone(SQLModel, table=True):
+    """Record of a deleted task, so delta sync can report the deletion.
+
+    Kept for a retention period (see task_sync.TombstonePurger); clients
+    syncing from before a purged tombstone get a full snapshot instead.
+    """
+
+    __table_args__ = (
+        Index("ix_tasktombstone_user_rev", "user_id", "deleted_rev", "task_id"),
+        Index("ix_tasktombstone_deleted_at", "deleted_at", "id"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: str = Field(max_length=255)
+    task_id: int
+    deleted_rev: int
+    deleted_at: datetime = Field(default_factory=datetime.utcnow)
 
 
 class TaskCreate(TaskBase):
     # Don't include user_id - it comes from URL path
     is_recurring: Optional[bool] = Field(default=False)
     recurrence_type: Optional[RecurrenceEnum] = None
+    recurrence_rule: Optional[str] = Field(default=None, max_length=200)
     recurrence_end_date: Optional[datetime] = None
 
+    @validator("recurrence_rule")
+    def recurrence_rule_valid(cls, v):
+        """Ensure a custom recurrence rule parses."""
+        if v:
+            RecurrenceRule.parse(v)
+        return v
+
 
 class TaskUpdate(SQLModel):
     title: Optional[str] = Field(default=None, min_length=1, max_length=200)
@@ -68,20 +193,115 @@ class TaskUpdate(SQLModel):
     completed: Optional[bool] = None
     is_recurring: Optional[bool] = None
     recurrence_type: Optional[RecurrenceEnum] = None
+    recurrence_rule: Optional[str] = Field(default=None, max_length=200)
     recurrence_end_date: Optional[datetime] = None
 
+    @validator("recurrence_rule")
+    def recurrence_rule_valid(cls, v):
+        """Ensure a custom recurrence rule parses."""
+        if v:
+            RecurrenceRule.parse(v)
+        return v
+
 
 class TaskRead(TaskBase):
     id: int
     completed: bool
     is_recurring: bool
     recurrence_type: Optional[RecurrenceEnum]
+    recurrence_rule: Optional[str] = None
     created_at: datetime
     updated_at: Optional[datetime]
     completed_at: Optional[datetime]
     next_occurrence: Optional[datetime]
 
 
+class TaskPage(SQLModel):
+    """One page of a keyset-paginated task listing"""
+    items: List[TaskRead]
+    next_cursor: Optional[str] = None
+    limit: int
+
+
+class TaskChanges(SQLModel):
+    """Tasks written and deleted after a revision, one page at a time"""
+    revision: int  # Pass as since on the next sync once next_cursor is null
+    reset: bool = False  # Full snapshot: replace every local task
+    tasks: List[TaskRead]
+    deleted: List[int]
+    next_cursor: Optional[str] = None
+    limit: int
+
+
+class TaskSearchHit(SQLModel):
+    """A task matching a search, with the matched words marked up"""
+    task: TaskRead
+    rank: float
+    title_highlight: str
+    description_highlight: Optional[str] = None
+
+
+class TaskSearchPage(SQLModel):
+    """One page of full-text search results, best match first"""
+    items: List[TaskSearchHit]
+    next_cursor: Optional[str] = None
+    limit: int
+
+
+class BatchOpEnum(str, Enum):
+    """Operations accepted by the batch endpoint"""
+    CREATE = "create"
+    UPDATE = "update"
+    COMPLETE = "complete"
+    DELETE = "delete"
+
+
+# Largest number of operations in one batch request
+MAX_BATCH_OPERATIONS = 500
+
+
+class TaskBatchOperation(SQLModel):
+    """One operation of a batch; fields beyond ``op`` depend on it
+
+    create: ``task``; update: ``task_id`` and ``changes``;
+    complete: ``task_id`` and ``completed`` (default true); delete: ``task_id``
+    """
+    op: BatchOpEnum
+    task_id: Optional[int] = None
+    task: Optional[TaskCreate] = None
+    changes: Optional[TaskUpdate] = None
+    completed: bool = True
+
+
+class TaskBatchRequest(SQLModel):
+    operations: List[TaskBatchOperation]
+
+    @validator("operations")
+    def operations_size(cls, v):
+        """Keep a batch within one reasonably sized transaction."""
+        if not v:
+            raise ValueError("At least one operation is required")
+        if len(v) > MAX_BATCH_OPERATIONS:
+            raise ValueError(f"At most {MAX_BATCH_OPERATIONS} operations per batch")
+        return v
+
+
+class TaskBatchResult(SQLModel):
+    """Outcome of one batch operation, in request order"""
+    index: int
+    op: BatchOpEnum
+    success: bool
+    task_id: Optional[int] = None
+    task: Optional[TaskRead] = None
+    error: Optional[str] = None
+
+
+class TaskBatchResponse(SQLModel):
+    results: List[TaskBatchResult]
+    succeeded: int
+    failed: int
+
+
 # Event schemas for Kafka
 class TaskEventBase(SQLModel):
     event_type: str  # "created", "updated", "completed", "deleted"
@@ -0,0 +1,274 @@
+"""
+Notification Inbox
+Persistent in-app notifications with per-user unread counters, plus a
+broker that pushes new notifications to connected clients (SSE/long-poll)
+on every replica
+"""
+
+import asyncio
+import os
+import socket
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+import logging
+
+try:
+    from database import IS_SQLITE
+    from metrics import metrics_registry
+    from models.notification import Notification, NotificationCounter
+    from schemas.notification import NotificationRead
+except ImportError:
+    from .database import IS_SQLITE
+    from .metrics import metrics_registry
+    from .models.notification import Notification, NotificationCounter
+    from .schemas.notification import NotificationRead
+
+if IS_SQLITE:
+    from sqlalchemy.dialects.sqlite import insert as dialect_insert
+else:
+    from sqlalchemy.dialects.postgresql import insert as dialect_insert
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATIONS_TOPIC = "notifications"
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InMemoryBroker:
+    """Delivers notifications to subscribers connected to this process
+
+    Each subscriber (an SSE stream or a long-poll request) owns a bounded
+    queue; a slow client loses notifications rather than blocking others,
+    and can catch up from the inbox with Last-Event-ID.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def subscribe(self, user_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue):
+        queues = self._subscribers.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[user_id]
+
+    def deliver(self, user_id: str, payload: dict):
+        """Hand a notification to this process's subscribers"""
+        for queue in self._subscribers.get(user_id, ()):
+            try:
+                queue.put_nowait(payload)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                self.dropped += 1
+
+    async def publish(self, user_id: str, payload: dict):
+        """Fan a notification out to every subscriber of user_id"""
+        self.published += 1
+        self.deliver(user_id, payload)
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            "notification_broker_subscribers": sum(len(q) for q in self._subscribers.values()),
+            "notification_broker_published_total": self.published,
+            "notification_broker_delivered_total": self.delivered,
+            "notification_broker_dropped_total": self.dropped,
+        }
+
+
+class KafkaBroker(InMemoryBroker):
+    """Fans notifications out across replicas through a Kafka topic
+
+    Every replica consumes the topic in its own consumer group (starting at
+    the latest offset) and delivers to its local subscribers, including
+    the replica that published.
+    """
+
+    def __init__(self, queue_size: int = 100, group_id: Optional[str] = None):
+        super().__init__(queue_size)
+        self.group_id = group_id or f"notifications-{socket.gethostname()}"
+
+    @staticmethod
+    def _kafka():
+        try:
+            from kafka_service import kafka_service
+        except ImportError:
+            from .kafka_service import kafka_service
+        return kafka_service
+
+    async def publish(self, user_id: str, payload: dict):
+        self.published += 1
+        await self._kafka().publish_async(NOTIFICATIONS_TOPIC, payload, key=user_id)
+
+    async def _on_message(self, payload: dict):
+        self.deliver(payload["user_id"], payload)
+
+    async def start(self):
+        self._kafka().consume_messages(
+            NOTIFICATIONS_TOPIC,
+            self._on_message,
+            group_id=self.group_id,
+            auto_offset_reset="latest"
+        )
+
+    async def stop(self):
+        await self._kafka().disconnect_consumer(NOTIFICATIONS_TOPIC)
+
+
+def _counter_delta(user_id: str, delta: int):
+    """Upsert adding delta to a user's unread counter"""
+    stmt = dialect_insert(NotificationCounter).values(user_id=user_id, unread=max(delta, 0))
+    return stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={"unread": NotificationCounter.unread + delta}
+    )
+
+
+def to_payload(notification: Notification) -> dict:
+    """Broker/SSE payload for a notification"""
+    payload = NotificationRead.model_validate(notification).model_dump(mode="json")
+    payload["user_id"] = notification.user_id
+    return payload
+
+
+class NotificationInbox:
+    """Stores notifications and publishes them to the broker"""
+
+    def __init__(self, broker: InMemoryBroker):
+        self.broker = broker
+
+    async def create(
+        self,
+        session: AsyncSession,
+        user_id: str,
+        message: str,
+        task_id: Optional[int] = None,
+        notification_type: str = "info"
+    ) -> Notification:
+        """Store a notification, bump the unread counter, push it to clients"""
+        notification = Notification(
+            user_id=user_id,
+            message=message,
+            task_id=task_id,
+            type=notification_type
+        )
+        session.add(notification)
+        await session.flush()
+        await session.exec(_counter_delta(user_id, 1))
+        await session.commit()
+
+        await self.broker.publish(user_id, to_payload(notification))
+        return notification
+
+    async def unread_count(self, session: AsyncSession, user_id: str) -> int:
+        counter = await session.get(NotificationCounter, user_id, populate_existing=True)
+        return counter.unread if counter else 0
+
+    async def list_page(
+        self,
+        session: AsyncSession,
+        user_id: str,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        unread_only: bool = False
+    ) -> Tuple[List[Notification], Optional[str]]:
+        """One page of notifications, newest first
+
+        Raises:
+            ValueError: if the cursor is malformed
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        query = select(Notification).where(Notification.user_id == user_id)
+        if unread_only:
+            query = query.where(Notification.read_at == None)
+        if cursor:
+            try:
+                before_id = int(cursor)
+            except ValueError:
+                raise ValueError("Invalid cursor")
+            query = query.where(Notification.id < before_id)
+
+        rows = list((await session.exec(
+            query.order_by(Notification.id.desc()).limit(limit + 1)
+        )).all())
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = str(rows[-1].id)
+        return rows, next_cursor
+
+    async def newest_id(self, session: AsyncSession, user_id: str) -> int:
+        """Id of the user's newest notification, 0 if there is none"""
+        newest = (await session.exec(
+            select(Notification.id)
+            .where(Notification.user_id == user_id)
+            .order_by(Notification.id.desc())
+            .limit(1)
+        )).first()
+        return newest or 0
+
+    async def list_after(
+        self,
+        session: AsyncSession,
+        user_id: str,
+        after_id: int,
+        limit: int = MAX_PAGE_SIZE
+    ) -> List[Notification]:
+        """Notifications newer than after_id, oldest first (for catch-up)"""
+        return list((await session.exec(
+            select(Notification)
+            .where(Notification.user_id == user_id, Notification.id > after_id)
+            .order_by(Notification.id)
+            .limit(limit)
+        )).all())
+
+    async def mark_read(
+        self,
+        session: AsyncSession,
+        user_id: str,
+        ids: Optional[List[int]] = None
+    ) -> int:
+        """Mark notifications (all when ids is None) read; returns unread count"""
+        stmt = (
+            update(Notification)
+            .where(Notification.user_id == user_id, Notification.read_at == None)
+            .values(read_at=datetime.utcnow())
+        )
+        if ids is not None:
+            stmt = stmt.where(Notification.id.in_(ids))
+
+        marked = (await session.exec(stmt)).rowcount
+        if marked:
+            await session.exec(_counter_delta(user_id, -marked))
+        await session.commit()
+        return await self.unread_count(session, user_id)
+
+
+def _make_broker() -> InMemoryBroker:
+    if os.getenv("NOTIFICATION_BROKER", "memory").lower() == "kafka":
+        return KafkaBroker()
+    return InMemoryBroker()
+
+
+# Global inbox instance
+notification_inbox = NotificationInbox(_make_broker())
+metrics_registry.register("notification_broker", notification_inbox.broker.metrics)
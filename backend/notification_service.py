@@ -4,42 +4,204 @@ Handles sending reminders and notifications to users
 """
 
 import asyncio
+import os
+import queue
 import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional, Set, Tuple
 import logging
 
+try:
+    from database import async_session_maker
+    from metrics import metrics_registry
+    from notification_inbox import notification_inbox
+except ImportError:
+    from .database import async_session_maker
+    from .metrics import metrics_registry
+    from .notification_inbox import notification_inbox
+
 logger = logging.getLogger(__name__)
 
+# (task_title, due_at, task_id)
+Reminder = Tuple[str, datetime, int]
+
+
+class QueuedEmail:
+    """An email waiting in the delivery queue
+
+    Reminder emails keep their reminders so several for one recipient
+    can be coalesced into a digest before sending.
+    """
+
+    def __init__(
+        self,
+        recipient: str,
+        subject: str,
+        body: str,
+        reminders: Optional[List[Reminder]] = None
+    ):
+        self.recipient = recipient
+        self.subject = subject
+        self.body = body
+        self.reminders = reminders or []
+        self.attempts = 0
+
+
+class SMTPConnectionPool:
+    """Thread-safe pool of logged-in SMTP connections
+
+    Connections are reused across messages, so STARTTLS and login happen
+    once per connection instead of once per email. Idle connections older
+    than ``max_idle_seconds`` are closed rather than reused, since servers
+    drop idle sessions.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = True,
+        size: int = 4,
+        timeout: float = 30.0,
+        max_idle_seconds: float = 60.0
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.size = size
+        self.timeout = timeout
+        self.max_idle_seconds = max_idle_seconds
+
+        self._idle: "queue.LifoQueue[Tuple[smtplib.SMTP, float]]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self.opened = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            server.starttls()
+        if self.username and self.password:
+            server.login(self.username, self.password)
+        self.opened += 1
+        return server
+
+    @staticmethod
+    def _discard(server: smtplib.SMTP):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _checkout(self) -> smtplib.SMTP:
+        while True:
+            try:
+                server, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if time.monotonic() - last_used < self.max_idle_seconds:
+                return server
+            self._discard(server)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; it is discarded if the block raises"""
+        self._slots.acquire()
+        server = None
+        try:
+            server = self._checkout()
+            yield server
+        except Exception:
+            if server is not None:
+                self._discard(server)
+                server = None
+            raise
+        finally:
+            if server is not None:
+                self._idle.put((server, time.monotonic()))
+            self._slots.release()
+
+    def close(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(server)
+
 
 class NotificationService:
-    """Service for sending notifications"""
+    """Service for sending notifications
+
+    Emails go through a queue: a dispatcher collects up to ``batch_size``
+    messages within ``batch_window_seconds``, merges reminders for the same
+    recipient into one digest, and sends the batch over pooled SMTP
+    connections on worker threads. Failed messages are retried with
+    exponential backoff.
+    """
 
     def __init__(
         self,
         smtp_server: str = "smtp.gmail.com",
         smtp_port: int = 587,
         sender_email: Optional[str] = None,
-        sender_password: Optional[str] = None
+        sender_password: Optional[str] = None,
+        use_tls: bool = True,
+        pool_size: int = 4,
+        batch_size: int = 100,
+        batch_window_seconds: float = 2.0,
+        max_retries: int = 5,
+        retry_backoff_seconds: float = 1.0
     ):
         self.smtp_server = smtp_server
         self.smtp_port = smtp_port
         self.sender_email = sender_email
         self.sender_password = sender_password
+        self.use_tls = use_tls
 
-    async def send_reminder_email(
-        self,
-        recipient_email: str,
-        task_title: str,
-        due_at: datetime,
-        task_id: int
-    ) -> bool:
-        """Send task reminder email"""
-        try:
-            subject = f"Task Reminder: {task_title}"
-            body = f"""
+        self.pool = SMTPConnectionPool(
+            smtp_server,
+            smtp_port,
+            username=sender_email,
+            password=sender_password,
+            use_tls=use_tls,
+            size=pool_size
+        )
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="smtp")
+
+        self.batch_size = batch_size
+        self.batch_window_seconds = batch_window_seconds
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._dispatch_task: Optional[asyncio.Task] = None
+        self._retry_tasks: Set[asyncio.Task] = set()
+
+        self.queued = 0
+        self.sent = 0
+        self.digests = 0
+        self.coalesced = 0
+        self.retried = 0
+        self.failed = 0
+
+    @property
+    def email_enabled(self) -> bool:
+        # A local SMTP stand-in needs neither TLS nor a password
+        return bool(self.sender_email and (self.sender_password or not self.use_tls))
+
+    @staticmethod
+    def _reminder_body(task_title: str, due_at: datetime, task_id: int) -> str:
+        return f"""
             <html>
                 <body>
                     <h2>Task Reminder</h2>
@@ -56,13 +218,45 @@ class NotificationService:
             </html>
             """
 
-            if self.sender_email and self.sender_password:
-                # Send actual email
-                await self._send_smtp_email(
+    @staticmethod
+    def _digest_body(reminders: List[Reminder]) -> str:
+        items = "\n".join(
+            f'<li><a href="https://todo-app.local/tasks/{task_id}">{task_title}</a>'
+            f" &mdash; due {due_at.strftime('%Y-%m-%d %H:%M')}</li>"
+            for task_title, due_at, task_id in sorted(reminders, key=lambda r: r[1])
+        )
+        return f"""
+            <html>
+                <body>
+                    <h2>Task Reminders</h2>
+                    <p>You have {len(reminders)} tasks coming up:</p>
+                    <ul>
+                    {items}
+                    </ul>
+                    <hr>
+                    <p>From: Todo Chatbot App</p>
+                </body>
+            </html>
+            """
+
+    async def send_reminder_email(
+        self,
+        recipient_email: str,
+        task_title: str,
+        due_at: datetime,
+        task_id: int
+    ) -> bool:
+        """Queue a task reminder email (may be merged into a digest)"""
+        try:
+            subject = f"Task Reminder: {task_title}"
+
+            if self.email_enabled:
+                await self.enqueue_email(QueuedEmail(
                     recipient_email,
                     subject,
-                    body
-                )
+                    self._reminder_body(task_title, due_at, task_id),
+                    reminders=[(task_title, due_at, task_id)]
+                ))
             else:
                 # Log notification for testing
                 logger.info(f"📧 [NOTIFICATION] Email to {recipient_email}: {subject}")
@@ -94,51 +288,200 @@ class NotificationService:
         task_id: Optional[int] = None,
         notification_type: str = "info"
     ) -> bool:
-        """Send in-app notification"""
+        """Store an in-app notification and push it to connected clients"""
         try:
-            notification = {
-                "user_id": user_id,
-                "message": message,
-                "task_id": task_id,
-                "type": notification_type,
-                "timestamp": datetime.utcnow().isoformat()
-            }
+            async with async_session_maker() as session:
+                await notification_inbox.create(
+                    session,
+                    user_id,
+                    message,
+                    task_id=task_id,
+                    notification_type=notification_type
+                )
             logger.info(f"💬 [IN-APP] {user_id}: {message}")
-            # Store in database or cache
             return True
         except Exception as e:
             logger.error(f"❌ Error sending in-app notification: {e}")
             return False
 
+    # Delivery pipeline
+
+    async def enqueue_email(self, email: QueuedEmail):
+        """Queue an email for batched delivery"""
+        self.start()
+        await self._queue.put(email)
+        self.queued += 1
+
+    def _coalesce(self, batch: List[QueuedEmail]) -> List[QueuedEmail]:
+        """Merge reminders addressed to the same recipient into one digest"""
+        emails: List[QueuedEmail] = []
+        reminders_by_recipient: Dict[str, List[QueuedEmail]] = {}
+        for email in batch:
+            if email.reminders:
+                reminders_by_recipient.setdefault(email.recipient, []).append(email)
+            else:
+                emails.append(email)
+
+        for recipient, group in reminders_by_recipient.items():
+            if len(group) == 1:
+                emails.append(group[0])
+                continue
+            reminders = [reminder for email in group for reminder in email.reminders]
+            digest = QueuedEmail(
+                recipient,
+                f"Task Reminders: {len(reminders)} tasks coming up",
+                self._digest_body(reminders),
+                reminders=reminders
+            )
+            digest.attempts = max(email.attempts for email in group)
+            emails.append(digest)
+            self.digests += 1
+            self.coalesced += len(group)
+        return emails
+
+    def _build_message(self, email: QueuedEmail) -> str:
+        message = MIMEMultipart("alternative")
+        message["Subject"] = email.subject
+        message["From"] = self.sender_email
+        message["To"] = email.recipient
+        message.attach(MIMEText(email.body, "html"))
+        return message.as_string()
+
+    def _deliver_chunk(self, emails: List[QueuedEmail]) -> List[QueuedEmail]:
+        """Runs on an SMTP worker thread: send over one pooled connection
+
+        Returns the emails that were not sent.
+        """
+        failed: List[QueuedEmail] = []
+        index = 0
+        try:
+            with self.pool.connection() as server:
+                for index, email in enumerate(emails):
+                    try:
+                        server.sendmail(self.sender_email, email.recipient, self._build_message(email))
+                    except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError) as e:
+                        # Rejected message; the connection is still usable
+                        logger.error(f"❌ SMTP rejected email to {email.recipient}: {e}")
+                        failed.append(email)
+                index = len(emails)
+        except Exception as e:
+            logger.error(f"❌ SMTP error: {e}")
+            failed.extend(emails[index:])
+        return failed
+
+    async def _deliver(self, emails: List[QueuedEmail]):
+        loop = asyncio.get_running_loop()
+        chunks = [chunk for chunk in (emails[i::self.pool.size] for i in range(self.pool.size)) if chunk]
+        results = await asyncio.gather(
+            *(loop.run_in_executor(self._executor, self._deliver_chunk, chunk) for chunk in chunks)
+        )
+
+        failed = [email for chunk_failed in results for email in chunk_failed]
+        self.sent += len(emails) - len(failed)
+        for email in failed:
+            email.attempts += 1
+            if email.attempts > self.max_retries:
+                self.failed += 1
+                logger.error(f"❌ Giving up on email to {email.recipient} after {email.attempts} attempts")
+                continue
+            self.retried += 1
+            task = asyncio.create_task(self._retry_later(email))
+            self._retry_tasks.add(task)
+            task.add_done_callback(self._retry_tasks.discard)
+
+    async def _retry_later(self, email: QueuedEmail):
+        await asyncio.sleep(self.retry_backoff_seconds * 2 ** (email.attempts - 1))
+        await self._queue.put(email)
+
+    async def _dispatch(self):
+        """Collect a batch within the batch window and deliver it"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window_seconds
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._deliver(self._coalesce(batch))
+            except Exception as e:
+                logger.error(f"❌ Error delivering email batch: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def start(self):
+        """Create the queue and start the dispatcher on the running event loop"""
+        if self._dispatch_task is None or self._dispatch_task.done():
+            self._queue = asyncio.Queue()
+            self._dispatch_task = asyncio.create_task(self._dispatch())
+
+    async def flush(self):
+        """Wait until every queued email, including retries, is settled"""
+        if self._queue is None:
+            return
+        while True:
+            await self._queue.join()
+            if not self._retry_tasks:
+                return
+            await asyncio.gather(*list(self._retry_tasks))
+
+    async def stop(self, timeout: float = 30.0):
+        """Deliver what is queued, then close the SMTP connections"""
+        if self._dispatch_task is None:
+            return
+        try:
+            await asyncio.wait_for(self.flush(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Email queue not drained, {self._queue.qsize()} emails lost")
+        for task in list(self._retry_tasks):
+            task.cancel()
+        self._dispatch_task.cancel()
+        self._dispatch_task = None
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self.pool.close)
+
     async def _send_smtp_email(
         self,
         recipient_email: str,
         subject: str,
         body: str
     ):
-        """Send email via SMTP"""
-        try:
-            message = MIMEMultipart("alternative")
-            message["Subject"] = subject
-            message["From"] = self.sender_email
-            message["To"] = recipient_email
-
-            part = MIMEText(body, "html")
-            message.attach(part)
-
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.sender_email, self.sender_password)
-                server.sendmail(
-                    self.sender_email,
-                    recipient_email,
-                    message.as_string()
-                )
-            logger.info(f"✅ Email sent to {recipient_email}")
-        except Exception as e:
-            logger.error(f"❌ SMTP error: {e}")
-            raise
+        """Send one email immediately over a pooled connection"""
+        email = QueuedEmail(recipient_email, subject, body)
+        loop = asyncio.get_running_loop()
+        if await loop.run_in_executor(self._executor, self._deliver_chunk, [email]):
+            raise smtplib.SMTPException(f"Email to {recipient_email} was not sent")
+        self.sent += 1
+        logger.info(f"✅ Email sent to {recipient_email}")
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            "notification_emails_queued_total": self.queued,
+            "notification_emails_sent_total": self.sent,
+            "notification_digests_total": self.digests,
+            "notification_reminders_coalesced_total": self.coalesced,
+            "notification_emails_retried_total": self.retried,
+            "notification_emails_failed_total": self.failed,
+            "notification_smtp_connections_opened_total": self.pool.opened,
+            "notification_email_queue_depth": self._queue.qsize() if self._queue else 0,
+        }
 
 
 # Global notification service
-notification_service = NotificationService()
+notification_service = NotificationService(
+    smtp_server=os.getenv("SMTP_SERVER", "smtp.gmail.com"),
+    smtp_port=int(os.getenv("SMTP_PORT", "587")),
+    sender_email=os.getenv("SENDER_EMAIL"),
+    sender_password=os.getenv("SENDER_PASSWORD"),
+    use_tls=os.getenv("SMTP_STARTTLS", "true").lower() == "true",
+    pool_size=int(os.getenv("SMTP_POOL_SIZE", "4")),
+    batch_size=int(os.getenv("NOTIFICATION_BATCH_SIZE", "100")),
+    batch_window_seconds=float(os.getenv("NOTIFICATION_BATCH_WINDOW_SECONDS", "2")),
+)
+metrics_registry.register("notifications", notification_service.metrics)
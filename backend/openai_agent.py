@@ -7,16 +7,41 @@ This module handles:
 - Tool execution and response generation
 """
 
+import asyncio
 import os
 import json
-from typing import List, Dict, Any, Tuple, Optional
-from openai import OpenAI
+import re
+from typing import AsyncIterator, List, Dict, Any, Set, Tuple, Optional
+import httpx
+from openai import AsyncOpenAI
 from mcp_tools import get_mcp_tool_schemas, execute_tool
+from response_cache import response_cache
+from intent_engine import IntentEngine, IntentRule
+from title_index import title_index
 
 # Initialize OpenAI client (with fallback for missing API key)
 api_key = os.getenv("OPENAI_API_KEY", "").strip()
+# Point at any OpenAI-compatible server (e.g. a local fake for tests)
+base_url = os.getenv("OPENAI_BASE_URL") or None
+# One pooled async client per process: completions never block the event loop
+# and concurrent chats reuse keep-alive connections
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "30"))
+MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
 if api_key and not api_key.startswith("sk-your"):
-    client = OpenAI(api_key=api_key)
+    client = AsyncOpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        timeout=httpx.Timeout(REQUEST_TIMEOUT_SECONDS, connect=5.0),
+        max_retries=MAX_RETRIES,
+        http_client=httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=min(MAX_CONNECTIONS, 20),
+                keepalive_expiry=30.0
+            )
+        )
+    )
     OPENAI_AVAILABLE = True
 else:
     client = None
@@ -30,27 +55,54 @@ SYSTEM_PROMPT = """You are a helpful task management assistant. Your role is to
 You have access to these tools:
 - add_task: Create new tasks
 - list_tasks: Show user's tasks with optional filtering
+- search_tasks: Find tasks by words in their title, description or tags
 - complete_task: Mark tasks as done or reopen them
 - update_task: Modify existing tasks
 - delete_task: Remove tasks
+- batch_tasks: Create, update, complete or delete several tasks in one call
 
 Guidelines:
 1. Be conversational and friendly
 2. When listing tasks, format them clearly with numbers
 3. After completing an action, confirm what you did
-4. If a task ID is needed and not provided, first list tasks to get the ID
+4. If a task ID is needed and not provided, search for the task by name (or list tasks) to get the ID
 5. Ask for clarification if the user's intent is unclear
 6. Keep responses concise but helpful
 
 Remember: Each user has their own isolated task list. Never mention other users' data."""
 
 
+# Fallback (no API key) intents, in priority order
+TITLE_PREFIXES = ["add ", "create ", "remember to ", "remember ", "buy ", "i need to ", "i have to ", "do ", "can you "]
+TITLE_SLOT = {"title": "^(?:" + "|".join(map(re.escape, TITLE_PREFIXES)) + ")(.*)"}
+FALLBACK_INTENTS = IntentEngine([
+    IntentRule("stats", ["how many", "statistics", "stats", "analytics", "progress", "summary"]),
+    IntentRule("list", ["list", "show", "what", "need", "have to do", "tasks", "my tasks", "all tasks"]),
+    IntentRule(
+        "add",
+        ["add ", "create ", "remember ", "remember to", "buy ", "need to ", "have to "],
+        slots=TITLE_SLOT
+    ),
+    IntentRule("complete", ["done", "completed", "complete", "finish", "mark", "finished", "finished it", "did it"]),
+    # Checked after complete: "do" also matches "done"
+    IntentRule(
+        "add",
+        ["do", "can", "will", "should"],
+        guard=lambda text: len(text) > 10 and not text.startswith("how"),
+        slots=TITLE_SLOT
+    ),
+    IntentRule("greeting", ["hello", "hi", "hey"]),
+    IntentRule("help", ["help"]),
+])
+
+
 class OpenAIAgent:
     """OpenAI Agents SDK-powered chatbot for task management with fallback support."""
 
     def __init__(self):
         """Initialize the agent with tools."""
         self.client = client
+        self.cache = response_cache
         self.model = MODEL
         self.tools = get_mcp_tool_schemas()
         self.has_openai = OPENAI_AVAILABLE
@@ -58,7 +110,7 @@ class OpenAIAgent:
         # Learning patterns (learned from user messages)
         self.learned_patterns = {}
 
-    def process_message(
+    async def process_message(
         self,
         user_message: str,
         user_id: str,
@@ -74,24 +126,8 @@ class OpenAIAgent:
         Returns:
             Tuple of (response_text, tool_used, action_taken)
         """
-        if conversation_history is None:
-            conversation_history = []
-
-        # Build messages array for OpenAI
-        messages = [{"role": "system", "content": SYSTEM_PROMPT}]
-
-        # Add conversation history (last 10 messages)
-        for msg in conversation_history[-10:]:
-            messages.append({
-                "role": msg["role"],
-                "content": msg["content"]
-            })
-
-        # Add current user message
-        messages.append({
-            "role": "user",
-            "content": user_message
-        })
+        # System prompt, budgeted history, current user message
+        messages = self._build_messages(user_message, conversation_history)
 
         # Track tool usage
         tool_used = None
@@ -99,8 +135,15 @@ class OpenAIAgent:
 
         # Use OpenAI API if available, otherwise use fallback
         if self.has_openai and self.client:
+            # Repeated read-only turns are answered without calling the model
+            has_history = bool(conversation_history)
+            revision = await self.cache.revision(user_id)
+            cached = self.cache.get(user_id, user_message, revision, has_history)
+            if cached is not None:
+                return cached
+
             try:
-                response = self.client.chat.completions.create(
+                response = await self.client.chat.completions.create(
                     model=self.model,
                     messages=messages,
                     tools=self.tools,
@@ -111,56 +154,276 @@ class OpenAIAgent:
 
                 # Check if model wants to call tools
                 if response_message.tool_calls:
-                    # Execute each tool call
-                    tool_results = []
-
-                    for tool_call in response_message.tool_calls:
-                        function_name = tool_call.function.name
-                        function_args = json.loads(tool_call.function.arguments)
-
-                        # Execute the tool
-                        result = execute_tool(function_name, user_id, function_args)
-
-                        # Track for response
-                        tool_used = function_name
-                        action_taken = self._format_action(function_name, result)
-
-                        # Add tool result to messages for model
-                        tool_results.append({
-                            "tool_call_id": tool_call.id,
-                            "role": "tool",
-                            "name": function_name,
-                            "content": json.dumps(result)
-                        })
-
-                    # Add assistant's tool calls to messages
+                    calls = [
+                        {
+                            "id": tool_call.id,
+                            "name": tool_call.function.name,
+                            "arguments": tool_call.function.arguments
+                        }
+                        for tool_call in response_message.tool_calls
+                    ]
+                    results = await self._execute_tool_calls(user_id, calls)
+
+                    # Track the last call for the response
+                    tool_used = calls[-1]["name"]
+                    action_taken = self._format_action(tool_used, results[-1])
+
+                    # Add assistant's tool calls, then their results
                     messages.append(response_message)
-
-                    # Add tool results
-                    messages.extend(tool_results)
+                    messages.extend(self._tool_messages(calls, results))
 
                     # Get final response from model
-                    second_response = self.client.chat.completions.create(
+                    second_response = await self.client.chat.completions.create(
                         model=self.model,
                         messages=messages
                     )
 
                     final_response = second_response.choices[0].message.content
 
-                    return final_response, tool_used, action_taken
+                    reply = (final_response, tool_used, action_taken)
+                    if all(result.get("success") for result in results):
+                        await self.cache.put(
+                            user_id, user_message, revision, reply,
+                            tools_called=[call["name"] for call in calls],
+                            has_history=has_history
+                        )
+                    return reply
 
                 else:
                     # No tool calls, just return response
-                    return response_message.content, None, None
+                    reply = (response_message.content, None, None)
+                    await self.cache.put(user_id, user_message, revision, reply, has_history=has_history)
+                    return reply
 
             except Exception as e:
                 error_msg = f"Sorry, I encountered an error: {str(e)}"
                 return error_msg, None, None
         else:
             # Use fallback pattern-matching approach
-            return self._process_with_fallback(user_message, user_id)
+            return await self._process_with_fallback(user_message, user_id)
+
+    async def _execute_tool_calls(
+        self,
+        user_id: str,
+        calls: List[Dict[str, str]]
+    ) -> List[Dict[str, Any]]:
+        """Execute one turn's tool calls, concurrently where independent.
+
+        Each tool opens its own session, so calls can run side by side. Calls
+        naming the same task_id (directly or in batch operations) are chained
+        in the order the model issued them (e.g. update then complete);
+        everything else runs in parallel, so a multi-tool turn takes as long
+        as its slowest chain.
+
+        Returns:
+            Tool results, in the order of calls
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(calls)
+
+        async def run_chain(indexes: List[int]):
+            for index in indexes:
+                call = calls[index]
+                try:
+                    arguments = json.loads(call["arguments"] or "{}")
+                except json.JSONDecodeError as e:
+                    results[index] = {"success": False, "error": f"Invalid arguments: {e}"}
+                    continue
+                results[index] = await execute_tool(call["name"], user_id, arguments)
+
+        # A call joins every chain holding one of its tasks; chains it links merge
+        chains: List[List[int]] = []
+        chain_of: Dict[str, int] = {}
+        for index, call in enumerate(calls):
+            task_ids = self._task_ids(call["arguments"])
+            joined = sorted({chain_of[task_id] for task_id in task_ids if task_id in chain_of})
+            if joined:
+                target = joined[0]
+                for other in joined[1:]:
+                    chains[target].extend(chains[other])
+                    chains[other] = []
+                    for task_id, chain in chain_of.items():
+                        if chain == other:
+                            chain_of[task_id] = target
+                chains[target].sort()
+                chains[target].append(index)
+            else:
+                target = len(chains)
+                chains.append([index])
+            for task_id in task_ids:
+                chain_of[task_id] = target
+
+        await asyncio.gather(*(run_chain(indexes) for indexes in chains if indexes))
+        return results
+
+    @staticmethod
+    def _task_ids(arguments: Optional[str]) -> Set[str]:
+        """Task ids a tool call's arguments refer to"""
+        try:
+            parsed = json.loads(arguments or "{}")
+        except json.JSONDecodeError:
+            return set()
+        if not isinstance(parsed, dict):
+            return set()
+        items = [parsed] + [op for op in parsed.get("operations") or [] if isinstance(op, dict)]
+        return {str(item["task_id"]) for item in items if item.get("task_id") is not None}
+
+    @staticmethod
+    def _tool_messages(
+        calls: List[Dict[str, str]],
+        results: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        return [
+            {
+                "tool_call_id": call["id"],
+                "role": "tool",
+                "name": call["name"],
+                "content": json.dumps(result)
+            }
+            for call, result in zip(calls, results)
+        ]
+
+    async def aclose(self):
+        """Close pooled connections to the OpenAI API"""
+        if self.client:
+            await self.client.close()
+
+    def _build_messages(
+        self,
+        user_message: str,
+        conversation_history: Optional[List[Dict[str, str]]]
+    ) -> List[Dict[str, Any]]:
+        messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+        # History arrives already fitted to the token budget (see chat_history.py)
+        for msg in conversation_history or []:
+            messages.append({"role": msg["role"], "content": msg["content"]})
+        messages.append({"role": "user", "content": user_message})
+        return messages
 
-    def _process_with_fallback(self, user_message: str, user_id: str) -> Tuple[str, Optional[str], Optional[str]]:
+    async def stream_message(
+        self,
+        user_message: str,
+        user_id: str,
+        conversation_history: List[Dict[str, str]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Process a user message, yielding events as the model produces them.
+
+        Events are dicts with a "type":
+        - "token": {"content"} - a piece of the assistant's reply
+        - "tool_call": {"name", "arguments"} - the model asked for a tool
+        - "tool_result": {"name", "success", "action"} - the tool finished
+        - "done": {"response", "tool_used", "action_taken"} - always last
+
+        Args:
+            user_message: The user's message
+            user_id: User ID for tool execution
+            conversation_history: Previous messages (optional)
+        """
+        if not (self.has_openai and self.client):
+            response, tool_used, action_taken = await self._process_with_fallback(user_message, user_id)
+            yield {"type": "token", "content": response}
+            yield {"type": "done", "response": response, "tool_used": tool_used, "action_taken": action_taken}
+            return
+
+        has_history = bool(conversation_history)
+        revision = await self.cache.revision(user_id)
+        cached = self.cache.get(user_id, user_message, revision, has_history)
+        if cached is not None:
+            response, tool_used, action_taken = cached
+            yield {"type": "token", "content": response}
+            yield {"type": "done", "response": response, "tool_used": tool_used, "action_taken": action_taken}
+            return
+
+        messages = self._build_messages(user_message, conversation_history)
+        tool_used = None
+        action_taken = None
+        parts: List[str] = []
+        tools_called: List[str] = []
+        cacheable = True
+
+        try:
+            stream = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                tools=self.tools,
+                tool_choice="auto",
+                stream=True
+            )
+
+            # Tool calls arrive as fragments keyed by index
+            tool_calls: Dict[int, Dict[str, str]] = {}
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    parts.append(delta.content)
+                    yield {"type": "token", "content": delta.content}
+                for fragment in delta.tool_calls or []:
+                    call = tool_calls.setdefault(fragment.index, {"id": "", "name": "", "arguments": ""})
+                    if fragment.id:
+                        call["id"] = fragment.id
+                    if fragment.function and fragment.function.name:
+                        call["name"] += fragment.function.name
+                    if fragment.function and fragment.function.arguments:
+                        call["arguments"] += fragment.function.arguments
+
+            if tool_calls:
+                calls = [tool_calls[index] for index in sorted(tool_calls)]
+                messages.append({
+                    "role": "assistant",
+                    "content": "".join(parts) or None,
+                    "tool_calls": [
+                        {
+                            "id": call["id"],
+                            "type": "function",
+                            "function": {"name": call["name"], "arguments": call["arguments"]}
+                        }
+                        for call in calls
+                    ]
+                })
+
+                for call in calls:
+                    yield {"type": "tool_call", "name": call["name"], "arguments": call["arguments"]}
+                results = await self._execute_tool_calls(user_id, calls)
+                for call, result in zip(calls, results):
+                    tools_called.append(call["name"])
+                    cacheable = cacheable and bool(result.get("success"))
+                    tool_used = call["name"]
+                    action_taken = self._format_action(call["name"], result)
+                    yield {
+                        "type": "tool_result",
+                        "name": call["name"],
+                        "success": bool(result.get("success")),
+                        "action": action_taken
+                    }
+                messages.extend(self._tool_messages(calls, results))
+
+                # Stream the final answer
+                parts = []
+                second_stream = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    stream=True
+                )
+                async for chunk in second_stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        content = chunk.choices[0].delta.content
+                        parts.append(content)
+                        yield {"type": "token", "content": content}
+
+            response = "".join(parts)
+            if cacheable:
+                await self.cache.put(
+                    user_id, user_message, revision, (response, tool_used, action_taken),
+                    tools_called=tools_called, has_history=has_history
+                )
+        except Exception as e:
+            response = f"Sorry, I encountered an error: {str(e)}"
+            yield {"type": "token", "content": response}
+
+        yield {"type": "done", "response": response, "tool_used": tool_used, "action_taken": action_taken}
+
+    async def _process_with_fallback(self, user_message: str, user_id: str) -> Tuple[str, Optional[str], Optional[str]]:
         """Process message using intelligent pattern matching when OpenAI is not available.
 
         This implements a learning chatbot that can handle:
@@ -172,26 +435,30 @@ class OpenAIAgent:
         - Contextual understanding (learns from user behavior)
         - Statistics and insights about tasks
         """
-        message_lower = user_message.lower().strip()
+        match = FALLBACK_INTENTS.classify(user_message)
+        intent = match.intent
         tool_used = None
         action_taken = None
         response = ""
 
         # Statistics about tasks (learns from data)
-        if any(word in message_lower for word in ["how many", "statistics", "stats", "analytics", "progress", "summary"]):
-            result = execute_tool("list_tasks", user_id, {})
+        if intent == "stats":
+            result = await execute_tool("list_tasks", user_id, {})
             if result.get("success"):
                 tasks = result.get("tasks", [])
                 completed = [t for t in tasks if t.get("completed")]
                 pending = [t for t in tasks if not t.get("completed")]
+                # Counts come from the summary; tasks is only the first page
+                summary = result["summary"]
+                total = summary["total"]
 
                 tool_used = "list_tasks"
-                action_taken = f"Analyzed {len(tasks)} tasks"
+                action_taken = f"Analyzed {total} tasks"
 
-                completion_rate = (len(completed) / len(tasks) * 100) if tasks else 0
+                completion_rate = (summary["completed"] / total * 100) if total else 0
                 response = f"📊 **Your Progress:**\n\n"
-                response += f"✅ Completed: {len(completed)}/{len(tasks)}\n"
-                response += f"⏳ Pending: {len(pending)}/{len(tasks)}\n"
+                response += f"✅ Completed: {summary['completed']}/{total}\n"
+                response += f"⏳ Pending: {summary['pending']}/{total}\n"
                 response += f"🎯 Completion Rate: {completion_rate:.0f}%\n\n"
 
                 if completed:
@@ -207,8 +474,8 @@ class OpenAIAgent:
                 response = "Sorry, I couldn't analyze your tasks. Please try again."
 
         # List tasks
-        elif any(word in message_lower for word in ["list", "show", "what", "need", "have to do", "tasks", "my tasks", "all tasks"]):
-            result = execute_tool("list_tasks", user_id, {})
+        elif intent == "list":
+            result = await execute_tool("list_tasks", user_id, {})
             if result.get("success"):
                 tool_used = "list_tasks"
                 tasks = result.get("tasks", [])
@@ -232,19 +499,13 @@ class OpenAIAgent:
                 response = "Sorry, I couldn't fetch your tasks. Please try again."
 
         # Create task (patterns like "add", "create", "remember", "buy", "do")
-        elif any(word in message_lower for word in ["add ", "create ", "remember ", "remember to", "buy ", "need to ", "have to "]) or \
-             (any(word in message_lower for word in ["do", "can", "will", "should"]) and \
-              len(message_lower) > 10 and not message_lower.startswith("how")):
+        elif intent == "add":
 
             # Extract task title (everything after the action word)
-            task_title = user_message
-            for action_word in ["add ", "create ", "remember to ", "remember ", "buy ", "i need to ", "i have to ", "do ", "can you "]:
-                if message_lower.startswith(action_word):
-                    task_title = user_message[len(action_word):].strip()
-                    break
+            task_title = match.slots["title"].strip() if "title" in match.slots else user_message
 
             if task_title and len(task_title) > 2:
-                result = execute_tool("add_task", user_id, {
+                result = await execute_tool("add_task", user_id, {
                     "title": task_title,
                     "description": ""
                 })
@@ -259,29 +520,33 @@ class OpenAIAgent:
                 response = "I didn't catch what task you want to add. Can you be more specific?"
 
         # Complete/toggle task
-        elif any(word in message_lower for word in ["done", "completed", "complete", "finish", "mark", "finished", "finished it", "did it"]):
-            # Try to get task ID from message or list tasks
-            result = execute_tool("list_tasks", user_id, {})
+        elif intent == "complete":
+            # Complete the task the user named, if any
+            matches = await title_index.resolve(user_id, user_message)
+            if matches:
+                task_id, task_title, _ = matches[0]
+                complete_result = await execute_tool("complete_task", user_id, {
+                    "task_id": task_id,
+                    "completed": True
+                })
+
+                if complete_result.get("success"):
+                    tool_used = "complete_task"
+                    action_taken = f"Marked task as complete"
+                    response = f"🎉 Awesome! I've marked '{task_title}' as done!"
+                else:
+                    title_index.forget(user_id, task_id)
+                    response = "Sorry, I couldn't mark the task as done."
+                return response, tool_used, action_taken
+
+            # Otherwise ask which one: never complete a guessed task
+            result = await execute_tool("list_tasks", user_id, {})
             if result.get("success") and result.get("tasks"):
-                tasks = result.get("tasks", [])
-                # Find incomplete tasks
-                incomplete = [t for t in tasks if not t.get("completed")]
+                incomplete = [t for t in result["tasks"] if not t.get("completed")]
 
                 if incomplete:
-                    # Complete the first incomplete task
-                    task_id = incomplete[0]["id"]
-                    complete_result = execute_tool("complete_task", user_id, {
-                        "task_id": task_id,
-                        "completed": True
-                    })
-
-                    if complete_result.get("success"):
-                        tool_used = "complete_task"
-                        action_taken = f"Marked task as complete"
-                        task_title = incomplete[0].get("title", "task")
-                        response = f"🎉 Awesome! I've marked '{task_title}' as done!"
-                    else:
-                        response = "Sorry, I couldn't mark the task as done."
+                    titles = "\n".join(f"• {t['title']}" for t in incomplete[:5])
+                    response = f"Which task did you finish? Tell me its name, for example:\n{titles}"
                 else:
                     response = "Great! You've completed all your tasks. No more tasks to mark as done!"
             else:
@@ -289,9 +554,9 @@ class OpenAIAgent:
 
         # Default response (learning from conversation)
         else:
-            if "hello" in message_lower or "hi" in message_lower or "hey" in message_lower:
+            if intent == "greeting":
                 response = "👋 Hi there! I'm your AI task assistant. I can help you:\n• ➕ Create tasks (just tell me what to do)\n• 📋 List your tasks\n• ✅ Mark tasks as done\n• 📊 View your progress\n• 🎯 Delete or update tasks\n\nWhat would you like to do?"
-            elif "help" in message_lower:
+            elif intent == "help":
                 response = """📋 **I can help you manage your tasks!** Here's what I can do:
 
 **Creating Tasks:**
@@ -342,6 +607,8 @@ Just tell me what you need! 😊"""
         elif tool_name == "list_tasks":
             count = result['summary']['total']
             return f"Listed {count} tasks"
+        elif tool_name == "search_tasks":
+            return f"Found {len(result['tasks'])} matching tasks"
         elif tool_name == "complete_task":
             status = "complete" if result['task']['completed'] else "incomplete"
             return f"Marked task as {status}"
@@ -349,6 +616,8 @@ Just tell me what you need! 😊"""
             return f"Updated task: {result['task']['title']}"
         elif tool_name == "delete_task":
             return result['message']
+        elif tool_name == "batch_tasks":
+            return f"Applied {result['succeeded']} of {len(result['results'])} task changes"
         else:
             return f"Executed {tool_name}"
 
@@ -357,7 +626,7 @@ Just tell me what you need! 😊"""
 agent = OpenAIAgent()
 
 
-def process_chat_message(
+async def process_chat_message(
     message: str,
     user_id: str,
     conversation_history: List[Dict[str, str]] = None
@@ -374,4 +643,13 @@ def process_chat_message(
     Returns:
         Tuple of (response, tool_used, action_taken)
     """
-    return agent.process_message(message, user_id, conversation_history)
+    return await agent.process_message(message, user_id, conversation_history)
+
+
+def stream_chat_message(
+    message: str,
+    user_id: str,
+    conversation_history: List[Dict[str, str]] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """Streaming counterpart of process_chat_message (see OpenAIAgent.stream_message)."""
+    return agent.stream_message(message, user_id, conversation_history)
@@ -0,0 +1,273 @@
+"""
+Transactional Outbox
+Task write paths add their TaskEvent to the outbox in the same DB
+transaction; OutboxRelay drains it to Kafka in batches (at-least-once).
+In-process listeners also receive each event once its transaction commits.
+Outbox rows are only written when OUTBOX_ENABLED (default: on when
+KAFKA_BOOTSTRAP_SERVERS is set), since nothing else would drain them.
+"""
+
+import asyncio
+import json
+import os
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from sqlalchemy import delete, event, update
+from sqlalchemy.orm import Session
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+import logging
+
+try:
+    from database import async_session_maker
+    from metrics import metrics_registry
+    from models.outbox import OutboxEvent
+    from models.task import Task, TaskEvent, TaskRead
+except ImportError:
+    from .database import async_session_maker
+    from .metrics import metrics_registry
+    from .models.outbox import OutboxEvent
+    from .models.task import Task, TaskEvent, TaskRead
+
+logger = logging.getLogger(__name__)
+
+TASK_EVENTS_TOPIC = "task-events"
+
+OUTBOX_ENABLED = os.getenv(
+    "OUTBOX_ENABLED", "true" if os.getenv("KAFKA_BOOTSTRAP_SERVERS") else "false"
+).lower() == "true"
+
+TaskListener = Callable[[dict], Awaitable[None]]
+_task_listeners: List[TaskListener] = []
+_listener_tasks: Set[asyncio.Task] = set()
+
+
+def add_task_listener(listener: TaskListener):
+    """Call listener(event) for every task event committed in this process"""
+    if listener not in _task_listeners:
+        _task_listeners.append(listener)
+
+
+def remove_task_listener(listener: TaskListener):
+    """Stop calling listener"""
+    if listener in _task_listeners:
+        _task_listeners.remove(listener)
+
+
+async def _run_listener(listener: TaskListener, task_event: dict):
+    try:
+        await listener(task_event)
+    except Exception as e:
+        logger.error(f"❌ Task listener {getattr(listener, '__qualname__', listener)} failed: {e}")
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_task_events(session):
+    task_events = session.info.pop("task_events", None)
+    if not task_events or not _task_listeners:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return  # Sync session outside the event loop (scripts, migrations)
+    for task_event in task_events:
+        for listener in list(_task_listeners):
+            task = loop.create_task(_run_listener(listener, task_event))
+            _listener_tasks.add(task)
+            task.add_done_callback(_listener_tasks.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_task_events(session):
+    session.info.pop("task_events", None)
+
+
+def record_task_event(
+    session: AsyncSession,
+    event_type: str,
+    task: Task
+) -> Optional[OutboxEvent]:
+    """Add a TaskEvent for ``task`` to the session's pending outbox rows
+
+    Must be called before the commit of the change itself; the task needs
+    an id, so flush first when recording a creation. Without OUTBOX_ENABLED
+    only in-process listeners get the event and None is returned.
+    """
+    task_event = TaskEvent(
+        event_type=event_type,
+        task_id=task.id,
+        user_id=task.user_id,
+        task_data=TaskRead.model_validate(task).model_dump(mode="json"),
+    )
+    session.info.setdefault("task_events", []).append(task_event.model_dump(mode="json"))
+    if not OUTBOX_ENABLED:
+        return None
+    row = OutboxEvent(
+        topic=TASK_EVENTS_TOPIC,
+        event_key=str(task.id),
+        event_type=event_type,
+        payload=task_event.model_dump_json(),
+    )
+    session.add(row)
+    return row
+
+
+class OutboxRelay:
+    """Relays committed outbox rows to Kafka
+
+    Rows are taken in id order and deleted only after the broker acks
+    them. Within a batch each key's rows are sent one round at a time, a
+    row only after the previous one of its key was acked; once a row
+    fails, the rest of its key waits for the next batch. Consumers may see
+    duplicates, never a lost or reordered event. A row that fails
+    ``max_attempts`` times is dead-lettered (failed_at set) so it cannot
+    stall the queue. Run exactly one relay: two would publish the same rows
+    concurrently and break the per-key order.
+    """
+
+    def __init__(
+        self,
+        session_maker=async_session_maker,
+        publisher=None,
+        batch_size: int = 500,
+        interval_seconds: float = 1.0,
+        max_attempts: int = 10
+    ):
+        self.session_maker = session_maker
+        self.publisher = publisher
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+        self.max_attempts = max_attempts
+        self._task: Optional[asyncio.Task] = None
+
+        self.relayed = 0
+        self.failed = 0
+        self.dead_lettered = 0
+        self.batches = 0
+        self.errors = 0
+
+    def _get_publisher(self):
+        if self.publisher is None:
+            try:
+                from kafka_service import kafka_service
+            except ImportError:
+                from .kafka_service import kafka_service
+            self.publisher = kafka_service
+        return self.publisher
+
+    async def run_once(self) -> int:
+        """Relay one batch; returns the number of rows acknowledged"""
+        # Short read: no row lock or transaction is held while the broker acks
+        async with self.session_maker() as session:
+            rows = (await session.exec(
+                select(OutboxEvent)
+                .where(OutboxEvent.failed_at == None)
+                .order_by(OutboxEvent.id)
+                .limit(self.batch_size)
+            )).all()
+        if not rows:
+            return 0
+
+        pending: Dict[Tuple[str, str], List[OutboxEvent]] = {}
+        for row in rows:
+            pending.setdefault((row.topic, row.event_key), []).append(row)
+
+        # One round per position within a key: keys go in parallel, each
+        # key's rows in order, and a failure holds back the rest of its key
+        publisher = self._get_publisher()
+        acked: List[int] = []
+        failed: List[OutboxEvent] = []
+        while pending:
+            heads = [queue[0] for queue in pending.values()]
+            results = await publisher.publish_and_wait(
+                [(row.topic, json.loads(row.payload), row.event_key) for row in heads]
+            )
+            for row, ok in zip(heads, results):
+                key = (row.topic, row.event_key)
+                if ok:
+                    acked.append(row.id)
+                    pending[key].pop(0)
+                    if pending[key]:
+                        continue
+                else:
+                    failed.append(row)
+                del pending[key]
+
+        retry = [row.id for row in failed if row.attempts + 1 < self.max_attempts]
+        dead = [row.id for row in failed if row.attempts + 1 >= self.max_attempts]
+        async with self.session_maker() as session:
+            async with session.begin():
+                if acked:
+                    await session.exec(delete(OutboxEvent).where(OutboxEvent.id.in_(acked)))
+                if retry:
+                    await session.exec(
+                        update(OutboxEvent)
+                        .where(OutboxEvent.id.in_(retry))
+                        .values(attempts=OutboxEvent.attempts + 1)
+                    )
+                if dead:
+                    await session.exec(
+                        update(OutboxEvent)
+                        .where(OutboxEvent.id.in_(dead))
+                        .values(attempts=OutboxEvent.attempts + 1, failed_at=datetime.utcnow())
+                    )
+        for row_id in dead:
+            logger.error(f"❌ Outbox event {row_id} dead-lettered after {self.max_attempts} attempts")
+
+        self.batches += 1
+        self.relayed += len(acked)
+        self.failed += len(failed)
+        self.dead_lettered += len(dead)
+        return len(acked)
+
+    async def _run_forever(self):
+        while True:
+            try:
+                relayed = await self.run_once()
+            except Exception as e:
+                self.errors += 1
+                relayed = 0
+                logger.error(f"❌ Outbox relay failed: {e}")
+            # Keep draining while there is a backlog
+            if relayed < self.batch_size:
+                await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        """Start relaying on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run_forever())
+            logger.info("✅ Outbox relay started")
+
+    async def stop(self):
+        """Stop relaying"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Outbox relay stopped")
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            "outbox_relayed_total": self.relayed,
+            "outbox_failed_total": self.failed,
+            "outbox_dead_lettered_total": self.dead_lettered,
+            "outbox_batches_total": self.batches,
+            "outbox_errors_total": self.errors,
+        }
+
+
+# Global relay instance
+outbox_relay = OutboxRelay(
+    batch_size=int(os.getenv("OUTBOX_BATCH_SIZE", "500")),
+    interval_seconds=float(os.getenv("OUTBOX_INTERVAL_SECONDS", "1")),
+    max_attempts=int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10")),
+)
+metrics_registry.register("outbox", outbox_relay.metrics)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(outbox_relay._run_forever())
@@ -0,0 +1,223 @@
+"""
+Recurrence Engine
+RRULE-style recurrence rules (FREQ, INTERVAL, BYDAY, COUNT, UNTIL) with
+lazy occurrence expansion.
+
+Occurrences are computed arithmetically from the anchor (the first
+occurrence), so "next N after T" jumps straight to the period containing
+T instead of stepping through every day in between.
+"""
+
+import calendar
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+WEEKDAYS = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+UNTIL_FORMAT = "%Y%m%dT%H%M%S"
+
+
+def add_months(dt: datetime, months: int, day: Optional[int] = None) -> datetime:
+    """Shift dt by whole months, clamping the day to the target month's length
+
+    Args:
+        dt: Source datetime
+        months: Months to add (may be negative)
+        day: Day of month to aim for (defaults to dt.day); e.g. 31 lands on
+             the last day of shorter months without drifting afterwards
+    """
+    month_index = dt.month - 1 + months
+    year = dt.year + month_index // 12
+    month = month_index % 12 + 1
+    last_day = calendar.monthrange(year, month)[1]
+    return dt.replace(year=year, month=month, day=min(day or dt.day, last_day))
+
+
+class RecurrenceRule:
+    """A parsed recurrence rule
+
+    Occurrences are grouped into periods (one day, week, month or year,
+    times INTERVAL). Period k of a non-BYDAY rule holds exactly one
+    occurrence; a weekly BYDAY rule holds one per listed weekday.
+    """
+
+    def __init__(
+        self,
+        freq: str,
+        interval: int = 1,
+        byday: Sequence[int] = (),
+        until: Optional[datetime] = None,
+        count: Optional[int] = None
+    ):
+        freq = freq.upper()
+        if freq not in FREQUENCIES:
+            raise ValueError(f"Unsupported FREQ: {freq}")
+        if interval < 1:
+            raise ValueError("INTERVAL must be >= 1")
+        if count is not None and count < 1:
+            raise ValueError("COUNT must be >= 1")
+        if byday and freq != "WEEKLY":
+            raise ValueError("BYDAY is only supported with FREQ=WEEKLY")
+
+        self.freq = freq
+        self.interval = interval
+        self.byday: Tuple[int, ...] = tuple(sorted(set(byday)))
+        self.until = until
+        self.count = count
+
+    @classmethod
+    def parse(cls, rule: str) -> "RecurrenceRule":
+        """Parse 'FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE;COUNT=10' (RRULE: prefix optional)
+
+        Raises:
+            ValueError: on unknown or malformed parts
+        """
+        if rule.upper().startswith("RRULE:"):
+            rule = rule[6:]
+
+        parts = {}
+        for part in filter(None, rule.strip().split(";")):
+            key, sep, value = part.partition("=")
+            if not sep:
+                raise ValueError(f"Malformed rule part: {part}")
+            parts[key.strip().upper()] = value.strip()
+
+        if "FREQ" not in parts:
+            raise ValueError("Rule must specify FREQ")
+
+        byday = []
+        for day in filter(None, parts.pop("BYDAY", "").upper().split(",")):
+            if day not in WEEKDAYS:
+                raise ValueError(f"Unsupported BYDAY value: {day}")
+            byday.append(WEEKDAYS.index(day))
+
+        until = None
+        if "UNTIL" in parts:
+            value = parts.pop("UNTIL").rstrip("Z")
+            until = datetime.strptime(value, UNTIL_FORMAT if "T" in value else "%Y%m%d")
+
+        freq = parts.pop("FREQ")
+        interval = int(parts.pop("INTERVAL", "1"))
+        count = int(parts.pop("COUNT")) if "COUNT" in parts else None
+        if parts:
+            raise ValueError(f"Unsupported rule parts: {', '.join(sorted(parts))}")
+        return cls(freq, interval=interval, byday=byday, until=until, count=count)
+
+    def to_string(self) -> str:
+        """Serialise back to RRULE text"""
+        parts = [f"FREQ={self.freq}"]
+        if self.interval != 1:
+            parts.append(f"INTERVAL={self.interval}")
+        if self.byday:
+            parts.append("BYDAY=" + ",".join(WEEKDAYS[d] for d in self.byday))
+        if self.count is not None:
+            parts.append(f"COUNT={self.count}")
+        if self.until is not None:
+            parts.append(f"UNTIL={self.until.strftime(UNTIL_FORMAT)}")
+        return ";".join(parts)
+
+    def __repr__(self):
+        return f"<RecurrenceRule({self.to_string()})>"
+
+    # Period arithmetic
+
+    def _week_start(self, dtstart: datetime) -> datetime:
+        return dtstart - timedelta(days=dtstart.weekday())
+
+    def _period(self, dtstart: datetime, k: int) -> List[datetime]:
+        """Occurrences in period k (before COUNT/UNTIL are applied)"""
+        if self.freq == "DAILY":
+            return [dtstart + timedelta(days=k * self.interval)]
+        if self.freq == "MONTHLY":
+            return [add_months(dtstart, k * self.interval, day=dtstart.day)]
+        if self.freq == "YEARLY":
+            return [add_months(dtstart, 12 * k * self.interval, day=dtstart.day)]
+
+        # WEEKLY
+        if not self.byday:
+            return [dtstart + timedelta(weeks=k * self.interval)]
+        week = self._week_start(dtstart) + timedelta(weeks=k * self.interval)
+        return [
+            dt for dt in (week + timedelta(days=d) for d in self.byday)
+            if dt >= dtstart
+        ]
+
+    def _skipped_in_first_week(self, dtstart: datetime) -> int:
+        """BYDAY slots of period 0 that fall before the anchor"""
+        return sum(1 for d in self.byday if d < dtstart.weekday())
+
+    def _first_index(self, dtstart: datetime, k: int) -> int:
+        """Ordinal (0-based, for COUNT) of the first occurrence in period k"""
+        if self.freq == "WEEKLY" and self.byday:
+            if k == 0:
+                return 0
+            return k * len(self.byday) - self._skipped_in_first_week(dtstart)
+        return k
+
+    def _period_at(self, dtstart: datetime, moment: datetime) -> int:
+        """Index of a period that starts no later than moment (never overshoots)"""
+        if moment <= dtstart:
+            return 0
+        if self.freq == "DAILY":
+            return (moment - dtstart) // timedelta(days=self.interval)
+        if self.freq == "WEEKLY":
+            days = (moment.date() - self._week_start(dtstart).date()).days
+            return days // (7 * self.interval)
+        if self.freq == "MONTHLY":
+            months = (moment.year - dtstart.year) * 12 + (moment.month - dtstart.month)
+            return months // self.interval
+        return (moment.year - dtstart.year) // self.interval
+
+    # Expansion
+
+    def occurrences(
+        self,
+        dtstart: datetime,
+        after: Optional[datetime] = None,
+        inclusive: bool = False
+    ) -> Iterator[datetime]:
+        """Lazily yield occurrences in order, starting at the anchor dtstart
+
+        Args:
+            dtstart: First occurrence of the series (anchor)
+            after: Only yield occurrences after this moment (optional)
+            inclusive: Also yield an occurrence exactly at ``after``
+        """
+        k = self._period_at(dtstart, after) if after else 0
+        index = self._first_index(dtstart, k)
+
+        while True:
+            for dt in self._period(dtstart, k):
+                if self.count is not None and index >= self.count:
+                    return
+                if self.until is not None and dt > self.until:
+                    return
+                index += 1
+                if after is not None and (dt < after or (dt == after and not inclusive)):
+                    continue
+                yield dt
+            k += 1
+
+    def next_after(self, dtstart: datetime, after: datetime) -> Optional[datetime]:
+        """First occurrence strictly after ``after``, or None if the series ended"""
+        return next(self.occurrences(dtstart, after), None)
+
+    def next_n(self, dtstart: datetime, after: datetime, n: int) -> List[datetime]:
+        """Up to n occurrences strictly after ``after``"""
+        return list(islice(self.occurrences(dtstart, after), n))
+
+    def between(
+        self,
+        dtstart: datetime,
+        start: datetime,
+        end: datetime,
+        limit: Optional[int] = None
+    ) -> List[datetime]:
+        """Occurrences in [start, end], at most ``limit`` of them"""
+        result = []
+        for dt in self.occurrences(dtstart, start, inclusive=True):
+            if dt > end or (limit is not None and len(result) >= limit):
+                break
+            result.append(dt)
+        return result
@@ -0,0 +1,230 @@
+"""
+Recurring Task Scheduler
+Materialises instances of recurring tasks whose next occurrence has passed.
+Runs in-process (FastAPI lifespan) or standalone: python recurring_scheduler.py
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import insert, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+import logging
+
+try:
+    from database import async_session_maker
+    from metrics import metrics_registry
+    from models.task import Task
+    from recurring_tasks import RecurringTaskService
+    from task_revisions import ensure_task_revisions, try_bump_task_revisions
+except ImportError:
+    from .database import async_session_maker
+    from .metrics import metrics_registry
+    from .models.task import Task
+    from .recurring_tasks import RecurringTaskService
+    from .task_revisions import ensure_task_revisions, try_bump_task_revisions
+
+logger = logging.getLogger(__name__)
+
+
+class RecurringTaskScheduler:
+    """Batch generator of recurring task instances
+
+    Each batch is one transaction: claim up to ``batch_size`` due parents
+    with FOR UPDATE SKIP LOCKED (so replicas never pick the same rows),
+    bump the task revisions of their users that no other transaction
+    holds, bulk-insert instances for the parents of those users and
+    bulk-update their next_occurrence. Neither lock is ever waited for, so
+    replicas and user writes (revision, then tasks) cannot block it or
+    deadlock with it; parents of busy users are left for a later batch.
+    """
+
+    def __init__(
+        self,
+        session_maker=async_session_maker,
+        batch_size: int = 200,
+        interval_seconds: float = 60.0,
+        max_catchup: int = 10,
+        max_batches_per_run: int = 50
+    ):
+        self.session_maker = session_maker
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+        self.max_catchup = max_catchup
+        self.max_batches_per_run = max_batches_per_run
+        self._task: Optional[asyncio.Task] = None
+
+        self.runs = 0
+        self.batches = 0
+        self.parents_processed = 0
+        self.instances_created = 0
+        self.errors = 0
+        self.last_run_seconds = 0.0
+        self.last_run_instances = 0
+
+    def _due_parents_query(self, now: datetime, *columns):
+        return (
+            select(*(columns or (Task,)))
+            .where(
+                Task.is_recurring == True,
+                Task.parent_task_id == None,
+                Task.next_occurrence != None,
+                Task.next_occurrence <= now
+            )
+            .order_by(Task.next_occurrence, Task.id)
+            .limit(self.batch_size)
+        )
+
+    def _expand(
+        self,
+        parent: Task,
+        now: datetime
+    ) -> Tuple[List[datetime], Optional[datetime]]:
+        """Occurrences to materialise (<= now) and the parent's new next_occurrence"""
+        rule = RecurringTaskService.rule_for_task(parent)
+        if rule is None:
+            return [], None
+
+        occurrences = []
+        anchor = RecurringTaskService.series_anchor(parent)
+        # Jumps straight to next_occurrence; cost is O(occurrences emitted)
+        for dt in rule.occurrences(anchor, after=parent.next_occurrence, inclusive=True):
+            if dt > now or len(occurrences) >= self.max_catchup:
+                return occurrences, dt
+            occurrences.append(dt)
+
+        # UNTIL / COUNT / end date reached: the series is finished
+        return occurrences, None
+
+    @staticmethod
+    def _instance_row(parent: Task, due: datetime, created_at: datetime, revision: int) -> Dict:
+        return {
+            "user_id": parent.user_id,
+            "title": parent.title,
+            "description": parent.description,
+            "priority": parent.priority,
+            "tags": parent.tags,
+            "due_date": due,
+            "reminder_at": None,  # Will be set by reminder service
+            "completed": False,
+            "created_at": created_at,
+            "is_recurring": True,
+            "recurrence_type": parent.recurrence_type,
+            "recurrence_rule": parent.recurrence_rule,
+            "recurrence_end_date": parent.recurrence_end_date,
+            "parent_task_id": parent.id,
+            "next_occurrence": None,
+            "updated_rev": revision,
+        }
+
+    async def _process_batch(self, session: AsyncSession, now: datetime) -> Tuple[int, int]:
+        """Process one batch in the session's transaction; returns (parents, instances)"""
+        # Peek (no locks) at whose parents are due: a missing revision row is
+        # created before any task is locked, in the order user writes take them
+        due_users = (await session.exec(self._due_parents_query(now, Task.user_id))).all()
+        if not due_users:
+            return 0, 0
+        await ensure_task_revisions(session, due_users)
+
+        parents = (await session.exec(
+            self._due_parents_query(now).with_for_update(skip_locked=True)
+        )).all()
+        revisions = await try_bump_task_revisions(session, {parent.user_id for parent in parents})
+        parents = [parent for parent in parents if parent.user_id in revisions]
+        if not parents:
+            return 0, 0
+
+        instance_rows = []
+        parent_updates = []
+        for parent in parents:
+            revision = revisions[parent.user_id]
+            occurrences, next_occurrence = self._expand(parent, now)
+            instance_rows.extend(self._instance_row(parent, due, now, revision) for due in occurrences)
+            parent_updates.append({"id": parent.id, "next_occurrence": next_occurrence, "updated_rev": revision})
+
+        if instance_rows:
+            await session.exec(insert(Task), params=instance_rows)
+        await session.exec(update(Task), params=parent_updates)
+        return len(parents), len(instance_rows)
+
+    async def run_once(self, now: Optional[datetime] = None) -> int:
+        """Drain due parents batch by batch; returns instances created"""
+        now = now or datetime.utcnow()
+        started = time.perf_counter()
+        created = 0
+
+        for _ in range(self.max_batches_per_run):
+            try:
+                async with self.session_maker() as session:
+                    async with session.begin():
+                        parents, instances = await self._process_batch(session, now)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"❌ Recurring batch failed: {e}")
+                break
+
+            if not parents:
+                break
+            self.batches += 1
+            self.parents_processed += parents
+            self.instances_created += instances
+            created += instances
+            if parents < self.batch_size:
+                break
+
+        self.runs += 1
+        self.last_run_seconds = time.perf_counter() - started
+        self.last_run_instances = created
+        if created:
+            logger.info(f"✅ Generated {created} recurring task instances in {self.last_run_seconds:.3f}s")
+        return created
+
+    async def _run_forever(self):
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        """Start the periodic loop on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run_forever())
+            logger.info("✅ Recurring task scheduler started")
+
+    async def stop(self):
+        """Cancel the periodic loop"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Recurring task scheduler stopped")
+
+    def metrics(self) -> Dict[str, float]:
+        rate = self.last_run_instances / self.last_run_seconds if self.last_run_seconds else 0.0
+        return {
+            "recurring_scheduler_runs_total": self.runs,
+            "recurring_scheduler_batches_total": self.batches,
+            "recurring_scheduler_parents_processed_total": self.parents_processed,
+            "recurring_scheduler_instances_created_total": self.instances_created,
+            "recurring_scheduler_errors_total": self.errors,
+            "recurring_scheduler_last_run_seconds": round(self.last_run_seconds, 6),
+            "recurring_scheduler_last_run_instances_per_second": round(rate, 2),
+        }
+
+
+# Global scheduler instance
+recurring_scheduler = RecurringTaskScheduler(
+    batch_size=int(os.getenv("RECURRING_BATCH_SIZE", "200")),
+    interval_seconds=float(os.getenv("RECURRING_INTERVAL_SECONDS", "60")),
+)
+metrics_registry.register("recurring_scheduler", recurring_scheduler.metrics)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(recurring_scheduler._run_forever())
@@ -3,10 +3,15 @@ Recurring Tasks Service
 Handles creation, management, and auto-generation of recurring tasks
 """
 
-from datetime import datetime, timedelta
-from typing import Optional
-from sqlmodel import Session, select
+from datetime import datetime, timedelta, time, timezone
+from typing import AsyncIterator, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+from sqlalchemy import tuple_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from models.task import Task, RecurrenceEnum
+from recurrence import RecurrenceRule
+from task_revisions import bump_task_revision
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,16 +20,47 @@ logger = logging.getLogger(__name__)
 class RecurringTaskService:
     """Service for managing recurring tasks"""
 
-    RECURRENCE_PATTERNS = {
-        RecurrenceEnum.DAILY: lambda dt: dt + timedelta(days=1),
-        RecurrenceEnum.WEEKLY: lambda dt: dt + timedelta(weeks=1),
-        RecurrenceEnum.MONTHLY: lambda dt: dt + timedelta(days=30),
-        RecurrenceEnum.YEARLY: lambda dt: dt + timedelta(days=365),
+    # Built-in recurrence types as rules; CUSTOM tasks carry their own recurrence_rule
+    RECURRENCE_RULES = {
+        RecurrenceEnum.DAILY: "FREQ=DAILY",
+        RecurrenceEnum.WEEKLY: "FREQ=WEEKLY",
+        RecurrenceEnum.MONTHLY: "FREQ=MONTHLY",
+        RecurrenceEnum.YEARLY: "FREQ=YEARLY",
     }
 
     @staticmethod
-    def create_recurring_task(
-        session: Session,
+    def get_rule(
+        recurrence_type: Optional[RecurrenceEnum],
+        recurrence_rule: Optional[str] = None,
+        recurrence_end_date: Optional[datetime] = None
+    ) -> Optional[RecurrenceRule]:
+        """Build the recurrence rule for a type / custom rule / end date"""
+        if recurrence_rule:
+            rule = RecurrenceRule.parse(recurrence_rule)
+        elif recurrence_type in RecurringTaskService.RECURRENCE_RULES:
+            rule = RecurrenceRule.parse(RecurringTaskService.RECURRENCE_RULES[recurrence_type])
+        else:
+            return None
+
+        if recurrence_end_date and (rule.until is None or recurrence_end_date < rule.until):
+            rule.until = recurrence_end_date
+        return rule
+
+    @staticmethod
+    def rule_for_task(task: Task) -> Optional[RecurrenceRule]:
+        """Recurrence rule of a recurring task, or None"""
+        return RecurringTaskService.get_rule(
+            task.recurrence_type, task.recurrence_rule, task.recurrence_end_date
+        )
+
+    @staticmethod
+    def series_anchor(task: Task) -> Optional[datetime]:
+        """First occurrence of the series; month-end clamping is relative to it"""
+        return task.due_date or task.next_occurrence
+
+    @staticmethod
+    async def create_recurring_task(
+        session: AsyncSession,
         user_id: str,
         title: str,
         description: str,
@@ -33,9 +69,17 @@ class RecurringTaskService:
         due_date: datetime,
         reminder_at: Optional[datetime],
         recurrence_type: RecurrenceEnum,
-        recurrence_end_date: Optional[datetime]
+        recurrence_end_date: Optional[datetime],
+        recurrence_rule: Optional[str] = None
     ) -> Task:
         """Create a recurring task"""
+        rule = RecurringTaskService.get_rule(
+            recurrence_type, recurrence_rule, recurrence_end_date
+        )
+        if rule is None:
+            raise ValueError("Custom recurrence requires a recurrence_rule")
+
+        revision = await bump_task_revision(session, user_id)
         task = Task(
             user_id=user_id,
             title=title,
@@ -46,47 +90,34 @@ class RecurringTaskService:
             reminder_at=reminder_at,
             is_recurring=True,
             recurrence_type=recurrence_type,
+            recurrence_rule=recurrence_rule,
             recurrence_end_date=recurrence_end_date,
-            next_occurrence=RecurringTaskService._calculate_next_occurrence(
-                due_date, recurrence_type
-            )
+            next_occurrence=rule.next_after(due_date, due_date),
+            updated_rev=revision
         )
         session.add(task)
-        session.commit()
-        logger.info(f"✅ Recurring task created: {title} ({recurrence_type.value})")
+        await session.commit()
+        logger.info(f"✅ Recurring task created: {title} ({rule.to_string()})")
         return task
 
     @staticmethod
-    def _calculate_next_occurrence(
-        current_date: datetime,
-        recurrence_type: RecurrenceEnum
-    ) -> datetime:
-        """Calculate next occurrence date"""
-        calculator = RecurringTaskService.RECURRENCE_PATTERNS.get(recurrence_type)
-        if calculator:
-            return calculator(current_date)
-        return current_date
-
-    @staticmethod
-    def generate_next_instance(
-        session: Session,
+    async def generate_next_instance(
+        session: AsyncSession,
         parent_task: Task
     ) -> Optional[Task]:
-        """Generate next instance of recurring task"""
-        if not parent_task.is_recurring or not parent_task.recurrence_type:
+        """Generate the instance due at the parent's next occurrence"""
+        rule = RecurringTaskService.rule_for_task(parent_task)
+        if not parent_task.is_recurring or rule is None:
             return None
 
-        # Check if we've reached the recurrence end date
-        if (parent_task.recurrence_end_date and 
-            parent_task.next_occurrence >= parent_task.recurrence_end_date):
+        # The series has ended (UNTIL / COUNT / end date reached)
+        next_due = parent_task.next_occurrence
+        if next_due is None:
             logger.info(f"⏹️ Recurring task ended: {parent_task.title}")
             return None
 
-        # Calculate next occurrence
-        next_due = RecurringTaskService._calculate_next_occurrence(
-            parent_task.next_occurrence or parent_task.due_date,
-            parent_task.recurrence_type
-        )
+        # Before any change to the parent, so the bump is not preceded by its flush
+        revision = await bump_task_revision(session, parent_task.user_id)
 
         # Create new instance
         new_task = Task(
@@ -99,57 +130,73 @@ class RecurringTaskService:
             reminder_at=None,  # Will be set by reminder service
             is_recurring=True,
             recurrence_type=parent_task.recurrence_type,
+            recurrence_rule=parent_task.recurrence_rule,
             recurrence_end_date=parent_task.recurrence_end_date,
             parent_task_id=parent_task.id,
-            next_occurrence=RecurringTaskService._calculate_next_occurrence(
-                next_due, parent_task.recurrence_type
-            )
+            next_occurrence=None,
+            updated_rev=revision
         )
 
         session.add(new_task)
-        
+
         # Update parent task's next occurrence
-        parent_task.next_occurrence = next_due
+        parent_task.next_occurrence = rule.next_after(
+            RecurringTaskService.series_anchor(parent_task), next_due
+        )
+        parent_task.updated_rev = revision
         session.add(parent_task)
-        session.commit()
+        await session.commit()
 
         logger.info(f"✅ Generated next instance of: {parent_task.title}")
         return new_task
 
     @staticmethod
-    def get_recurring_tasks(
-        session: Session,
+    async def get_recurring_tasks(
+        session: AsyncSession,
         user_id: str
     ) -> list:
-        """Get all recurring tasks for user"""
+        """Get all recurring tasks for user, next occurrence first"""
         statement = select(Task).where(
             Task.user_id == user_id,
             Task.is_recurring == True
+        ).order_by(Task.next_occurrence)
+        return (await session.exec(statement)).all()
+
+    @staticmethod
+    def _day_bounds_utc(
+        tz_name: str = "UTC",
+        now: Optional[datetime] = None
+    ) -> Tuple[datetime, datetime]:
+        """Start/end of the current local day as naive UTC datetimes"""
+        tz = ZoneInfo(tz_name)
+        local_today = (now or datetime.now(timezone.utc)).astimezone(tz).date()
+        start = datetime.combine(local_today, time.min, tzinfo=tz)
+        # Build the end from the next date (not +24h) so DST days stay correct
+        end = datetime.combine(local_today + timedelta(days=1), time.min, tzinfo=tz)
+        return (
+            start.astimezone(timezone.utc).replace(tzinfo=None),
+            end.astimezone(timezone.utc).replace(tzinfo=None),
         )
-        return session.exec(statement).all()
 
     @staticmethod
-    def get_tasks_due_today(
-        session: Session,
-        user_id: str
+    async def get_tasks_due_today(
+        session: AsyncSession,
+        user_id: str,
+        tz_name: str = "UTC"
     ) -> list:
-        """Get tasks due today"""
-        today = datetime.utcnow().date()
+        """Get incomplete tasks due during the user's local today"""
+        start, end = RecurringTaskService._day_bounds_utc(tz_name)
         statement = select(Task).where(
             Task.user_id == user_id,
-            Task.completed == False
-        )
-        tasks = session.exec(statement).all()
-        
-        due_today = [
-            t for t in tasks 
-            if t.due_date and t.due_date.date() == today
-        ]
-        return due_today
+            Task.completed == False,
+            Task.due_date >= start,
+            Task.due_date < end
+        ).order_by(Task.due_date)
+        return (await session.exec(statement)).all()
 
     @staticmethod
-    def get_overdue_tasks(
-        session: Session,
+    async def get_overdue_tasks(
+        session: AsyncSession,
         user_id: str
     ) -> list:
         """Get overdue tasks"""
@@ -157,9 +204,37 @@ class RecurringTaskService:
         statement = select(Task).where(
             Task.user_id == user_id,
             Task.completed == False,
-            Task.due_date != None
-        )
-        tasks = session.exec(statement).all()
-        
-        overdue = [t for t in tasks if t.due_date < now]
-        return overdue
+            Task.due_date < now
+        ).order_by(Task.due_date)
+        return (await session.exec(statement)).all()
+
+    @staticmethod
+    async def iter_due_tasks(
+        session: AsyncSession,
+        start: datetime,
+        end: datetime,
+        batch_size: int = 500
+    ) -> AsyncIterator[List[Task]]:
+        """Yield incomplete tasks of all users due in [start, end) in batches
+
+        Uses keyset pagination on (due_date, id) so each batch is one
+        bounded index range scan regardless of how far the scan has got.
+        """
+        last: Optional[Tuple[datetime, int]] = None
+        while True:
+            statement = select(Task).where(
+                Task.completed == False,
+                Task.due_date >= start,
+                Task.due_date < end
+            )
+            if last:
+                statement = statement.where(tuple_(Task.due_date, Task.id) > last)
+            statement = statement.order_by(Task.due_date, Task.id).limit(batch_size)
+
+            batch = (await session.exec(statement)).all()
+            if not batch:
+                return
+            yield batch
+            if len(batch) < batch_size:
+                return
+            last = (batch[-1].due_date, batch[-1].id)
@@ -0,0 +1,331 @@
+"""
+Reminder Scheduler
+Fires ReminderEvents at Task.reminder_at. Only reminders inside a sliding
+window are held in memory (a heap); the window is refilled with keyset
+range queries and kept current from task events. Events only cover this
+process's writes, so refills re-scan the window and every due row is
+re-read before it fires.
+Run exactly one instance: in-process (REMINDER_SCHEDULER_ENABLED on a
+single replica) or standalone: python reminder_scheduler.py
+"""
+
+import asyncio
+import heapq
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import tuple_
+from sqlmodel import select
+import logging
+
+try:
+    from database import async_session_maker
+    from metrics import metrics_registry
+    from models.task import Task
+except ImportError:
+    from .database import async_session_maker
+    from .metrics import metrics_registry
+    from .models.task import Task
+
+logger = logging.getLogger(__name__)
+
+# task_id -> (remind_at, user_id, title, due_date)
+Entry = Tuple[datetime, str, str, Optional[datetime]]
+
+
+def _parse_datetime(value) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+class ReminderScheduler:
+    """Sliding-window reminder scheduler
+
+    Everything ordered at or before ``_loaded_until`` (a (reminder_at, id)
+    keyset position) is resident; refills extend it to ``window_seconds``
+    ahead using ix_task_pending_reminder, at most ``max_resident`` entries
+    at a time. Task events update resident entries in place: the heap is
+    lazily invalidated, ``_entries`` is the source of truth.
+
+    Writes that send no event here (other replicas, scripts) are caught
+    twice: every ``catchup_seconds / 2`` a refill re-scans from
+    ``now - catchup`` and adds or moves the reminders it finds, and due
+    entries are re-read so completed, deleted or moved tasks do not fire.
+    ``_fired`` keeps fired (task, reminder_at) pairs until they leave the
+    re-scanned range, so a re-scan never fires a reminder twice.
+    """
+
+    def __init__(
+        self,
+        session_maker=async_session_maker,
+        publisher=None,
+        window_seconds: float = 300.0,
+        refill_batch_size: int = 1000,
+        max_resident: int = 100000,
+        catchup_seconds: float = 60.0
+    ):
+        self.session_maker = session_maker
+        self.publisher = publisher
+        self.window = timedelta(seconds=window_seconds)
+        self.refill_batch_size = refill_batch_size
+        self.max_resident = max_resident
+        self.catchup = timedelta(seconds=catchup_seconds)
+
+        self._heap: List[Tuple[datetime, int]] = []
+        self._entries: Dict[int, Entry] = {}
+        self._loaded_until: Optional[Tuple[datetime, int]] = None
+        self._last_refill: Optional[datetime] = None
+        self._fired: Dict[int, datetime] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self.fired = 0
+        self.refills = 0
+        self.rows_loaded = 0
+        self.updates_applied = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_fire_delay_seconds = 0.0
+
+    def _get_publisher(self):
+        if self.publisher is None:
+            try:
+                from kafka_service import kafka_service
+            except ImportError:
+                from .kafka_service import kafka_service
+            self.publisher = kafka_service
+        return self.publisher
+
+    # Window
+
+    def _is_loaded(self, remind_at: datetime, task_id: int) -> bool:
+        return self._loaded_until is not None and (remind_at, task_id) <= self._loaded_until
+
+    def _schedule(self, task_id: int, entry: Entry):
+        self._entries[task_id] = entry
+        heapq.heappush(self._heap, (entry[0], task_id))
+
+    async def refill(self, now: datetime) -> int:
+        """Re-scan reminders from now - catchup to now + window; returns rows scheduled"""
+        horizon = now + self.window
+        position = (now - self.catchup, 0)
+        # Reminders before the re-scanned range can no longer be read again
+        self._fired = {task_id: at for task_id, at in self._fired.items() if at >= position[0]}
+        loaded = 0
+
+        async with self.session_maker() as session:
+            while len(self._entries) < self.max_resident:
+                limit = min(self.refill_batch_size, self.max_resident - len(self._entries))
+                rows = (await session.exec(
+                    select(Task.id, Task.user_id, Task.title, Task.due_date, Task.reminder_at)
+                    .where(
+                        Task.completed == False,
+                        Task.reminder_at != None,
+                        tuple_(Task.reminder_at, Task.id) > tuple_(*position),
+                        Task.reminder_at < horizon
+                    )
+                    .order_by(Task.reminder_at, Task.id)
+                    .limit(limit)
+                )).all()
+
+                for task_id, user_id, title, due_date, remind_at in rows:
+                    resident = self._entries.get(task_id)
+                    if self._fired.get(task_id) == remind_at or (resident and resident[0] == remind_at):
+                        continue
+                    self._schedule(task_id, (remind_at, user_id, title, due_date))
+                    loaded += 1
+                if rows:
+                    position = (rows[-1].reminder_at, rows[-1].id)
+                if len(rows) < limit:
+                    # Everything before the horizon is resident; ids are >= 1
+                    position = max(position, (horizon, 0))
+                    break
+
+        if self._loaded_until is None or position > self._loaded_until:
+            self._loaded_until = position
+        self._last_refill = now
+        self.refills += 1
+        self.rows_loaded += loaded
+        return loaded
+
+    # Incremental updates
+
+    async def on_task_event(self, event: dict):
+        """Apply a TaskEvent (dict, as published to task-events)"""
+        task_id = event["task_id"]
+        data = event.get("task_data") or {}
+        remind_at = _parse_datetime(data.get("reminder_at"))
+
+        previous = self._entries.pop(task_id, None)
+        self.updates_applied += 1
+        if event["event_type"] == "deleted" or data.get("completed") or remind_at is None:
+            return
+        if previous is None and remind_at <= datetime.utcnow():
+            # Already fired (or set in the past); an unrelated edit must not re-fire it
+            return
+
+        if len(self._heap) > 2 * len(self._entries) + 1024:
+            self._compact()
+
+        # Reminders beyond the window are picked up by a later refill
+        if self._is_loaded(remind_at, task_id):
+            entry = (remind_at, event["user_id"], data.get("title", ""), _parse_datetime(data.get("due_date")))
+            self._schedule(task_id, entry)
+            if self._heap[0] == (remind_at, task_id):
+                self._wakeup.set()
+
+    def _compact(self):
+        """Drop stale heap items left behind by edits"""
+        self._heap = [(entry[0], task_id) for task_id, entry in self._entries.items()]
+        heapq.heapify(self._heap)
+
+    # Firing
+
+    def _pop_due(self, now: datetime) -> List[Tuple[int, Entry]]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            remind_at, task_id = heapq.heappop(self._heap)
+            entry = self._entries.get(task_id)
+            # Stale heap items (task edited, completed or deleted) are skipped
+            if entry is not None and entry[0] == remind_at:
+                del self._entries[task_id]
+                due.append((task_id, entry))
+        return due
+
+    async def _recheck(self, due: List[Tuple[int, Entry]], now: datetime) -> List[Tuple[int, Entry]]:
+        """Re-read due reminders; keeps those whose task still wants one now"""
+        async with self.session_maker() as session:
+            rows = (await session.exec(
+                select(Task.id, Task.user_id, Task.title, Task.due_date, Task.reminder_at)
+                .where(
+                    Task.id.in_([task_id for task_id, _ in due]),
+                    Task.completed == False,
+                    Task.reminder_at != None
+                )
+            )).all()
+        current = {row.id: (row.reminder_at, row.user_id, row.title, row.due_date) for row in rows}
+
+        firing = []
+        for task_id, _ in due:
+            entry = current.get(task_id)
+            if entry is None or self._fired.get(task_id) == entry[0]:
+                # Deleted, completed, cleared, or this reminder already fired
+                self.dropped += 1
+            elif entry[0] > now:
+                # Moved later by a write this process had no event for
+                self.dropped += 1
+                if self._is_loaded(entry[0], task_id):
+                    self._schedule(task_id, entry)
+            else:
+                firing.append((task_id, entry))
+        return firing
+
+    async def run_once(self, now: Optional[datetime] = None) -> int:
+        """Refill when due, then re-check and fire due reminders"""
+        now = now or datetime.utcnow()
+        if self._needs_refill(now):
+            await self.refill(now)
+
+        due = self._pop_due(now)
+        if due:
+            due = await self._recheck(due, now)
+        publisher = self._get_publisher()
+        for task_id, (remind_at, user_id, title, due_date) in due:
+            await publisher.publish_reminder_event(task_id, title, user_id, remind_at, due_at=due_date)
+            self._fired[task_id] = remind_at
+            self.last_fire_delay_seconds = (now - remind_at).total_seconds()
+        self.fired += len(due)
+        return len(due)
+
+    def _needs_refill(self, now: datetime) -> bool:
+        if self._loaded_until is None:
+            return True
+        # Re-scan often enough that the catchup range covers the time since the last one
+        if now - self._last_refill >= self.catchup / 2:
+            return True
+        return (
+            len(self._entries) < self.max_resident
+            and self._loaded_until[0] - now < self.window / 2
+        )
+
+    def _seconds_until_next(self, now: datetime) -> float:
+        wake_at = min(now + self.window / 2, self._last_refill + self.catchup / 2)
+        if len(self._entries) < self.max_resident:
+            wake_at = min(wake_at, self._loaded_until[0] - self.window / 2)
+        if self._heap:
+            wake_at = min(wake_at, self._heap[0][0])
+        return max((wake_at - now).total_seconds(), 0.0)
+
+    async def _run_forever(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"❌ Reminder scheduler failed: {e}")
+                await asyncio.sleep(1)
+                continue
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._seconds_until_next(datetime.utcnow()))
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        """Start the scheduler on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run_forever())
+            logger.info("✅ Reminder scheduler started")
+
+    async def stop(self):
+        """Stop the scheduler"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Reminder scheduler stopped")
+
+    def metrics(self) -> Dict[str, float]:
+        horizon = 0.0
+        if self._loaded_until is not None:
+            horizon = (self._loaded_until[0] - datetime.utcnow()).total_seconds()
+        return {
+            "reminder_scheduler_resident": len(self._entries),
+            "reminder_scheduler_heap_size": len(self._heap),
+            "reminder_scheduler_fired_total": self.fired,
+            "reminder_scheduler_refills_total": self.refills,
+            "reminder_scheduler_rows_loaded_total": self.rows_loaded,
+            "reminder_scheduler_updates_applied_total": self.updates_applied,
+            "reminder_scheduler_dropped_total": self.dropped,
+            "reminder_scheduler_errors_total": self.errors,
+            "reminder_scheduler_horizon_seconds": round(horizon, 3),
+            "reminder_scheduler_last_fire_delay_seconds": round(self.last_fire_delay_seconds, 3),
+        }
+
+
+# Global scheduler instance
+reminder_scheduler = ReminderScheduler(
+    window_seconds=float(os.getenv("REMINDER_WINDOW_SECONDS", "300")),
+    max_resident=int(os.getenv("REMINDER_MAX_RESIDENT", "100000")),
+)
+metrics_registry.register("reminder_scheduler", reminder_scheduler.metrics)
+
+
+async def _run_standalone():
+    try:
+        from kafka_service import kafka_service
+    except ImportError:
+        from .kafka_service import kafka_service
+    # Own consumer group: every task event reaches the scheduler
+    kafka_service.consume_messages("task-events", reminder_scheduler.on_task_event, group_id="reminder-scheduler")
+    await reminder_scheduler._run_forever()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_run_standalone())
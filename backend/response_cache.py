@@ -0,0 +1,143 @@
+"""
+Chat Response Cache
+Remembers agent answers to read-only chat turns ("show my tasks", "help")
+per user, so repeats skip the OpenAI round trips. Entries are keyed on the
+normalised message and the user's task revision (task_revisions.py), which
+every task write bumps in the database, whichever replica makes it.
+"""
+
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+try:
+    from database import open_async_session
+    from metrics import metrics_registry
+    from task_revisions import get_task_revision
+except ImportError:
+    from .database import open_async_session
+    from .metrics import metrics_registry
+    from .task_revisions import get_task_revision
+
+# (response, tool_used, action_taken)
+CachedReply = Tuple[str, Optional[str], Optional[str]]
+
+# Tools whose results depend only on the user's tasks
+READ_ONLY_TOOLS = frozenset({"list_tasks", "search_tasks"})
+
+_FILLER = re.compile(r"\b(please|pls|plz|thanks|thank you)\b")
+_NON_WORD = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_message(message: str) -> str:
+    """Case, punctuation, filler and whitespace-insensitive form of a message"""
+    text = _NON_WORD.sub(" ", message.lower())
+    text = _FILLER.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+class ResponseCache:
+    """LRU + TTL cache of agent replies
+
+    A reply is served only while the user's task revision in the database
+    is the one it was computed at, so a write through any replica makes it
+    stale at once. Each lookup costs one primary-key read of that revision.
+    """
+
+    def __init__(self, session_maker=open_async_session, max_entries: int = 10000, ttl_seconds: float = 300.0):
+        self.session_maker = session_maker
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # (user_id, normalised message) -> (revision, expires_at, standalone_only, reply)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[int, float, bool, CachedReply]]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    async def revision(self, user_id: str) -> int:
+        """Current task revision for user_id; read it before computing a reply"""
+        async with self.session_maker() as session:
+            return await get_task_revision(session, user_id)
+
+    def get(self, user_id: str, message: str, revision: int, has_history: bool = False) -> Optional[CachedReply]:
+        """Reply cached for message while the user's tasks were at revision"""
+        key = (user_id, normalize_message(message))
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        cached_revision, expires_at, standalone_only, reply = entry
+        if cached_revision != revision or expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        if standalone_only and has_history:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return reply
+
+    async def put(
+        self,
+        user_id: str,
+        message: str,
+        revision: int,
+        reply: CachedReply,
+        tools_called: Iterable[str] = (),
+        has_history: bool = False
+    ) -> bool:
+        """Store a reply computed while the user's tasks were at revision
+
+        Only replies built from read-only tools are reusable mid-conversation;
+        a reply without tool calls may answer earlier turns ("yes, do that")
+        and is served only to turns that have no history either.
+
+        Returns:
+            Whether the reply was cached
+        """
+        tools_called = set(tools_called)
+        if not tools_called <= READ_ONLY_TOOLS or (has_history and not tools_called):
+            return False
+        normalized = normalize_message(message)
+        if not normalized or revision != await self.revision(user_id):
+            # Tasks changed while the reply was computed
+            return False
+
+        key = (user_id, normalized)
+        self._entries[key] = (revision, time.monotonic() + self.ttl_seconds, not tools_called, reply)
+        self._entries.move_to_end(key)
+        self.stores += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return True
+
+    def metrics(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "chat_response_cache_entries": len(self._entries),
+            "chat_response_cache_hits_total": self.hits,
+            "chat_response_cache_misses_total": self.misses,
+            "chat_response_cache_hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "chat_response_cache_stores_total": self.stores,
+            "chat_response_cache_evictions_total": self.evictions,
+            "chat_response_cache_expirations_total": self.expirations,
+        }
+
+
+# Global cache instance
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "10000")),
+    ttl_seconds=float(os.getenv("CHAT_CACHE_TTL_SECONDS", "300")),
+)
+metrics_registry.register("chat_response_cache", response_cache.metrics)
@@ -1,35 +1,113 @@
 """Chat API endpoint for Phase 3."""
 
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
+from fastapi.responses import StreamingResponse
+from sqlalchemy import inspect, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from uuid import uuid4
 
 try:
     from auth import get_current_user_id
-    from database import get_session
+    from chat_history import history_builder
+    from database import get_async_session, open_async_session
     from models.conversation import Conversation
     from models.message import Message
     from schemas.chat import ChatRequest, ChatResponse, ErrorResponse
-    from openai_agent import process_chat_message
+    from openai_agent import process_chat_message, stream_chat_message
+    from sse import SSE_HEADERS, format_sse
 except ImportError:
     from ..auth import get_current_user_id
-    from ..database import get_session
+    from ..chat_history import history_builder
+    from ..database import get_async_session, open_async_session
     from ..models.conversation import Conversation
     from ..models.message import Message
     from ..schemas.chat import ChatRequest, ChatResponse, ErrorResponse
-    from ..openai_agent import process_chat_message
+    from ..openai_agent import process_chat_message, stream_chat_message
+    from ..sse import SSE_HEADERS, format_sse
 
 router = APIRouter(tags=["chat"])
 
 
+async def _load_turn(user_id: str, request: ChatRequest) -> Tuple[Conversation, List[Dict[str, str]], bool]:
+    """Transaction 1 (read only): load the conversation and its history.
+
+    Nothing is written here and the connection goes back to the pool before
+    the agent runs. A new conversation and any summary folded by the history
+    loader exist only in memory until _save_turn.
+
+    Returns:
+        Tuple of (conversation, conversation_history, is_new); the
+        conversation is detached from any session
+    """
+    if not request.conversation_id:
+        now = datetime.utcnow()
+        conversation = Conversation(id=str(uuid4()), user_id=user_id, created_at=now, updated_at=now)
+        return conversation, [], True
+
+    async with open_async_session() as session:
+        conversation = (await session.exec(
+            select(Conversation).where(
+                (Conversation.id == request.conversation_id)
+                & (Conversation.user_id == user_id)
+            )
+        )).first()
+
+        if not conversation:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Conversation not found",
+            )
+
+        # Newest messages within the token budget, older ones as a summary
+        conversation_history = await history_builder.load(session, conversation)
+        # Keep the folded summary on the object; it is saved with the turn
+        session.expunge(conversation)
+
+    return conversation, conversation_history, False
+
+
+async def _save_turn(conversation: Conversation, is_new: bool, messages: List[Message]):
+    """Transaction 2: save the turn's messages and bump the conversation together."""
+    async with open_async_session() as session:
+        conversation.updated_at = datetime.utcnow()
+        if is_new:
+            session.add(conversation)
+            # The messages reference it
+            await session.flush()
+        else:
+            values = {"updated_at": conversation.updated_at}
+            # Only a summary this turn folded; another turn may have moved it on
+            state = inspect(conversation)
+            for field in ("summary", "summarized_until"):
+                if state.attrs[field].history.has_changes():
+                    values[field] = getattr(conversation, field)
+            await session.exec(
+                update(Conversation).where(Conversation.id == conversation.id).values(**values)
+            )
+        session.add_all(messages)
+        await session.commit()
+
+
+def _user_message(conversation: Conversation, user_id: str, request: ChatRequest) -> Message:
+    # Timestamped on arrival so it sorts before the reply
+    return Message(
+        id=str(uuid4()),
+        conversation_id=conversation.id,
+        user_id=user_id,
+        role="user",
+        content=request.message,
+        created_at=datetime.utcnow(),
+    )
+
+
 @router.post("/api/{user_id}/chat", response_model=ChatResponse)
 async def chat(
     user_id: str,
     request: ChatRequest,
     current_user_id: str = Depends(get_current_user_id),
-    session: Session = Depends(get_session),
 ):
     """Handle chat messages and return AI responses.
 
@@ -39,11 +117,13 @@ async def chat(
     3. Saves messages to DB
     4. Returns response to frontend
 
+    No database connection is held while the agent runs: the history is
+    read in one short transaction and both messages are written in another.
+
     Args:
         user_id: User ID from URL path
         request: ChatRequest with message and optional conversation_id
         current_user_id: Authenticated user ID from JWT
-        session: Database session
 
     Returns:
         ChatResponse with AI response and metadata
@@ -55,72 +135,16 @@ async def chat(
             detail="Cannot access other users' conversations",
         )
 
-    # Create or load conversation
-    if request.conversation_id:
-        # Load existing conversation
-        conversation = session.exec(
-            select(Conversation).where(
-                (Conversation.id == request.conversation_id)
-                & (Conversation.user_id == user_id)
-            )
-        ).first()
-
-        if not conversation:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Conversation not found",
-            )
-    else:
-        # Create new conversation
-        conversation = Conversation(
-            id=str(uuid4()),
-            user_id=user_id,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow(),
-        )
-        session.add(conversation)
-        session.commit()
-        session.refresh(conversation)
-
-    # Load conversation history (last 10 messages)
-    history = session.exec(
-        select(Message)
-        .where(Message.conversation_id == conversation.id)
-        .order_by(Message.created_at)
-        .limit(10)
-    ).all()
-
-    # Format history for OpenAI agent
-    conversation_history = [
-        {
-            "role": msg.role,
-            "content": msg.content
-        }
-        for msg in history
-    ]
-
-    # Save user message
-    user_message_id = str(uuid4())
-    user_msg = Message(
-        id=user_message_id,
-        conversation_id=conversation.id,
-        user_id=user_id,
-        role="user",
-        content=request.message,
-        created_at=datetime.utcnow(),
-    )
-    session.add(user_msg)
-    session.commit()
+    conversation, conversation_history, is_new = await _load_turn(user_id, request)
+    user_msg = _user_message(conversation, user_id, request)
 
     # Call OpenAI Agent with message and history
-    ai_response, tool_used, action_taken = process_chat_message(
+    ai_response, tool_used, action_taken = await process_chat_message(
         request.message, user_id, conversation_history
     )
 
-    # Save assistant message
-    assistant_message_id = str(uuid4())
     assistant_msg = Message(
-        id=assistant_message_id,
+        id=str(uuid4()),
         conversation_id=conversation.id,
         user_id=user_id,
         role="assistant",
@@ -129,19 +153,13 @@ async def chat(
         action_taken=action_taken,
         created_at=datetime.utcnow(),
     )
-    session.add(assistant_msg)
-    session.commit()
-
-    # Update conversation updated_at
-    conversation.updated_at = datetime.utcnow()
-    session.add(conversation)
-    session.commit()
+    await _save_turn(conversation, is_new, [user_msg, assistant_msg])
 
     return ChatResponse(
         success=True,
         conversation_id=conversation.id,
-        user_message_id=user_message_id,
-        assistant_message_id=assistant_message_id,
+        user_message_id=user_msg.id,
+        assistant_message_id=assistant_msg.id,
         response=ai_response,
         tool_used=tool_used,
         action_taken=action_taken,
@@ -149,11 +167,85 @@ async def chat(
     )
 
 
+@router.post("/api/{user_id}/chat/stream")
+async def chat_stream(
+    user_id: str,
+    request: ChatRequest,
+    current_user_id: str = Depends(get_current_user_id),
+):
+    """Handle a chat message, streaming the reply as Server-Sent Events.
+
+    Events, in order:
+    - start: {conversation_id, user_message_id}
+    - token: {content} as the model generates text
+    - tool_call / tool_result: progress of each tool the model invokes
+    - done: {assistant_message_id, response, tool_used, action_taken, timestamp}
+      once both messages have been saved
+    - error: {error} instead of done if the agent fails or stops without a
+      response; nothing is saved
+
+    Args:
+        user_id: User ID from URL path
+        request: ChatRequest with message and optional conversation_id
+        current_user_id: Authenticated user ID from JWT
+    """
+    if user_id != current_user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Cannot access other users' conversations",
+        )
+
+    conversation, conversation_history, is_new = await _load_turn(user_id, request)
+    user_msg = _user_message(conversation, user_id, request)
+
+    async def events():
+        yield format_sse("start", {
+            "conversation_id": conversation.id,
+            "user_message_id": user_msg.id,
+        })
+
+        done = None
+        try:
+            async for event in stream_chat_message(request.message, user_id, conversation_history):
+                event_type = event.pop("type")
+                if event_type == "done":
+                    done = event
+                else:
+                    yield format_sse(event_type, event)
+        except Exception as e:
+            yield format_sse("error", {"error": f"Agent stream failed: {e}"})
+            return
+        if done is None:
+            # Nothing to save: the turn has no answer
+            yield format_sse("error", {"error": "Agent stream ended without a response"})
+            return
+
+        assistant_msg = Message(
+            id=str(uuid4()),
+            conversation_id=conversation.id,
+            user_id=user_id,
+            role="assistant",
+            content=done["response"],
+            tool_used=done["tool_used"],
+            action_taken=done["action_taken"],
+            created_at=datetime.utcnow(),
+        )
+        await _save_turn(conversation, is_new, [user_msg, assistant_msg])
+
+        yield format_sse("done", {
+            "assistant_message_id": assistant_msg.id,
+            **done,
+            "timestamp": datetime.utcnow().isoformat(),
+        })
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @router.get("/api/{user_id}/chat/conversations")
 async def get_conversations(
     user_id: str,
     current_user_id: str = Depends(get_current_user_id),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     """Get all conversations for a user."""
     if user_id != current_user_id:
@@ -162,11 +254,11 @@ async def get_conversations(
             detail="Cannot access other users' conversations",
         )
 
-    conversations = session.exec(
+    conversations = (await session.exec(
         select(Conversation)
         .where(Conversation.user_id == user_id)
         .order_by(Conversation.updated_at.desc())
-    ).all()
+    )).all()
 
     return {"conversations": conversations}
 
@@ -176,7 +268,7 @@ async def get_conversation_messages(
     user_id: str,
     conversation_id: str,
     current_user_id: str = Depends(get_current_user_id),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     """Get all messages in a conversation."""
     if user_id != current_user_id:
@@ -186,11 +278,11 @@ async def get_conversation_messages(
         )
 
     # Verify conversation exists and belongs to user
-    conversation = session.exec(
+    conversation = (await session.exec(
         select(Conversation).where(
             (Conversation.id == conversation_id) & (Conversation.user_id == user_id)
         )
-    ).first()
+    )).first()
 
     if not conversation:
         raise HTTPException(
@@ -199,10 +291,10 @@ async def get_conversation_messages(
         )
 
     # Get all messages
-    messages = session.exec(
+    messages = (await session.exec(
         select(Message)
         .where(Message.conversation_id == conversation_id)
         .order_by(Message.created_at)
-    ).all()
+    )).all()
 
     return {"conversation_id": conversation_id, "messages": messages}
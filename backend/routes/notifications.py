@@ -0,0 +1,149 @@
+"""In-app notification API: inbox, unread counter, SSE and long-poll delivery."""
+
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+try:
+    from auth import get_current_user_id
+    from database import get_async_session, open_async_session
+    from notification_inbox import notification_inbox, to_payload, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+    from schemas.notification import MarkReadRequest, NotificationPage, NotificationRead, UnreadCount
+    from sse import SSE_HEADERS, format_sse
+except ImportError:
+    from ..auth import get_current_user_id
+    from ..database import get_async_session, open_async_session
+    from ..notification_inbox import notification_inbox, to_payload, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+    from ..schemas.notification import MarkReadRequest, NotificationPage, NotificationRead, UnreadCount
+    from ..sse import SSE_HEADERS, format_sse
+
+router = APIRouter(tags=["notifications"])
+
+HEARTBEAT_SECONDS = 15
+
+
+@router.get("/{user_id}/notifications", response_model=NotificationPage)
+async def list_notifications(
+    user_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page"),
+    unread_only: bool = Query(False, description="Only unread notifications"),
+    current_user_id: str = Depends(get_current_user_id),
+    session: AsyncSession = Depends(get_async_session)
+):
+    # Demo mode: allow any user_id from URL
+    try:
+        items, next_cursor = await notification_inbox.list_page(
+            session, user_id, cursor=cursor, limit=limit, unread_only=unread_only
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    unread = await notification_inbox.unread_count(session, user_id)
+    return NotificationPage(items=items, next_cursor=next_cursor, unread=unread)
+
+
+@router.get("/{user_id}/notifications/unread-count", response_model=UnreadCount)
+async def get_unread_count(
+    user_id: str,
+    current_user_id: str = Depends(get_current_user_id),
+    session: AsyncSession = Depends(get_async_session)
+):
+    return UnreadCount(unread=await notification_inbox.unread_count(session, user_id))
+
+
+@router.post("/{user_id}/notifications/read", response_model=UnreadCount)
+async def mark_notifications_read(
+    user_id: str,
+    request: MarkReadRequest,
+    current_user_id: str = Depends(get_current_user_id),
+    session: AsyncSession = Depends(get_async_session)
+):
+    unread = await notification_inbox.mark_read(session, user_id, request.ids)
+    return UnreadCount(unread=unread)
+
+
+@router.get("/{user_id}/notifications/poll", response_model=list[NotificationRead])
+async def poll_notifications(
+    user_id: str,
+    after: Optional[int] = Query(None, ge=0, description="Id of the newest notification the client has; omit to wait for the next new one"),
+    timeout: float = Query(25, ge=0, le=60, description="Seconds to wait for a new notification"),
+    current_user_id: str = Depends(get_current_user_id)
+):
+    """Long-poll: return newer notifications at once, or wait for the next one"""
+    subscription = notification_inbox.broker.subscribe(user_id)
+    try:
+        # Short-lived session: no pooled connection is held while waiting
+        async with open_async_session() as session:
+            if after is None:
+                # Nothing to catch up on: start from the newest notification
+                after = await notification_inbox.newest_id(session, user_id)
+                missed = []
+            else:
+                missed = await notification_inbox.list_after(session, user_id, after)
+        if missed:
+            return missed
+
+        try:
+            first = await asyncio.wait_for(subscription.get(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        payloads = [first]
+        while not subscription.empty():
+            payloads.append(subscription.get_nowait())
+        return [payload for payload in payloads if payload["id"] > after]
+    finally:
+        notification_inbox.broker.unsubscribe(user_id, subscription)
+
+
+@router.get("/{user_id}/notifications/stream")
+async def stream_notifications(
+    user_id: str,
+    request: Request,
+    last_event_id: Optional[str] = Header(None),
+    current_user_id: str = Depends(get_current_user_id)
+):
+    """Server-Sent Events: the unread count, then each new notification
+
+    Reconnecting clients send Last-Event-ID and receive what they missed.
+    """
+    after = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    # Subscribe before reading the inbox so nothing falls in between
+    subscription = notification_inbox.broker.subscribe(user_id)
+
+    async def events():
+        try:
+            async with open_async_session() as session:
+                unread = await notification_inbox.unread_count(session, user_id)
+                missed = await notification_inbox.list_after(session, user_id, after) if after is not None else []
+
+            yield format_sse("unread", {"unread": unread})
+            last_id = after or 0
+            for notification in missed:
+                payload = to_payload(notification)
+                last_id = payload["id"]
+                yield format_sse("notification", payload, payload["id"])
+
+            while not await request.is_disconnected():
+                try:
+                    payload = await asyncio.wait_for(subscription.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if payload["id"] <= last_id:
+                    continue
+                last_id = payload["id"]
+                yield format_sse("notification", payload, payload["id"])
+        finally:
+            notification_inbox.broker.unsubscribe(user_id, subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
@@ -1,74 +1,237 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Path, Query
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status, Path, Query
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 
 try:
     from auth import get_current_user_id
-    from database import get_session
-    from models.task import Task, TaskCreate, TaskUpdate, TaskRead
+    from database import get_async_session
+    from models.task import Task, TaskCreate, TaskUpdate, TaskRead, TaskPage, TaskChanges, TaskSearchHit, TaskSearchPage, TaskBatchRequest, TaskBatchResponse, PriorityEnum, RecurrenceEnum
+    from task_queries import fetch_task_page, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+    from task_search import search_tasks, DEFAULT_SEARCH_PAGE_SIZE, MAX_SEARCH_PAGE_SIZE
+    from task_batch import apply_task_batch
+    from task_sync import fetch_task_changes, DEFAULT_CHANGES_PAGE_SIZE, MAX_CHANGES_PAGE_SIZE
+    from task_mutations import build_task, update_task_fields, toggle_task_completed, delete_task_returning
+    from outbox import record_task_event
+    from task_revisions import bump_task_revision, get_task_revision, task_etag, etag_matches
 except ImportError:
     from ..auth import get_current_user_id
-    from ..database import get_session
-    from ..models.task import Task, TaskCreate, TaskUpdate, TaskRead
+    from ..database import get_async_session
+    from ..models.task import Task, TaskCreate, TaskUpdate, TaskRead, TaskPage, TaskChanges, TaskSearchHit, TaskSearchPage, TaskBatchRequest, TaskBatchResponse, PriorityEnum, RecurrenceEnum
+    from ..task_queries import fetch_task_page, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+    from ..task_search import search_tasks, DEFAULT_SEARCH_PAGE_SIZE, MAX_SEARCH_PAGE_SIZE
+    from ..task_batch import apply_task_batch
+    from ..task_sync import fetch_task_changes, DEFAULT_CHANGES_PAGE_SIZE, MAX_CHANGES_PAGE_SIZE
+    from ..task_mutations import build_task, update_task_fields, toggle_task_completed, delete_task_returning
+    from ..outbox import record_task_event
+    from ..task_revisions import bump_task_revision, get_task_revision, task_etag, etag_matches
 
 router = APIRouter()
 
-@router.get("/{user_id}/tasks", response_model=List[TaskRead])
-def get_tasks(
+
+def _cache_headers(etag: str) -> dict:
+    # Clients may keep the response but must revalidate it with If-None-Match
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=_cache_headers(etag))
+
+
+@router.get("/{user_id}/tasks", response_model=TaskPage)
+async def get_tasks(
     user_id: str,
+    response: Response,
     status_filter: str = Query("all", description="Filter by status: all, pending, completed"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page"),
+    priority: Optional[List[PriorityEnum]] = Query(None, description="Filter by one or more priorities"),
+    tags: Optional[List[str]] = Query(None, description="Only tasks carrying all of these tags"),
+    due_after: Optional[datetime] = Query(None, description="Due on or after this time"),
+    due_before: Optional[datetime] = Query(None, description="Due before this time"),
+    is_recurring: Optional[bool] = Query(None, description="Filter recurring/non-recurring tasks"),
+    recurrence_type: Optional[RecurrenceEnum] = Query(None, description="Filter by recurrence pattern"),
+    sort: str = Query("created_at", description="Sort by: created_at, due_date, title"),
+    order: str = Query("desc", description="Sort order: asc, desc"),
+    if_none_match: Optional[str] = Header(None),
     current_user_id: str = Depends(get_current_user_id),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     # Demo mode: allow any user_id from URL
     # In production, verify: if user_id != current_user_id: raise error
-    
-    # Build query based on status filter
-    query = select(Task).where(Task.user_id == user_id)
-    
-    if status_filter == "pending":
-        query = query.where(Task.completed == False)
-    elif status_filter == "completed":
-        query = query.where(Task.completed == True)
-    
-    tasks = session.exec(query).all()
-    return tasks
+
+    # An unchanged revision answers 304 from one primary-key lookup
+    etag = task_etag(await get_task_revision(session, user_id))
+    if etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+
+    try:
+        tasks, next_cursor = await fetch_task_page(
+            session,
+            user_id,
+            cursor=cursor,
+            limit=limit,
+            sort=sort,
+            order=order,
+            status_filter=status_filter,
+            priorities=priority,
+            tags=tags,
+            due_after=due_after,
+            due_before=due_before,
+            is_recurring=is_recurring,
+            recurrence_type=recurrence_type,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    response.headers.update(_cache_headers(etag))
+    return TaskPage(items=tasks, next_cursor=next_cursor, limit=limit)
+
+
+# Declared before /{task_id} so "search" is not parsed as a task id
+@router.get("/{user_id}/tasks/search", response_model=TaskSearchPage)
+async def search_user_tasks(
+    user_id: str,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find in title, description or tags"),
+    status_filter: str = Query("all", description="Filter by status: all, pending, completed"),
+    limit: int = Query(DEFAULT_SEARCH_PAGE_SIZE, ge=1, le=MAX_SEARCH_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page"),
+    priority: Optional[List[PriorityEnum]] = Query(None, description="Filter by one or more priorities"),
+    tags: Optional[List[str]] = Query(None, description="Only tasks carrying all of these tags"),
+    if_none_match: Optional[str] = Header(None),
+    current_user_id: str = Depends(get_current_user_id),
+    session: AsyncSession = Depends(get_async_session)
+):
+    # Demo mode: allow any user_id from URL
+    etag = task_etag(await get_task_revision(session, user_id))
+    if etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+
+    try:
+        hits, next_cursor = await search_tasks(
+            session,
+            user_id,
+            q,
+            cursor=cursor,
+            limit=limit,
+            status_filter=status_filter,
+            priorities=priority,
+            tags=tags,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    items = [
+        TaskSearchHit(
+            task=TaskRead.model_validate(task),
+            rank=rank,
+            title_highlight=title_highlight,
+            description_highlight=description_highlight,
+        )
+        for task, rank, title_highlight, description_highlight in hits
+    ]
+    response.headers.update(_cache_headers(etag))
+    return TaskSearchPage(items=items, next_cursor=next_cursor, limit=limit)
+
+
+# Declared before /{task_id} so "changes" is not parsed as a task id
+@router.get("/{user_id}/tasks/changes", response_model=TaskChanges)
+async def get_task_changes(
+    user_id: str,
+    since: int = Query(0, ge=0, description="Revision from the previous sync; 0 for a full snapshot"),
+    limit: int = Query(DEFAULT_CHANGES_PAGE_SIZE, ge=1, le=MAX_CHANGES_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page"),
+    current_user_id: str = Depends(get_current_user_id),
+    session: AsyncSession = Depends(get_async_session)
+):
+    # Demo mode: allow any user_id from URL
+    try:
+        revision, reset, tasks, deleted, next_cursor = await fetch_task_changes(
+            session, user_id, since, cursor=cursor, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    return TaskChanges(
+        revision=revision,
+        reset=reset,
+        tasks=tasks,
+        deleted=deleted,
+        next_cursor=next_cursor,
+        limit=limit,
+    )
 
 
 @router.post("/{user_id}/tasks", response_model=TaskRead)
-def create_task(
+async def create_task(
     user_id: str,
     task: TaskCreate,
     current_user_id: str = Depends(get_current_user_id),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     # In demo mode, allow any user_id
     # In production, you would check: if user_id != current_user_id: raise error
     # For now, use the URL user_id as the source of truth
 
     # Create new task with user_id
-    db_task = Task(
-        title=task.title,
-        description=task.description,
-        user_id=user_id
-    )
+    try:
+        db_task = build_task(user_id, task)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    db_task.updated_rev = await bump_task_revision(session, user_id)
 
     session.add(db_task)
-    session.commit()
-    session.refresh(db_task)
+    # Flush for the id; the event commits together with the task
+    await session.flush()
+    record_task_event(session, "created", db_task)
+    await session.commit()
+    await session.refresh(db_task)
     return db_task
 
 
+@router.post("/{user_id}/tasks:batch", response_model=TaskBatchResponse)
+async def batch_tasks(
+    user_id: str,
+    batch: TaskBatchRequest,
+    current_user_id: str = Depends(get_current_user_id),
+    session: AsyncSession = Depends(get_async_session)
+):
+    # Demo mode: allow any user_id from URL
+    # One transaction for the whole batch; failed items are reported, not raised
+    results = await apply_task_batch(session, user_id, batch.operations)
+    succeeded = sum(1 for result in results if result.success)
+    if succeeded:
+        await session.commit()
+
+    return TaskBatchResponse(results=results, succeeded=succeeded, failed=len(results) - succeeded)
+
+
 @router.get("/{user_id}/tasks/{task_id}", response_model=TaskRead)
-def get_task(
+async def get_task(
     user_id: str,
     task_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     current_user_id: str = Depends(get_current_user_id),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     # Demo mode: allow any user_id from URL
-    task = session.get(Task, task_id)
+    etag = task_etag(await get_task_revision(session, user_id))
+    if etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+
+    task = await session.get(Task, task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -80,100 +243,66 @@ def get_task(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
         )
-    
+
+    response.headers.update(_cache_headers(etag))
     return task
 
 
 @router.put("/{user_id}/tasks/{task_id}", response_model=TaskRead)
-def update_task(
+async def update_task(
     user_id: str,
     task_id: int,
     task_update: TaskUpdate,
     current_user_id: str = Depends(get_current_user_id),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     # Demo mode: allow any user_id from URL
-    db_task = session.get(Task, task_id)
+    # One UPDATE ... RETURNING; another user's task is "not found" too
+    db_task = await update_task_fields(session, user_id, task_id, task_update.model_dump(exclude_unset=True))
     if not db_task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
         )
 
-    if db_task.user_id != user_id:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Task not found"
-        )
-    
-    # Update task fields
-    for field, value in task_update.model_dump(exclude_unset=True).items():
-        setattr(db_task, field, value)
-    
-    db_task.updated_at = datetime.utcnow()
-    session.add(db_task)
-    session.commit()
-    session.refresh(db_task)
+    await session.commit()
     return db_task
 
 
 @router.delete("/{user_id}/tasks/{task_id}")
-def delete_task(
+async def delete_task(
     user_id: str,
     task_id: int,
     current_user_id: str = Depends(get_current_user_id),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     # Demo mode: allow any user_id from URL
-    db_task = session.get(Task, task_id)
+    db_task = await delete_task_returning(session, user_id, task_id)
     if not db_task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
         )
 
-    if db_task.user_id != user_id:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Task not found"
-        )
-    
-    session.delete(db_task)
-    session.commit()
+    await session.commit()
     return {"message": "Task deleted successfully"}
 
 
 @router.patch("/{user_id}/tasks/{task_id}/complete", response_model=TaskRead)
-def toggle_task_completion(
+async def toggle_task_completion(
     user_id: str,
     task_id: int,
     current_user_id: str = Depends(get_current_user_id),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     # Demo mode: allow any user_id from URL
-    db_task = session.get(Task, task_id)
+    # The toggle happens inside the UPDATE, so concurrent toggles never collapse
+    db_task = await toggle_task_completed(session, user_id, task_id)
     if not db_task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
         )
 
-    if db_task.user_id != user_id:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Task not found"
-        )
-    
-    # Toggle completion status
-    db_task.completed = not db_task.completed
-    db_task.updated_at = datetime.utcnow()
-    
-    if db_task.completed:
-        db_task.completed_at = datetime.utcnow()
-    else:
-        db_task.completed_at = None
-    
-    session.add(db_task)
-    session.commit()
-    session.refresh(db_task)
-    return db_task
\ No newline at end of file
+    await session.commit()
+    return db_task
@@ -3,26 +3,45 @@
 import os
 import sys
 from sqlalchemy import create_engine, text
+from sqlmodel import SQLModel
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from database import DATABASE_URL
+# Registers every table on SQLModel.metadata
+from models import conversation, message, notification, outbox, task  # noqa: F401
 
 
-def run_migrations():
+def run_migrations(database_url: str = DATABASE_URL):
     """Run all migrations."""
-    engine = create_engine(DATABASE_URL)
+    engine = create_engine(database_url)
 
     migrations = [
         ("001_create_conversations", "migrations.001_create_conversations"),
         ("002_create_messages", "migrations.002_create_messages"),
+        ("003_add_task_indexes", "migrations.003_add_task_indexes"),
+        ("004_add_pending_due_index", "migrations.004_add_pending_due_index"),
+        ("005_add_recurring_parent_index", "migrations.005_add_recurring_parent_index"),
+        ("006_add_recurrence_rule", "migrations.006_add_recurrence_rule"),
+        ("007_create_outbox", "migrations.007_create_outbox"),
+        ("008_add_pending_reminder_index", "migrations.008_add_pending_reminder_index"),
+        ("009_create_notifications", "migrations.009_create_notifications"),
+        ("010_add_conversation_summary", "migrations.010_add_conversation_summary"),
+        ("011_add_task_search", "migrations.011_add_task_search"),
+        ("012_create_task_revision", "migrations.012_create_task_revision"),
+        ("013_add_task_sync", "migrations.013_add_task_sync"),
+        ("014_add_outbox_dead_letter", "migrations.014_add_outbox_dead_letter"),
     ]
 
     print("🔄 Running database migrations...")
-    print(f"Database: {DATABASE_URL}")
+    print(f"Database: {database_url}")
     print()
 
+    # Migrations index and alter tables the app creates; a fresh database
+    # gets them from the models first, as the app does on startup
+    SQLModel.metadata.create_all(engine)
+
     with engine.connect() as connection:
         for migration_name, module_path in migrations:
             try:
@@ -32,6 +51,11 @@ def run_migrations():
                 print(f"⏳ Running {migration_name}...")
                 module.run(connection)
                 connection.commit()
+
+                # Migrations may ship an EXPLAIN-based self check
+                if hasattr(module, "verify"):
+                    module.verify(connection)
+                    connection.commit()
                 print(f"✅ {migration_name} completed")
 
             except Exception as e:
@@ -0,0 +1,39 @@
+"""Pydantic schemas for the notification API."""
+
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class NotificationRead(BaseModel):
+    """A notification as returned to the client."""
+
+    id: int
+    message: str
+    task_id: Optional[int] = None
+    type: str
+    created_at: datetime
+    read_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class NotificationPage(BaseModel):
+    """One page of a user's notifications, newest first."""
+
+    items: List[NotificationRead]
+    next_cursor: Optional[str] = None
+    unread: int
+
+
+class MarkReadRequest(BaseModel):
+    """Request body for marking notifications read (all when ids is omitted)."""
+
+    ids: Optional[List[int]] = None
+
+
+class UnreadCount(BaseModel):
+    """Unread notification count."""
+
+    unread: int
@@ -0,0 +1,15 @@
+"""Server-Sent Events helpers shared by the streaming endpoints."""
+
+import json
+from typing import Optional
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def format_sse(event: str, data: dict, event_id: Optional[int] = None) -> str:
+    """Encode one SSE frame"""
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
@@ -0,0 +1,145 @@
+"""
+Task batch operations
+Applies a list of create/update/complete/delete operations in one
+transaction with a fixed number of statements: one task revision bump,
+one SELECT for every referenced task, one multi-row INSERT for the
+creations, batched UPDATEs at flush, one DELETE and its tombstones.
+Shared by the REST batch endpoint and the MCP batch tool.
+"""
+
+from datetime import datetime
+from typing import Dict, List
+from sqlalchemy import delete
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+try:
+    from models.task import Task, TaskRead, BatchOpEnum, TaskBatchOperation, TaskBatchResult
+    from outbox import record_task_event
+    from task_mutations import SCHEDULE_FIELDS, build_task, next_occurrence_for
+    from task_revisions import bump_task_revision
+    from task_sync import record_task_tombstones
+except ImportError:
+    from .models.task import Task, TaskRead, BatchOpEnum, TaskBatchOperation, TaskBatchResult
+    from .outbox import record_task_event
+    from .task_mutations import SCHEDULE_FIELDS, build_task, next_occurrence_for
+    from .task_revisions import bump_task_revision
+    from .task_sync import record_task_tombstones
+
+
+def _failure(index: int, operation: TaskBatchOperation, error: str) -> TaskBatchResult:
+    return TaskBatchResult(
+        index=index, op=operation.op, success=False, task_id=operation.task_id, error=error
+    )
+
+
+def _success(index: int, operation: TaskBatchOperation, task: Task) -> TaskBatchResult:
+    return TaskBatchResult(
+        index=index, op=operation.op, success=True, task_id=task.id, task=TaskRead.model_validate(task)
+    )
+
+
+async def apply_task_batch(
+    session: AsyncSession,
+    user_id: str,
+    operations: List[TaskBatchOperation],
+) -> List[TaskBatchResult]:
+    """Apply operations to a user's tasks in request order
+
+    An operation that cannot be applied (unknown task, missing fields) is
+    reported in its result and skipped; the others still apply. Operations
+    on one task see the effect of earlier ones. Nothing is committed: the
+    caller commits, so either every applied operation persists or none,
+    and should roll back instead when no operation succeeded.
+
+    Args:
+        session: Async database session
+        user_id: Owner of the tasks
+        operations: Operations to apply
+
+    Returns:
+        One result per operation, in the same order
+    """
+    # Taken first: the tasks are then read under the user's revision lock
+    revision = await bump_task_revision(session, user_id)
+
+    referenced = {op.task_id for op in operations if op.op != BatchOpEnum.CREATE and op.task_id is not None}
+    tasks: Dict[int, Task] = {}
+    if referenced:
+        rows = await session.exec(
+            select(Task).where(Task.user_id == user_id, Task.id.in_(referenced))
+        )
+        tasks = {task.id: task for task in rows}
+
+    # Creations are inserted together up front: events need their ids
+    created: Dict[int, Task] = {}
+    rejected: Dict[int, str] = {}
+    for index, op in enumerate(operations):
+        if op.op != BatchOpEnum.CREATE or op.task is None:
+            continue
+        try:
+            task = build_task(user_id, op.task)
+        except ValueError as e:
+            rejected[index] = str(e)
+            continue
+        task.updated_rev = revision
+        created[index] = task
+    if created:
+        session.add_all(list(created.values()))
+        await session.flush()
+
+    now = datetime.utcnow()
+    results: List[TaskBatchResult] = []
+    deleted: List[Task] = []
+    for index, op in enumerate(operations):
+        if op.op == BatchOpEnum.CREATE:
+            task = created.get(index)
+            if task is None:
+                results.append(_failure(index, op, rejected.get(index, "create requires task")))
+                continue
+            record_task_event(session, "created", task)
+            results.append(_success(index, op, task))
+            continue
+
+        if op.task_id is None:
+            results.append(_failure(index, op, f"{op.op.value} requires task_id"))
+            continue
+        task = tasks.get(op.task_id)
+        if task is None:
+            results.append(_failure(index, op, "Task not found"))
+            continue
+
+        if op.op == BatchOpEnum.UPDATE:
+            changes = op.changes.model_dump(exclude_unset=True) if op.changes else {}
+            if not changes:
+                results.append(_failure(index, op, "update requires changes"))
+                continue
+            for field, value in changes.items():
+                setattr(task, field, value)
+            if task.parent_task_id is None and SCHEDULE_FIELDS & changes.keys():
+                task.next_occurrence = next_occurrence_for(task, now)
+            task.updated_at = now
+            task.updated_rev = revision
+            record_task_event(session, "updated", task)
+        elif op.op == BatchOpEnum.COMPLETE:
+            task.completed = op.completed
+            task.completed_at = now if op.completed else None
+            task.updated_at = now
+            task.updated_rev = revision
+            record_task_event(session, "completed" if op.completed else "updated", task)
+        elif op.op == BatchOpEnum.DELETE:
+            record_task_event(session, "deleted", task)
+            # Later operations on this task find nothing
+            del tasks[op.task_id]
+            deleted.append(task)
+        results.append(_success(index, op, task))
+
+    if deleted:
+        # Drop them from the unit of work first so no UPDATE is flushed for them
+        for task in deleted:
+            session.expunge(task)
+        await session.exec(delete(Task).where(Task.id.in_([task.id for task in deleted])))
+        record_task_tombstones(session, user_id, [task.id for task in deleted], revision)
+    # Updated tasks share column sets, so the flush sends them as executemany batches
+    await session.flush()
+    return results
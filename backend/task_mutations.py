@@ -0,0 +1,156 @@
+"""
+Task mutations
+Single-task writes as one statement each: UPDATE ... RETURNING and
+DELETE ... RETURNING, with the ownership check in the WHERE clause. No
+read-before-write, so concurrent toggles cannot lose an update and a write
+costs one round trip plus its outbox row. Shared by the REST routes and
+the MCP tools; callers commit, and roll back when nothing matched. Each
+write first bumps the user's task revision (task_revisions.py) and stamps
+the row with it; deletes leave a tombstone for delta sync (task_sync.py).
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+from sqlalchemy import case, delete, not_, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+try:
+    from models.task import Task, TaskCreate
+    from outbox import record_task_event
+    from recurring_tasks import RecurringTaskService
+    from task_revisions import bump_task_revision
+    from task_sync import record_task_tombstones
+except ImportError:
+    from .models.task import Task, TaskCreate
+    from .outbox import record_task_event
+    from .recurring_tasks import RecurringTaskService
+    from .task_revisions import bump_task_revision
+    from .task_sync import record_task_tombstones
+
+
+def build_task(user_id: str, data: TaskCreate) -> Task:
+    """Unsaved task with every field of a create request
+
+    A recurring task gets its first next_occurrence here, as
+    RecurringTaskService.create_recurring_task does.
+
+    Raises:
+        ValueError: if a recurring task lacks a due_date or a usable rule
+    """
+    task = Task(**data.model_dump(), user_id=user_id)
+    task.is_recurring = bool(task.is_recurring)
+    if task.is_recurring:
+        rule = RecurringTaskService.rule_for_task(task)
+        if rule is None:
+            raise ValueError("Recurring task requires a recurrence_type or recurrence_rule")
+        if task.due_date is None:
+            raise ValueError("Recurring task requires a due_date")
+        task.next_occurrence = rule.next_after(task.due_date, task.due_date)
+    return task
+
+
+# Fields that define a recurring parent's schedule
+SCHEDULE_FIELDS = frozenset({
+    "due_date", "is_recurring", "recurrence_type", "recurrence_rule", "recurrence_end_date",
+})
+
+
+def next_occurrence_for(task: Task, now: datetime) -> Optional[datetime]:
+    """next_occurrence of a recurring parent under its current schedule
+
+    Counted from now or the series anchor, whichever is later, so changing
+    the schedule does not backfill occurrences under the new rule.
+    """
+    if not task.is_recurring:
+        return None
+    rule = RecurringTaskService.rule_for_task(task)
+    anchor = RecurringTaskService.series_anchor(task)
+    if rule is None or anchor is None:
+        return None
+    return rule.next_after(anchor, max(anchor, now))
+
+
+def _owned(task_id: int, user_id: str):
+    return (Task.id == task_id) & (Task.user_id == user_id)
+
+
+async def _update_returning(session: AsyncSession, task_id: int, user_id: str, values: Dict[str, Any]) -> Optional[Task]:
+    revision = await bump_task_revision(session, user_id)
+    stmt = (
+        update(Task)
+        .where(_owned(task_id, user_id))
+        .values(**values, updated_rev=revision)
+        .returning(Task)
+        .execution_options(populate_existing=True)
+    )
+    return (await session.exec(stmt)).scalar_one_or_none()
+
+
+async def update_task_fields(
+    session: AsyncSession, user_id: str, task_id: int, changes: Dict[str, Any]
+) -> Optional[Task]:
+    """Set fields of a user's task; None if it does not exist
+
+    A schedule change on a recurring parent also moves its next_occurrence.
+    """
+    now = datetime.utcnow()
+    task = await _update_returning(session, task_id, user_id, {**changes, "updated_at": now})
+    if task is None:
+        return None
+    if task.parent_task_id is None and SCHEDULE_FIELDS & changes.keys():
+        next_occurrence = next_occurrence_for(task, now)
+        if next_occurrence != task.next_occurrence:
+            # Needs the whole updated row, so a second statement; the row is already locked
+            task = (await session.exec(
+                update(Task)
+                .where(Task.id == task.id)
+                .values(next_occurrence=next_occurrence)
+                .returning(Task)
+                .execution_options(populate_existing=True)
+            )).scalar_one()
+    record_task_event(session, "updated", task)
+    return task
+
+
+async def set_task_completed(
+    session: AsyncSession, user_id: str, task_id: int, completed: bool
+) -> Optional[Task]:
+    """Mark a user's task complete or incomplete; None if it does not exist"""
+    now = datetime.utcnow()
+    task = await _update_returning(session, task_id, user_id, {
+        "completed": completed,
+        "completed_at": now if completed else None,
+        "updated_at": now,
+    })
+    if task is not None:
+        record_task_event(session, "completed" if completed else "updated", task)
+    return task
+
+
+async def toggle_task_completed(session: AsyncSession, user_id: str, task_id: int) -> Optional[Task]:
+    """Flip a user's task between complete and incomplete; None if it does not exist
+
+    The new state is computed from the row inside the UPDATE (SET
+    expressions see the old values), so two concurrent toggles always
+    end where they started.
+    """
+    now = datetime.utcnow()
+    task = await _update_returning(session, task_id, user_id, {
+        "completed": not_(Task.completed),
+        "completed_at": case((Task.completed, None), else_=now),
+        "updated_at": now,
+    })
+    if task is not None:
+        record_task_event(session, "completed" if task.completed else "updated", task)
+    return task
+
+
+async def delete_task_returning(session: AsyncSession, user_id: str, task_id: int) -> Optional[Task]:
+    """Delete a user's task; returns the deleted row, or None if it did not exist"""
+    revision = await bump_task_revision(session, user_id)
+    stmt = delete(Task).where(_owned(task_id, user_id)).returning(Task)
+    task = (await session.exec(stmt)).scalar_one_or_none()
+    if task is not None:
+        record_task_event(session, "deleted", task)
+        record_task_tombstones(session, user_id, [task.id], revision)
+    return task
@@ -0,0 +1,204 @@
+"""
+Task listing queries
+Keyset (cursor) pagination, server-side filtering and sorting shared by the
+REST routes and the MCP tools
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import String, and_, case, func, literal, or_, tuple_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+try:
+    from models.task import Task, PriorityEnum, RecurrenceEnum
+except ImportError:
+    from .models.task import Task, PriorityEnum, RecurrenceEnum
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Sortable columns; nullable ones are ordered NULLS LAST in both directions
+SORT_FIELDS = {
+    "created_at": Task.created_at,
+    "due_date": Task.due_date,
+    "title": Task.title,
+}
+NULLABLE_SORT_FIELDS = {"due_date"}
+
+
+def encode_cursor(sort: str, order: str, task: Task) -> str:
+    """Encode the keyset position of the last task on a page"""
+    value = getattr(task, sort)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = {"s": sort, "o": order, "v": value, "i": task.id}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, order: str) -> Tuple[Any, int]:
+    """Decode a cursor into (sort value, task id)
+
+    Raises:
+        ValueError: if the cursor is malformed or was issued for another sort
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        value, task_id = payload["v"], int(payload["i"])
+        cursor_sort, cursor_order = payload["s"], payload["o"]
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+    if cursor_sort != sort or cursor_order != order:
+        raise ValueError("Cursor does not match the requested sort order")
+
+    if value is not None and sort in ("created_at", "due_date"):
+        value = datetime.fromisoformat(value)
+    return value, task_id
+
+
+def _keyset_predicate(sort: str, order: str, value: Any, task_id: int):
+    """WHERE clause selecting rows strictly after the cursor position"""
+    column = SORT_FIELDS[sort]
+    descending = order == "desc"
+
+    if sort not in NULLABLE_SORT_FIELDS:
+        if descending:
+            return tuple_(column, Task.id) < tuple_(value, task_id)
+        return tuple_(column, Task.id) > tuple_(value, task_id)
+
+    id_after = Task.id < task_id if descending else Task.id > task_id
+    if value is None:
+        # Already inside the trailing NULL block
+        return and_(column.is_(None), id_after)
+
+    value_after = column < value if descending else column > value
+    return or_(
+        value_after,
+        and_(column == value, id_after),
+        column.is_(None),
+    )
+
+
+def _order_by(sort: str, order: str) -> list:
+    column = SORT_FIELDS[sort]
+    if order == "desc":
+        clauses = [column.desc(), Task.id.desc()]
+    else:
+        clauses = [column.asc(), Task.id.asc()]
+    if sort in NULLABLE_SORT_FIELDS:
+        clauses[0] = clauses[0].nulls_last()
+    return clauses
+
+
+def _normalized_tags():
+    """SQL expression ',tag1,tag2,' for whole-tag LIKE matching"""
+    stripped = func.lower(func.replace(Task.tags, " ", ""), type_=String)
+    return literal(",", String) + stripped + literal(",", String)
+
+
+def apply_task_filters(
+    query,
+    status_filter: str = "all",
+    priorities: Optional[List[PriorityEnum]] = None,
+    tags: Optional[List[str]] = None,
+    due_after: Optional[datetime] = None,
+    due_before: Optional[datetime] = None,
+    is_recurring: Optional[bool] = None,
+    recurrence_type: Optional[RecurrenceEnum] = None,
+):
+    """Add the optional listing filters to a Task query"""
+    if status_filter == "pending":
+        query = query.where(Task.completed == False)
+    elif status_filter == "completed":
+        query = query.where(Task.completed == True)
+
+    if priorities:
+        query = query.where(Task.priority.in_(priorities))
+
+    if tags:
+        normalized = _normalized_tags()
+        for tag in tags:
+            tag = tag.strip().lower().replace(" ", "")
+            if tag:
+                query = query.where(normalized.contains(f",{tag},", autoescape=True))
+
+    if due_after:
+        query = query.where(Task.due_date >= due_after)
+    if due_before:
+        query = query.where(Task.due_date < due_before)
+
+    if is_recurring is not None:
+        query = query.where(Task.is_recurring == is_recurring)
+    if recurrence_type:
+        query = query.where(Task.recurrence_type == recurrence_type)
+
+    return query
+
+
+async def fetch_task_page(
+    session: AsyncSession,
+    user_id: str,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    sort: str = "created_at",
+    order: str = "desc",
+    **filters,
+) -> Tuple[List[Task], Optional[str]]:
+    """Fetch one page of a user's tasks
+
+    Args:
+        session: Async database session
+        user_id: Owner of the tasks
+        cursor: Opaque cursor from a previous page (optional)
+        limit: Page size (capped at MAX_PAGE_SIZE)
+        sort: One of SORT_FIELDS
+        order: "asc" or "desc"
+        **filters: Keyword arguments accepted by apply_task_filters
+
+    Returns:
+        Tuple of (tasks, next_cursor); next_cursor is None on the last page
+
+    Raises:
+        ValueError: on an unknown sort field/order or an invalid cursor
+    """
+    if sort not in SORT_FIELDS:
+        raise ValueError(f"Unsupported sort field: {sort}")
+    if order not in ("asc", "desc"):
+        raise ValueError(f"Unsupported sort order: {order}")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    query = apply_task_filters(select(Task).where(Task.user_id == user_id), **filters)
+
+    if cursor:
+        value, task_id = decode_cursor(cursor, sort, order)
+        query = query.where(_keyset_predicate(sort, order, value, task_id))
+
+    # Fetch one extra row to learn whether another page exists
+    query = query.order_by(*_order_by(sort, order)).limit(limit + 1)
+    tasks = list((await session.exec(query)).all())
+
+    next_cursor = None
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        next_cursor = encode_cursor(sort, order, tasks[-1])
+    return tasks, next_cursor
+
+
+async def count_tasks(
+    session: AsyncSession, user_id: str, **filters
+) -> Dict[str, int]:
+    """Count a user's matching tasks by completion state in one query"""
+    query = apply_task_filters(
+        select(
+            func.count(Task.id),
+            func.coalesce(func.sum(case((Task.completed == True, 1), else_=0)), 0),
+        ).where(Task.user_id == user_id),
+        **filters,
+    )
+    total, completed = (await session.exec(query)).one()
+    return {"total": total, "pending": total - completed, "completed": completed}
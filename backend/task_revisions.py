@@ -0,0 +1,115 @@
+"""
+Task revisions
+A per-user counter bumped by every task write and exposed as an ETag, so
+clients polling the task endpoints get 304 Not Modified without the task
+table being read. Written rows are stamped with the new revision for delta
+sync (task_sync.py). Write paths bump it before touching any task: the
+row stays locked until commit, so a user's revisions commit in order and
+locks are always taken revision first, then tasks. The recurring scheduler
+claims tasks first, so it only bumps revisions it can lock without waiting.
+"""
+
+from typing import Dict, Iterable, Optional
+from sqlalchemy import update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+try:
+    from database import IS_SQLITE
+    from models.task import TaskRevision
+except ImportError:
+    from .database import IS_SQLITE
+    from .models.task import TaskRevision
+
+if IS_SQLITE:
+    from sqlalchemy.dialects.sqlite import insert as dialect_insert
+else:
+    from sqlalchemy.dialects.postgresql import insert as dialect_insert
+
+
+async def bump_task_revisions(session: AsyncSession, user_ids: Iterable[str]) -> Dict[str, int]:
+    """Advance the task revision of each user in one upsert; callers commit
+
+    Returns:
+        The new revision of each user
+    """
+    # Sorted so two multi-user bumps always lock rows in the same order
+    rows = [{"user_id": user_id, "revision": 1} for user_id in sorted(set(user_ids))]
+    if not rows:
+        return {}
+    stmt = dialect_insert(TaskRevision).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={"revision": TaskRevision.revision + 1}
+    ).returning(TaskRevision.user_id, TaskRevision.revision)
+    return {user_id: revision for user_id, revision in await session.exec(stmt)}
+
+
+async def bump_task_revision(session: AsyncSession, user_id: str) -> int:
+    """Advance the task revision of one user; returns the new revision"""
+    return (await bump_task_revisions(session, [user_id]))[user_id]
+
+
+async def ensure_task_revisions(session: AsyncSession, user_ids: Iterable[str]):
+    """Create missing revision rows at 0; existing rows are neither changed nor locked"""
+    rows = [{"user_id": user_id, "revision": 0} for user_id in sorted(set(user_ids))]
+    if rows:
+        stmt = dialect_insert(TaskRevision).values(rows).on_conflict_do_nothing(index_elements=["user_id"])
+        await session.exec(stmt)
+
+
+async def try_bump_task_revisions(session: AsyncSession, user_ids: Iterable[str]) -> Dict[str, int]:
+    """Advance the revisions that no other transaction holds; callers commit
+
+    Rows locked by a concurrent write are skipped rather than waited for,
+    so this is safe while holding task locks. Users without a revision row
+    are skipped too: create them first with ensure_task_revisions.
+
+    Returns:
+        The new revision of each user that was bumped
+    """
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return {}
+    locked = (await session.exec(
+        select(TaskRevision.user_id)
+        .where(TaskRevision.user_id.in_(user_ids))
+        .order_by(TaskRevision.user_id)
+        .with_for_update(skip_locked=True)
+    )).all()
+    if not locked:
+        return {}
+    stmt = (
+        update(TaskRevision)
+        .where(TaskRevision.user_id.in_(locked))
+        .values(revision=TaskRevision.revision + 1)
+        .returning(TaskRevision.user_id, TaskRevision.revision)
+    )
+    return {user_id: revision for user_id, revision in await session.exec(stmt)}
+
+
+async def get_task_revision(session: AsyncSession, user_id: str) -> int:
+    """Current task revision of user_id; 0 before their first write
+
+    Read it before the tasks themselves: a write landing in between then
+    makes the response newer than its ETag, which only costs a refetch.
+    """
+    row = await session.get(TaskRevision, user_id, populate_existing=True)
+    return row.revision if row else 0
+
+
+def task_etag(revision: int) -> str:
+    """Weak ETag for task responses at a revision"""
+    return f'W/"tasks-{revision}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value matches etag (weak comparison)"""
+    if not if_none_match:
+        return False
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque:
+            return True
+    return False
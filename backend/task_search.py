@@ -0,0 +1,159 @@
+"""
+Task search queries
+Full-text search over task title, description and tags, backed by the
+database's own index: a weighted tsvector with a GIN index on Postgres and
+an FTS5 table on SQLite (see models.task.TASK_SEARCH_DDL). Every query word
+is matched as a prefix, results are ranked, and pages are keyset-paginated
+on (rank, id) like the task listing.
+"""
+
+import base64
+import json
+import re
+from typing import List, Optional, Tuple
+from sqlalchemy import and_, column, func, literal_column, or_, table
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+try:
+    from models.task import Task
+    from task_queries import apply_task_filters
+except ImportError:
+    from .models.task import Task
+    from .task_queries import apply_task_filters
+
+DEFAULT_SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
+MAX_QUERY_TERMS = 8
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+
+# Field weights: title over description over tags
+SQLITE_BM25_WEIGHTS = (10.0, 4.0, 2.0, 0.0)
+POSTGRES_CONFIG = "english"
+POSTGRES_HEADLINE = (
+    f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, "
+    "MaxWords=24, MinWords=8, MaxFragments=2, FragmentDelimiter=\" … \""
+)
+
+_TERM = re.compile(r"\w+")
+_TASK_FTS = table("task_fts", column("rowid"))
+
+# (task, rank, title_highlight, description_highlight)
+SearchHit = Tuple[Task, float, str, Optional[str]]
+
+
+def query_terms(text: str) -> List[str]:
+    """Lowercase search words of text (punctuation and operators dropped)"""
+    return _TERM.findall(text.lower())[:MAX_QUERY_TERMS]
+
+
+def _encode_cursor(terms: List[str], rank: float, task_id: int) -> str:
+    payload = {"q": " ".join(terms), "r": rank, "i": task_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str, terms: List[str]) -> Tuple[float, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        query, rank, task_id = payload["q"], float(payload["r"]), int(payload["i"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+    if query != " ".join(terms):
+        raise ValueError("Cursor does not match the search query")
+    return rank, task_id
+
+
+def _postgres_search(terms: List[str]):
+    """(base query, rank, title highlight, description highlight) on Postgres"""
+    tsquery = func.to_tsquery(POSTGRES_CONFIG, " & ".join(f"{term}:*" for term in terms))
+    vector = literal_column("task.search_vector")
+    rank = func.ts_rank_cd(vector, tsquery)
+    # Not part of the sort, so Postgres computes the headlines after LIMIT
+    title = func.ts_headline(POSTGRES_CONFIG, Task.title, tsquery, f"{POSTGRES_HEADLINE}, HighlightAll=true")
+    description = func.ts_headline(POSTGRES_CONFIG, Task.description, tsquery, POSTGRES_HEADLINE)
+    query = select(Task, rank, title, description).where(vector.op("@@")(tsquery))
+    return query, rank, title, description
+
+
+def _sqlite_search(user_id: str, terms: List[str]):
+    """(base query, rank, title highlight, description highlight) on SQLite"""
+    fts = literal_column("task_fts")
+    # bm25() is lower-is-better; negate it so both backends rank descending
+    rank = -func.bm25(fts, *SQLITE_BM25_WEIGHTS)
+    title = func.highlight(fts, 0, HIGHLIGHT_START, HIGHLIGHT_STOP)
+    description = func.snippet(fts, 1, HIGHLIGHT_START, HIGHLIGHT_STOP, "…", 16)
+    # user_id is indexed too so FTS5 only ranks this user's rows; the SQL
+    # filter on task.user_id stays the authoritative check
+    words = " ".join(f'"{term}"*' for term in terms)
+    owner = user_id.replace('"', '""')
+    match = f'{{title description tags}} : ({words}) AND user_id : "{owner}"'
+    query = (
+        select(Task, rank, title, description)
+        .select_from(Task)
+        .join(_TASK_FTS, _TASK_FTS.c.rowid == Task.id)
+        .where(fts.op("MATCH")(match))
+    )
+    return query, rank, title, description
+
+
+async def search_tasks(
+    session: AsyncSession,
+    user_id: str,
+    text: str,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_SEARCH_PAGE_SIZE,
+    **filters,
+) -> Tuple[List[SearchHit], Optional[str]]:
+    """Search a user's tasks, best match first
+
+    Args:
+        session: Async database session
+        user_id: Owner of the tasks
+        text: Free text; every word must match (as a word prefix) the
+              title, description or tags
+        cursor: Opaque cursor from a previous page (optional)
+        limit: Page size (capped at MAX_SEARCH_PAGE_SIZE)
+        **filters: Keyword arguments accepted by apply_task_filters
+
+    Returns:
+        Tuple of (hits, next_cursor); next_cursor is None on the last page
+
+    Raises:
+        ValueError: if text has no searchable words or the cursor is invalid
+    """
+    terms = query_terms(text)
+    if not terms:
+        raise ValueError("Search query must contain at least one word")
+    limit = max(1, min(limit, MAX_SEARCH_PAGE_SIZE))
+
+    if session.get_bind().dialect.name == "postgresql":
+        query, rank, title, description = _postgres_search(terms)
+    else:
+        query, rank, title, description = _sqlite_search(user_id, terms)
+    query = apply_task_filters(query.where(Task.user_id == user_id), **filters)
+
+    if cursor:
+        after_rank, after_id = _decode_cursor(cursor, terms)
+        query = query.where(or_(rank < after_rank, and_(rank == after_rank, Task.id < after_id)))
+
+    # Fetch one extra row to learn whether another page exists
+    query = query.order_by(rank.desc(), Task.id.desc()).limit(limit + 1)
+    rows = list((await session.exec(query)).all())
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_task, last_rank = rows[-1][0], rows[-1][1]
+        next_cursor = _encode_cursor(terms, last_rank, last_task.id)
+
+    hits = [
+        (task, rank_value, title_highlight or task.title, description_highlight if task.description else None)
+        for task, rank_value, title_highlight, description_highlight in rows
+    ]
+    return hits, next_cursor
+
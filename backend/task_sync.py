@@ -0,0 +1,313 @@
+"""
+Task delta sync
+Lets clients fetch only what changed since the revision they last saw:
+tasks whose updated_rev is newer plus tombstones of deleted tasks, as one
+keyset-paginated stream ordered by (revision, kind, id). An id is never
+both written and deleted in one sync. Tombstones are purged after a
+retention period; a client syncing from before the purge horizon gets a
+full snapshot flagged as a reset instead.
+"""
+
+import asyncio
+import base64
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import bindparam, delete, exists, literal, true, tuple_, union_all, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+import logging
+
+try:
+    from database import async_session_maker
+    from metrics import metrics_registry
+    from models.task import Task, TaskRevision, TaskTombstone
+except ImportError:
+    from .database import async_session_maker
+    from .metrics import metrics_registry
+    from .models.task import Task, TaskRevision, TaskTombstone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHANGES_PAGE_SIZE = 200
+MAX_CHANGES_PAGE_SIZE = 1000
+
+# Stream kinds; a deletion sorts after a write at the same revision
+LIVE, DELETED = 0, 1
+
+# (revision, kind, id) of the last entry on a page
+Position = Tuple[int, int, int]
+
+
+def record_task_tombstones(session: AsyncSession, user_id: str, task_ids: Iterable[int], revision: int):
+    """Add tombstones for deleted tasks to the session; callers commit"""
+    session.add_all([
+        TaskTombstone(user_id=user_id, task_id=task_id, deleted_rev=revision)
+        for task_id in task_ids
+    ])
+
+
+def encode_changes_cursor(since: int, revision: int, reset: bool, position: Position) -> str:
+    """Encode the sync window and the stream position of the last entry on a page"""
+    payload = {"s": since, "r": revision, "z": reset, "p": list(position)}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_changes_cursor(cursor: str, since: int) -> Tuple[int, bool, Position]:
+    """Decode a cursor into (revision, reset, position)
+
+    Raises:
+        ValueError: if the cursor is malformed or was issued for another since
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        cursor_since, revision, reset = int(payload["s"]), int(payload["r"]), bool(payload["z"])
+        last_rev, last_kind, last_id = (int(value) for value in payload["p"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+    if cursor_since != since:
+        raise ValueError("Cursor does not match since")
+    return revision, reset, (last_rev, last_kind, last_id)
+
+
+def _after(rev_column, id_column, kind: int, position: Optional[Position]):
+    """WHERE clause selecting a stream's entries strictly after the cursor position"""
+    if position is None:
+        return true()
+    last_rev, last_kind, last_id = position
+    if kind == last_kind:
+        return tuple_(rev_column, id_column) > tuple_(last_rev, last_id)
+    if kind > last_kind:
+        return rev_column >= last_rev
+    return rev_column > last_rev
+
+
+def _stream(rev_column, id_column, kind: int, where, position: Optional[Position], limit: int):
+    # Each stream is cut to the page size on its own index before merging
+    return (
+        select(rev_column.label("rev"), literal(kind).label("kind"), id_column.label("id"))
+        .where(*where, _after(rev_column, id_column, kind, position))
+        .order_by(rev_column, id_column)
+        .limit(limit)
+        .subquery()
+    )
+
+
+async def fetch_task_changes(
+    session: AsyncSession,
+    user_id: str,
+    since: int,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_CHANGES_PAGE_SIZE,
+) -> Tuple[int, bool, List[Task], List[int], Optional[str]]:
+    """One page of the changes to a user's tasks after revision ``since``
+
+    since=0 is a full snapshot. The window's upper bound is fixed by the
+    first page and carried in the cursor, so later writes wait for the
+    next sync. A since the server can no longer answer (older than the
+    purged tombstones, or ahead of the current revision) yields a full
+    snapshot with reset set.
+
+    Returns:
+        Tuple of (revision, reset, written tasks, deleted task ids, next_cursor)
+
+    Raises:
+        ValueError: if the cursor is invalid
+    """
+    if cursor:
+        revision, reset, position = decode_changes_cursor(cursor, since)
+    else:
+        row = await session.get(TaskRevision, user_id, populate_existing=True)
+        revision, purged_rev = (row.revision, row.purged_rev) if row else (0, 0)
+        reset = since > revision or 0 < since < purged_rev
+        position = None
+        # Idle clients are answered from the revision row alone
+        if since == revision and since > 0:
+            return revision, False, [], [], None
+    window_start = 0 if reset else since
+
+    streams = [_stream(
+        Task.updated_rev, Task.id, LIVE,
+        [Task.user_id == user_id, Task.updated_rev <= revision]
+        # Rows written before revisions existed are at 0
+        + ([Task.updated_rev > window_start] if window_start else []),
+        position, limit + 1,
+    )]
+    if window_start:
+        # A snapshot has nothing to delete. SQLite may hand a deleted id to a
+        # new task; its live row is in this window and supersedes the tombstone
+        reused = exists().where(
+            Task.id == TaskTombstone.task_id,
+            Task.user_id == user_id,
+            Task.updated_rev <= revision,
+        )
+        streams.append(_stream(
+            TaskTombstone.deleted_rev, TaskTombstone.task_id, DELETED,
+            [
+                TaskTombstone.user_id == user_id,
+                TaskTombstone.deleted_rev > window_start,
+                TaskTombstone.deleted_rev <= revision,
+                ~reused,
+            ],
+            position, limit + 1,
+        ))
+    parts = [select(stream.c.rev, stream.c.kind, stream.c.id) for stream in streams]
+    merged = (union_all(*parts) if len(parts) > 1 else parts[0]).subquery()
+    entries = (await session.exec(
+        select(merged.c.rev, merged.c.kind, merged.c.id)
+        .order_by(merged.c.rev, merged.c.kind, merged.c.id)
+        .limit(limit + 1)
+    )).all()
+
+    next_cursor = None
+    if len(entries) > limit:
+        entries = entries[:limit]
+        next_cursor = encode_changes_cursor(since, revision, reset, tuple(entries[-1]))
+
+    live_ids = [entry_id for _, kind, entry_id in entries if kind == LIVE]
+    tasks: List[Task] = []
+    if live_ids:
+        rows = await session.exec(select(Task).where(Task.user_id == user_id, Task.id.in_(live_ids)))
+        by_id = {task.id: task for task in rows}
+        # A task deleted since the stream was read shows up as a tombstone next sync
+        tasks = [by_id[task_id] for task_id in live_ids if task_id in by_id]
+    deleted = [entry_id for _, kind, entry_id in entries if kind == DELETED]
+    return revision, reset, tasks, deleted, next_cursor
+
+
+class TombstonePurger:
+    """Deletes tombstones older than the retention period
+
+    Each batch is one transaction: delete the oldest ``batch_size``
+    tombstones and raise each affected user's purged_rev to the newest
+    revision deleted. purged_rev is only ever raised, never overwritten, so
+    the horizon moves forward even with purgers on several replicas.
+    """
+
+    def __init__(
+        self,
+        session_maker=async_session_maker,
+        retention_days: float = 30.0,
+        batch_size: int = 1000,
+        interval_seconds: float = 3600.0,
+        max_batches_per_run: int = 100
+    ):
+        self.session_maker = session_maker
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+        self.max_batches_per_run = max_batches_per_run
+        self._task: Optional[asyncio.Task] = None
+
+        self.runs = 0
+        self.purged = 0
+        self.errors = 0
+        self.last_run_seconds = 0.0
+
+    async def _purge_batch(self, session: AsyncSession, cutoff: datetime) -> int:
+        oldest = (
+            select(TaskTombstone.id)
+            .where(TaskTombstone.deleted_at < cutoff)
+            .order_by(TaskTombstone.deleted_at, TaskTombstone.id)
+            .limit(self.batch_size)
+        )
+        rows = (await session.exec(
+            delete(TaskTombstone)
+            .where(TaskTombstone.id.in_(oldest.scalar_subquery()))
+            .returning(TaskTombstone.user_id, TaskTombstone.deleted_rev)
+        )).all()
+
+        horizons: Dict[str, int] = {}
+        for user_id, deleted_rev in rows:
+            horizons[user_id] = max(horizons.get(user_id, 0), deleted_rev)
+        if horizons:
+            # Only ever raised: a replica purging concurrently may hold an older horizon
+            revisions = TaskRevision.__table__
+            await session.exec(
+                update(revisions)
+                .where(
+                    revisions.c.user_id == bindparam("b_user_id"),
+                    revisions.c.purged_rev < bindparam("b_purged_rev"),
+                )
+                .values(purged_rev=bindparam("b_purged_rev")),
+                params=[
+                    {"b_user_id": user_id, "b_purged_rev": purged_rev}
+                    for user_id, purged_rev in sorted(horizons.items())
+                ],
+            )
+        return len(rows)
+
+    async def run_once(self, now: Optional[datetime] = None) -> int:
+        """Purge expired tombstones batch by batch; returns the number deleted"""
+        cutoff = (now or datetime.utcnow()) - timedelta(days=self.retention_days)
+        started = time.perf_counter()
+        purged = 0
+
+        for _ in range(self.max_batches_per_run):
+            try:
+                async with self.session_maker() as session:
+                    async with session.begin():
+                        deleted = await self._purge_batch(session, cutoff)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"❌ Tombstone purge failed: {e}")
+                break
+
+            purged += deleted
+            if deleted < self.batch_size:
+                break
+
+        self.runs += 1
+        self.purged += purged
+        self.last_run_seconds = time.perf_counter() - started
+        if purged:
+            logger.info(f"🧹 Purged {purged} task tombstones in {self.last_run_seconds:.3f}s")
+        return purged
+
+    async def _run_forever(self):
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        """Start the periodic loop on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run_forever())
+            logger.info("✅ Tombstone purger started")
+
+    async def stop(self):
+        """Cancel the periodic loop"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Tombstone purger stopped")
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            "tombstone_purger_runs_total": self.runs,
+            "tombstone_purger_purged_total": self.purged,
+            "tombstone_purger_errors_total": self.errors,
+            "tombstone_purger_last_run_seconds": round(self.last_run_seconds, 6),
+        }
+
+
+# Global purger instance
+tombstone_purger = TombstonePurger(
+    retention_days=float(os.getenv("TASK_TOMBSTONE_RETENTION_DAYS", "30")),
+    interval_seconds=float(os.getenv("TOMBSTONE_PURGE_INTERVAL_SECONDS", "3600")),
+)
+metrics_registry.register("tombstone_purger", tombstone_purger.metrics)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(tombstone_purger._run_forever())
@@ -0,0 +1,50 @@
+"""EXPLAIN checks for the task indexes of migration 003."""
+
+import importlib
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from run_migrations import run_migrations
+
+task_indexes = importlib.import_module("migrations.003_add_task_indexes")
+
+EXPECTED_INDEXES = {
+    "list_all": "ix_task_user_created",
+    "list_by_status": "ix_task_user_completed_created",
+    "due_range": "ix_task_user_completed_due",
+    "recurring": "ix_task_user_recurring_next",
+}
+
+
+@pytest.fixture
+def connection(tmp_path):
+    """Connection to a fresh SQLite database with every migration applied"""
+    database_url = f"sqlite:///{tmp_path / 'migrations.db'}"
+    assert run_migrations(database_url)
+    engine = create_engine(database_url)
+    with engine.connect() as connection:
+        yield connection
+    engine.dispose()
+
+
+def test_migrations_run_on_fresh_database(connection):
+    task_indexes.verify(connection)
+
+
+@pytest.mark.parametrize("query, index", sorted(EXPECTED_INDEXES.items()))
+def test_hot_query_uses_its_index(connection, query, index):
+    plan = task_indexes.explain_hot_queries(connection)[query]
+
+    assert plan.startswith("SEARCH task USING"), plan
+    assert f"INDEX {index} " in plan, plan
+    # Served in index order, without a separate sort step
+    assert "TEMP B-TREE" not in plan, plan
+
+
+def test_every_hot_query_is_checked():
+    assert set(task_indexes._hot_queries("sqlite")) == set(EXPECTED_INDEXES)
@@ -0,0 +1,265 @@
+"""
+Task Title Index
+Per-user in-memory index of task titles (token postings + trigram
+postings) used by the chat agents to resolve what a message refers to
+("done with groceries" -> the "Buy groceries" task) without listing the
+user's tasks. A user's index is loaded on first use with one narrow query
+and kept current from task events.
+"""
+
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Set, Tuple
+from sqlmodel import select
+
+try:
+    from database import async_session_maker
+    from metrics import metrics_registry
+    from models.task import Task
+except ImportError:
+    from .database import async_session_maker
+    from .metrics import metrics_registry
+    from .models.task import Task
+
+_TOKEN = re.compile(r"\w+")
+
+# Command words and fillers that never identify a task
+STOPWORDS = frozenset({
+    "a", "an", "the", "my", "me", "i", "im", "it", "is", "to", "of", "for", "on", "in", "with",
+    "and", "this", "that", "please", "task", "todo", "item", "done", "did", "do", "mark", "as",
+    "complete", "completed", "finish", "finished", "delete", "remove", "cancel", "forget",
+    "change", "update", "edit", "rename", "modify", "check", "tick", "off", "can", "you",
+})
+
+# (task_id, title, score)
+Resolution = Tuple[int, str, float]
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens of text, without stopwords"""
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def trigrams(tokens: List[str]) -> Set[str]:
+    """Padded character trigrams of tokens (tolerates typos and plurals)"""
+    grams = set()
+    for token in tokens:
+        padded = f"  {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class _UserIndex:
+    """Titles of one user's tasks"""
+
+    # Trigrams carried by more than this share of titles only score
+    # candidates, they do not generate them
+    COMMON_GRAM_RATIO = 0.2
+    # A query made only of common trigrams ("stuff" over hundreds of
+    # "stuff ..." titles) is too ambiguous to resolve past this many titles
+    MAX_SCAN = 500
+
+    def __init__(self):
+        self.titles: Dict[int, Tuple[str, bool]] = {}
+        self.task_tokens: Dict[int, FrozenSet[str]] = {}
+        self.task_grams: Dict[int, FrozenSet[str]] = {}
+        self.grams: Dict[str, Set[int]] = {}
+        self.loaded_at = time.monotonic()
+
+    def put(self, task_id: int, title: str, completed: bool):
+        if task_id in self.titles:
+            if self.titles[task_id][0] == title:
+                self.titles[task_id] = (title, completed)
+                return
+            self.remove(task_id)
+
+        tokens = frozenset(tokenize(title))
+        grams = frozenset(trigrams(list(tokens)))
+        self.titles[task_id] = (title, completed)
+        self.task_tokens[task_id] = tokens
+        self.task_grams[task_id] = grams
+        for gram in grams:
+            self.grams.setdefault(gram, set()).add(task_id)
+
+    def remove(self, task_id: int):
+        if self.titles.pop(task_id, None) is None:
+            return
+        del self.task_tokens[task_id]
+        for gram in self.task_grams.pop(task_id):
+            ids = self.grams.get(gram)
+            if ids is not None:
+                ids.discard(task_id)
+                if not ids:
+                    del self.grams[gram]
+
+    def _candidates(self, grams: Set[str]) -> Set[int]:
+        postings = sorted((self.grams[gram] for gram in grams if gram in self.grams), key=len)
+        if not postings:
+            return set()
+        common = max(32, int(len(self.titles) * self.COMMON_GRAM_RATIO))
+        rare = [ids for ids in postings if len(ids) <= common]
+        if rare:
+            return set().union(*rare)
+        return set(postings[0]) if len(postings[0]) <= self.MAX_SCAN else set()
+
+    def search(self, query: str, include_completed: bool, limit: int, min_score: float) -> List[Resolution]:
+        tokens = set(tokenize(query))
+        if not tokens:
+            return []
+        grams = trigrams(list(tokens))
+
+        scored = []
+        for task_id in self._candidates(grams):
+            title, completed = self.titles[task_id]
+            if completed and not include_completed:
+                continue
+            task_grams = self.task_grams[task_id]
+            task_tokens = self.task_tokens[task_id]
+            # Dice similarity of trigram sets, plus the share of title words named
+            dice = 2 * len(grams & task_grams) / (len(grams) + len(task_grams))
+            coverage = len(tokens & task_tokens) / max(len(task_tokens), 1)
+            score = round(0.7 * dice + 0.3 * coverage, 4)
+            if score >= min_score:
+                scored.append((task_id, title, score))
+
+        scored.sort(key=lambda item: (-item[2], -item[0]))
+        return scored[:limit]
+
+
+class TitleIndex:
+    """Fuzzy task title lookup for chat commands
+
+    Writes made through this process arrive as task events; anything else
+    (other replicas, recurring instances) is picked up when a user's index
+    is older than ``max_age_seconds`` and reloads. At most ``max_users``
+    indexes are kept, least recently used first out.
+    """
+
+    def __init__(
+        self,
+        session_maker=async_session_maker,
+        max_users: int = 10000,
+        max_age_seconds: float = 300.0,
+        min_score: float = 0.3
+    ):
+        self.session_maker = session_maker
+        self.max_users = max_users
+        self.max_age_seconds = max_age_seconds
+        self.min_score = min_score
+        self._users: "OrderedDict[str, _UserIndex]" = OrderedDict()
+        # Events that arrive while a user's index is loading, replayed after
+        self._loading: Dict[str, List[dict]] = {}
+        self._loads: Dict[str, asyncio.Future] = {}
+
+        self.lookups = 0
+        self.resolved = 0
+        self.loads = 0
+        self.events_applied = 0
+        self.lookup_seconds_total = 0.0
+
+    async def _load(self, user_id: str) -> _UserIndex:
+        self._loading[user_id] = []
+        try:
+            async with self.session_maker() as session:
+                rows = (await session.exec(
+                    select(Task.id, Task.title, Task.completed).where(Task.user_id == user_id)
+                )).all()
+            index = _UserIndex()
+            for task_id, title, completed in rows:
+                index.put(task_id, title, completed)
+            for event in self._loading[user_id]:
+                self._apply(index, event)
+        finally:
+            del self._loading[user_id]
+
+        self._users[user_id] = index
+        self._users.move_to_end(user_id)
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+        self.loads += 1
+        return index
+
+    async def _get(self, user_id: str) -> _UserIndex:
+        index = self._users.get(user_id)
+        if index is not None and time.monotonic() - index.loaded_at < self.max_age_seconds:
+            self._users.move_to_end(user_id)
+            return index
+
+        # Concurrent lookups for one user share a single load
+        load = self._loads.get(user_id)
+        if load is None:
+            load = asyncio.ensure_future(self._load(user_id))
+            self._loads[user_id] = load
+            load.add_done_callback(lambda _: self._loads.pop(user_id, None))
+        return await asyncio.shield(load)
+
+    async def resolve(
+        self,
+        user_id: str,
+        query: str,
+        include_completed: bool = False,
+        limit: int = 3
+    ) -> List[Resolution]:
+        """Tasks whose titles best match query, best first
+
+        Args:
+            user_id: Owner of the tasks
+            query: Free text naming a task ("done with groceries")
+            include_completed: Also match completed tasks
+            limit: Maximum results
+        """
+        index = await self._get(user_id)
+        start = time.perf_counter()
+        results = index.search(query, include_completed, limit, self.min_score)
+        self.lookup_seconds_total += time.perf_counter() - start
+        self.lookups += 1
+        if results:
+            self.resolved += 1
+        return results
+
+    def forget(self, user_id: str, task_id: int):
+        """Drop a task the database no longer has (e.g. deleted elsewhere)"""
+        index = self._users.get(user_id)
+        if index is not None:
+            index.remove(task_id)
+
+    @staticmethod
+    def _apply(index: _UserIndex, event: dict):
+        data = event.get("task_data") or {}
+        if event["event_type"] == "deleted":
+            index.remove(event["task_id"])
+        elif "title" in data:
+            index.put(event["task_id"], data["title"], bool(data.get("completed")))
+
+    async def on_task_event(self, event: dict):
+        """Task listener (see outbox.add_task_listener)"""
+        user_id = event["user_id"]
+        if user_id in self._loading:
+            self._loading[user_id].append(event)
+            return
+        index = self._users.get(user_id)
+        if index is not None:
+            self._apply(index, event)
+            self.events_applied += 1
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            "title_index_users": len(self._users),
+            "title_index_tasks": sum(len(index.titles) for index in self._users.values()),
+            "title_index_lookups_total": self.lookups,
+            "title_index_resolved_total": self.resolved,
+            "title_index_loads_total": self.loads,
+            "title_index_events_applied_total": self.events_applied,
+            "title_index_lookup_seconds_total": round(self.lookup_seconds_total, 6),
+        }
+
+
+# Global index instance
+title_index = TitleIndex(
+    max_users=int(os.getenv("TITLE_INDEX_MAX_USERS", "10000")),
+    max_age_seconds=float(os.getenv("TITLE_INDEX_MAX_AGE_SECONDS", "300")),
+)
+metrics_registry.register("title_index", title_index.metrics)
@@ -4,6 +4,8 @@ import { useState, useEffect } from 'react';
 import { Task, tasksAPI } from '@/lib/api';
 import TaskCard from './TaskCard';
 
+const PAGE_SIZE = 50;
+
 interface TaskListProps {
   userId: string;
   refreshTrigger?: number;
@@ -13,16 +15,20 @@ export default function TaskList({ userId, refreshTrigger = 0 }: TaskListProps)
   const [tasks, setTasks] = useState<Task[]>([]);
   const [loading, setLoading] = useState(true);
   const [statusFilter, setStatusFilter] = useState('all');
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     fetchTasks();
   }, [userId, refreshTrigger, statusFilter]);
 
+  // First page only; further pages are loaded on demand
   const fetchTasks = async () => {
     setLoading(true);
     try {
-      const data = await tasksAPI.getTasks(userId, statusFilter);
-      setTasks(data);
+      const page = await tasksAPI.getTaskPage(userId, { statusFilter, limit: PAGE_SIZE });
+      setTasks(page.items);
+      setNextCursor(page.next_cursor);
     } catch (error) {
       console.error('Error fetching tasks:', error);
     } finally {
@@ -30,6 +36,20 @@ export default function TaskList({ userId, refreshTrigger = 0 }: TaskListProps)
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const page = await tasksAPI.getTaskPage(userId, { statusFilter, limit: PAGE_SIZE, cursor: nextCursor });
+      setTasks(current => [...current, ...page.items]);
+      setNextCursor(page.next_cursor);
+    } catch (error) {
+      console.error('Error fetching tasks:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleTaskUpdate = (updatedTask: Task) => {
     setTasks(tasks.map(task => task.id === updatedTask.id ? updatedTask : task));
   };
@@ -93,6 +113,15 @@ export default function TaskList({ userId, refreshTrigger = 0 }: TaskListProps)
               onTaskDelete={handleTaskDelete}
             />
           ))}
+          {nextCursor && (
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="w-full px-4 py-2 rounded-lg font-medium bg-gray-200 text-gray-800 hover:bg-gray-300 disabled:opacity-50"
+            >
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </button>
+          )}
         </div>
       )}
     </div>
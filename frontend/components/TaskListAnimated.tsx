@@ -5,6 +5,8 @@ import { motion, AnimatePresence } from 'framer-motion';
 import { Task, tasksAPI } from '@/lib/api';
 import TaskCard from './TaskCard';
 
+const PAGE_SIZE = 50;
+
 interface TaskListProps {
   userId: string;
   refreshTrigger?: number;
@@ -14,16 +16,20 @@ export default function TaskListAnimated({ userId, refreshTrigger = 0 }: TaskLis
   const [tasks, setTasks] = useState<Task[]>([]);
   const [loading, setLoading] = useState(true);
   const [statusFilter, setStatusFilter] = useState('all');
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     fetchTasks();
   }, [userId, refreshTrigger, statusFilter]);
 
+  // First page only; further pages are loaded on demand
   const fetchTasks = async () => {
     setLoading(true);
     try {
-      const data = await tasksAPI.getTasks(userId, statusFilter);
-      setTasks(data);
+      const page = await tasksAPI.getTaskPage(userId, { statusFilter, limit: PAGE_SIZE });
+      setTasks(page.items);
+      setNextCursor(page.next_cursor);
     } catch (error) {
       console.error('Error fetching tasks:', error);
     } finally {
@@ -31,6 +37,20 @@ export default function TaskListAnimated({ userId, refreshTrigger = 0 }: TaskLis
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const page = await tasksAPI.getTaskPage(userId, { statusFilter, limit: PAGE_SIZE, cursor: nextCursor });
+      setTasks(current => [...current, ...page.items]);
+      setNextCursor(page.next_cursor);
+    } catch (error) {
+      console.error('Error fetching tasks:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleTaskUpdate = (updatedTask: Task) => {
     setTasks(tasks.map(task => task.id === updatedTask.id ? updatedTask : task));
   };
@@ -213,6 +233,18 @@ export default function TaskListAnimated({ userId, refreshTrigger = 0 }: TaskLis
           )}
         </AnimatePresence>
       )}
+
+      {!loading && nextCursor && (
+        <motion.button
+          onClick={loadMore}
+          disabled={loadingMore}
+          className="mt-4 w-full px-4 py-2 rounded-lg font-medium bg-gray-200 text-gray-700 hover:bg-gray-300 disabled:opacity-50"
+          whileHover={{ scale: 1.02 }}
+          whileTap={{ scale: 0.98 }}
+        >
+          {loadingMore ? '⏳ Loading...' : 'Load more'}
+        </motion.button>
+      )}
     </motion.div>
   );
 }
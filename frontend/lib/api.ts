@@ -12,6 +12,34 @@ export interface Task {
   completed_at?: string;
 }
 
+export interface TaskPage {
+  items: Task[];
+  next_cursor: string | null;
+  limit: number;
+}
+
+export interface TaskChanges {
+  revision: number;
+  reset: boolean;
+  tasks: Task[];
+  deleted: number[];
+  next_cursor: string | null;
+  limit: number;
+}
+
+export interface TaskListParams {
+  statusFilter?: string;
+  limit?: number;
+  cursor?: string | null;
+  priority?: string[];
+  tags?: string[];
+  dueAfter?: string;
+  dueBefore?: string;
+  isRecurring?: boolean;
+  sort?: 'created_at' | 'due_date' | 'title';
+  order?: 'asc' | 'desc';
+}
+
 export interface TaskCreate {
   title: string;
   description?: string;
@@ -131,14 +159,56 @@ apiClient.interceptors.response.use(
 
 // API methods for tasks
 export const tasksAPI = {
-  // Get all tasks for a user
-  getTasks: async (userId: string, statusFilter: string = 'all') => {
-    const response = await apiClient.get<Task[]>(
-      `/api/${userId}/tasks?status_filter=${statusFilter}`
+  // Get one page of tasks for a user
+  getTaskPage: async (userId: string, params: TaskListParams = {}) => {
+    const query = new URLSearchParams();
+    query.set('status_filter', params.statusFilter ?? 'all');
+    if (params.limit) query.set('limit', String(params.limit));
+    if (params.cursor) query.set('cursor', params.cursor);
+    params.priority?.forEach((p) => query.append('priority', p));
+    params.tags?.forEach((t) => query.append('tags', t));
+    if (params.dueAfter) query.set('due_after', params.dueAfter);
+    if (params.dueBefore) query.set('due_before', params.dueBefore);
+    if (params.isRecurring !== undefined) query.set('is_recurring', String(params.isRecurring));
+    if (params.sort) query.set('sort', params.sort);
+    if (params.order) query.set('order', params.order);
+
+    const response = await apiClient.get<TaskPage>(
+      `/api/${userId}/tasks?${query.toString()}`
     );
     return response.data;
   },
 
+  // Get everything written or deleted since a revision (0 = full snapshot),
+  // following page cursors. Store `revision` and pass it as `since` next time;
+  // when `reset` is true, replace the local tasks instead of merging.
+  getTaskChanges: async (userId: string, since: number = 0) => {
+    const changes: TaskChanges = {
+      revision: since, reset: false, tasks: [], deleted: [], next_cursor: null, limit: 0,
+    };
+    let cursor: string | null = null;
+    do {
+      const query = new URLSearchParams({ since: String(since), limit: '1000' });
+      if (cursor) query.set('cursor', cursor);
+      const response = await apiClient.get<TaskChanges>(
+        `/api/${userId}/tasks/changes?${query.toString()}`
+      );
+      const page: TaskChanges = response.data;
+      changes.revision = page.revision;
+      changes.reset = page.reset;
+      changes.limit = page.limit;
+      // Pages are in revision order: a later entry for an id replaces an earlier one
+      const written = new Set(page.tasks.map((task) => task.id));
+      const removed = new Set(page.deleted);
+      changes.tasks = changes.tasks.filter((task) => !removed.has(task.id) && !written.has(task.id));
+      changes.deleted = changes.deleted.filter((id) => !written.has(id));
+      changes.tasks.push(...page.tasks);
+      changes.deleted.push(...page.deleted);
+      cursor = page.next_cursor;
+    } while (cursor);
+    return changes;
+  },
+
   // Get a specific task
   getTask: async (userId: string, taskId: number) => {
     const response = await apiClient.get<Task>(`/api/${userId}/tasks/${taskId}`);